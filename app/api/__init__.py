@@ -2,5 +2,6 @@
 
 from .memory_routes import router as memory_router
 from .health_routes import router as health_router
+from .admin_routes import router as admin_router
 
-__all__ = ["memory_router", "health_router"]
\ No newline at end of file
+__all__ = ["memory_router", "health_router", "admin_router"]
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""Administrative routes for bulk export, import, replica snapshots and compression."""
+
+import tempfile
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
+
+from ..services import MemoryService, MemoryArchive, publish_snapshot
+from ..services.vector_store import to_epoch_seconds
+from ..utils.logger import get_logger
+from .memory_routes import get_memory_service, require_primary
+
+logger = get_logger(__name__)
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+# Uploaded archives larger than this are spooled to a temporary file
+_IMPORT_SPOOL_BYTES = 64 * 1024 * 1024
+
+
+@router.get("/export", summary="Export Memories")
+async def export_memories(
+    user_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    memory_service: MemoryService = Depends(get_memory_service)
+):
+    """Stream stored memories and their embeddings as a tar archive."""
+    archive = MemoryArchive(memory_service)
+    filename = f"memorylink-export-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.tar"
+
+    return StreamingResponse(
+        archive.export(
+            user_id=user_id,
+            since=to_epoch_seconds(since) if since else None,
+            until=to_epoch_seconds(until) if until else None
+        ),
+        media_type="application/x-tar",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/import", summary="Import Memories", dependencies=[Depends(require_primary)])
+async def import_memories(
+    request: Request,
+    memory_service: MemoryService = Depends(get_memory_service)
+):
+    """Bulk-load an exported archive without re-embedding."""
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=_IMPORT_SPOOL_BYTES) as upload:
+            async for data in request.stream():
+                upload.write(data)
+            upload.seek(0)
+
+            return await MemoryArchive(memory_service).import_archive(upload)
+
+    except ValueError as e:
+        logger.error(f"Validation error importing memories: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    except Exception as e:
+        logger.error(f"Unexpected error importing memories: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error occurred while importing memories"
+        )
+
+
+@router.post("/snapshot", summary="Publish Replica Snapshot", dependencies=[Depends(require_primary)])
+async def create_snapshot(
+    memory_service: MemoryService = Depends(get_memory_service)
+):
+    """Write a memory-mapped snapshot of the store for read-only replicas."""
+    try:
+        return await publish_snapshot(memory_service.vector_store, user_keys=memory_service.user_keys)
+
+    except ValueError as e:
+        logger.error(f"Validation error publishing snapshot: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    except Exception as e:
+        logger.error(f"Unexpected error publishing snapshot: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error occurred while publishing snapshot"
+        )
+
+
+@router.post(
+    "/compression/dictionary",
+    summary="Train Compression Dictionary",
+    dependencies=[Depends(require_primary)]
+)
+async def train_compression_dictionary(
+    sample_size: int = Query(default=1000, ge=1, le=100000),
+    memory_service: MemoryService = Depends(get_memory_service)
+):
+    """Train a dictionary on stored memories and compress new writes with it."""
+    try:
+        return await memory_service.train_compression_dictionary(sample_size)
+
+    except ValueError as e:
+        logger.error(f"Validation error training compression dictionary: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    except Exception as e:
+        logger.error(f"Unexpected error training compression dictionary: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error occurred while training compression dictionary"
+        )
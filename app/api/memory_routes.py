@@ -1,19 +1,33 @@
 """Memory API routes."""
 
+import json
 import time
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends, status
-from fastapi.responses import JSONResponse
+from datetime import datetime
+from typing import List, Dict, Any, AsyncIterator, Optional
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from ..models.memory_models import (
     AddMemoryRequest,
     AddMemoryResponse,
+    MemoryField,
+    MemoryRecord,
+    ListMemoriesResponse,
     SearchMemoryRequest,
     SearchMemoryResponse,
     MemorySearchResult,
+    BatchSearchMemoryRequest,
+    BatchSearchResult,
+    BatchSearchMemoryResponse,
     ErrorResponse
 )
-from ..services import MemoryService
+from ..services import (
+    MemoryService,
+    DuplicateMemoryError,
+    IngestionPipeline,
+    IngestionUnavailableError,
+    get_ingestion_pipeline
+)
 from ..utils.logger import get_logger
 from ..config import get_settings
 
@@ -28,7 +42,21 @@ async def get_memory_service() -> MemoryService:
     return service
 
 
-@router.post("/add", response_model=AddMemoryResponse, summary="Add Memory")
+async def require_primary():
+    """Reject writes on read-only search replicas."""
+    if get_settings().serving_mode == "replica":
+        raise HTTPException(
+            status_code=status.HTTP_405_METHOD_NOT_ALLOWED,
+            detail="This node is a read-only search replica"
+        )
+
+
+@router.post(
+    "/add",
+    response_model=AddMemoryResponse,
+    summary="Add Memory",
+    dependencies=[Depends(require_primary)]
+)
 async def add_memory(
     request: AddMemoryRequest,
     memory_service: MemoryService = Depends(get_memory_service)
@@ -38,19 +66,27 @@ async def add_memory(
         start_time = time.time()
         
         # Add the memory
-        memory_entry = await memory_service.add_memory(request)
+        memory_entry, deduplicated = await memory_service.store_memory(request)
         
         processing_time = (time.time() - start_time) * 1000
         
         response = AddMemoryResponse(
             id=memory_entry.id,
-            message="Memory added successfully",
-            timestamp=memory_entry.timestamp
+            message="Memory already exists" if deduplicated else "Memory added successfully",
+            timestamp=memory_entry.timestamp,
+            deduplicated=deduplicated
         )
         
         logger.info(f"Added memory {memory_entry.id} in {processing_time:.2f}ms")
         return response
     
+    except DuplicateMemoryError as e:
+        logger.info(f"Rejected duplicate memory: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
     except ValueError as e:
         logger.error(f"Validation error adding memory: {str(e)}")
         raise HTTPException(
@@ -66,7 +102,85 @@ async def add_memory(
         )
 
 
-@router.post("/search", response_model=SearchMemoryResponse, summary="Search Memories")
+@router.post(
+    "/add/async",
+    response_model=AddMemoryResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Add Memory Asynchronously",
+    dependencies=[Depends(require_primary)]
+)
+async def add_memory_async(
+    request: AddMemoryRequest,
+    response: Response,
+    pipeline: IngestionPipeline = Depends(get_ingestion_pipeline)
+):
+    """Accept a memory durably and index it in the background.
+    
+    Returns 202 once the memory is in the write-ahead log, or 200 when it
+    duplicates an existing memory.
+    """
+    try:
+        start_time = time.time()
+        
+        memory_entry, deduplicated = await pipeline.enqueue(request)
+        
+        processing_time = (time.time() - start_time) * 1000
+        
+        if deduplicated:
+            response.status_code = status.HTTP_200_OK
+        
+        logger.info(f"Accepted memory {memory_entry.id} in {processing_time:.2f}ms")
+        return AddMemoryResponse(
+            id=memory_entry.id,
+            message="Memory already exists" if deduplicated else "Memory accepted for indexing",
+            timestamp=memory_entry.timestamp,
+            deduplicated=deduplicated,
+            queued=not deduplicated
+        )
+    
+    except DuplicateMemoryError as e:
+        logger.info(f"Rejected duplicate memory: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    
+    except IngestionUnavailableError as e:
+        logger.warning(f"Asynchronous ingestion unavailable: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    
+    except ValueError as e:
+        logger.error(f"Validation error adding memory: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    except Exception as e:
+        logger.error(f"Unexpected error adding memory: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error occurred while adding memory"
+        )
+
+
+@router.get("/stats/ingestion", summary="Get Ingestion Statistics")
+async def get_ingestion_stats(
+    pipeline: IngestionPipeline = Depends(get_ingestion_pipeline)
+):
+    """Get queue and write-ahead log statistics for asynchronous ingestion."""
+    return pipeline.get_stats()
+
+
+@router.post(
+    "/search",
+    response_model=SearchMemoryResponse,
+    response_model_exclude_unset=True,
+    summary="Search Memories"
+)
 async def search_memories(
     request: SearchMemoryRequest,
     memory_service: MemoryService = Depends(get_memory_service)
@@ -105,6 +219,108 @@ async def search_memories(
         )
 
 
+def _json_default(value: Any) -> Any:
+    """Serialize values the json module does not handle natively."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+async def _ndjson(records: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Encode records as newline-delimited JSON, ending with an error record if they fail."""
+    try:
+        async for record in records:
+            yield (json.dumps(record, default=_json_default) + "\n").encode("utf-8")
+    
+    except Exception as e:
+        # The 200 status is already sent, so the failure is reported in the stream itself
+        logger.error(f"Error during streaming search: {str(e)}")
+        detail = str(e) if isinstance(e, ValueError) else "Internal server error occurred during search"
+        yield (json.dumps({"type": "error", "detail": detail}) + "\n").encode("utf-8")
+
+
+@router.post("/search/stream", summary="Stream Search Results")
+async def search_memories_stream(
+    request: SearchMemoryRequest,
+    memory_service: MemoryService = Depends(get_memory_service)
+):
+    """Search for memories, streaming each result as NDJSON as soon as it is decrypted.
+    
+    Each line is a ``{"type": "result", ...}`` record shaped like a search
+    result, followed by one ``{"type": "summary", ...}`` record with timings.
+    A failure once the stream has started ends it with a
+    ``{"type": "error", "detail": ...}`` record instead of the summary.
+    """
+    try:
+        # Retrieval errors are reported before the stream starts
+        candidates = await memory_service.find_search_candidates(request)
+    
+    except ValueError as e:
+        logger.error(f"Validation error in streaming search: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    except Exception as e:
+        logger.error(f"Unexpected error in streaming search: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error occurred during search"
+        )
+    
+    return StreamingResponse(
+        _ndjson(memory_service.stream_search_results(request, candidates)),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.post(
+    "/search/batch",
+    response_model=BatchSearchMemoryResponse,
+    response_model_exclude_unset=True,
+    summary="Batch Search Memories"
+)
+async def search_memories_batch(
+    request: BatchSearchMemoryRequest,
+    memory_service: MemoryService = Depends(get_memory_service)
+):
+    """Run several semantic searches in one request."""
+    try:
+        start_time = time.time()
+        
+        # Perform the searches
+        grouped_results = await memory_service.search_memories_batch(request)
+        
+        processing_time = (time.time() - start_time) * 1000
+        
+        response = BatchSearchMemoryResponse(
+            results=[
+                BatchSearchResult(query=query, results=results, total_found=len(results))
+                for query, results in grouped_results
+            ],
+            total_queries=len(grouped_results),
+            execution_time_ms=round(processing_time, 2)
+        )
+        
+        logger.info(f"Batch search of {len(grouped_results)} queries completed in {processing_time:.2f}ms")
+        return response
+    
+    except ValueError as e:
+        logger.error(f"Validation error in batch search: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    except Exception as e:
+        logger.error(f"Unexpected error in batch search: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error occurred during batch search"
+        )
+
+
 @router.get("/user/{user_id}/count", summary="Get User Memory Count")
 async def get_user_memory_count(
     user_id: str,
@@ -127,15 +343,99 @@ async def get_user_memory_count(
         )
 
 
-@router.get("/{memory_id}", summary="Get Memory by ID")
+@router.get(
+    "/user/{user_id}",
+    response_model=ListMemoriesResponse,
+    response_model_exclude_unset=True,
+    summary="List User Memories"
+)
+async def list_memories(
+    user_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[List[MemoryField]] = Query(None),
+    memory_service: MemoryService = Depends(get_memory_service)
+):
+    """List a user's memories, newest first; without ``text`` in ``fields`` nothing is decrypted."""
+    try:
+        memories = await memory_service.list_memories(user_id, limit, offset, since, until, fields)
+        
+        return ListMemoriesResponse(
+            user_id=user_id,
+            memories=memories,
+            total_returned=len(memories),
+            offset=offset
+        )
+    
+    except ValueError as e:
+        logger.error(f"Validation error listing memories for user {user_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    except Exception as e:
+        logger.error(f"Error listing memories for user {user_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error listing memories"
+        )
+
+
+@router.delete("/user/{user_id}", summary="Delete User", dependencies=[Depends(require_primary)])
+async def delete_user(
+    user_id: str,
+    background_tasks: BackgroundTasks,
+    memory_service: MemoryService = Depends(get_memory_service)
+):
+    """Delete a user's memories.
+    
+    With per-user keys the key is destroyed, which makes every memory
+    unreadable at once, and the rows are purged in the background
+    (``memories_deleted`` is then ``null``). Without a key to destroy the
+    memories stay readable until their rows are gone, so they are purged
+    before responding.
+    """
+    try:
+        key_destroyed = await memory_service.delete_user(user_id)
+        if key_destroyed:
+            background_tasks.add_task(memory_service.purge_user_memories, user_id)
+            memories_deleted = None
+        else:
+            memories_deleted = await memory_service.purge_user_memories(user_id)
+        
+        return {
+            "message": "User deleted successfully",
+            "user_id": user_id,
+            "key_destroyed": key_destroyed,
+            "memories_deleted": memories_deleted
+        }
+    
+    except Exception as e:
+        logger.error(f"Error deleting user {user_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error deleting user"
+        )
+
+
+@router.get(
+    "/{memory_id}",
+    response_model=MemoryRecord,
+    response_model_exclude_unset=True,
+    summary="Get Memory by ID"
+)
 async def get_memory(
     memory_id: str,
     user_id: str,
+    fields: Optional[List[MemoryField]] = Query(None),
     memory_service: MemoryService = Depends(get_memory_service)
 ):
-    """Get a specific memory by its ID."""
+    """Get a specific memory by its ID, optionally projected onto ``fields``."""
     try:
-        memory = await memory_service.get_memory(memory_id, user_id)
+        memory = await memory_service.get_memory(memory_id, user_id, fields)
         
         if not memory:
             raise HTTPException(
@@ -156,7 +456,7 @@ async def get_memory(
         )
 
 
-@router.delete("/{memory_id}", summary="Delete Memory")
+@router.delete("/{memory_id}", summary="Delete Memory", dependencies=[Depends(require_primary)])
 async def delete_memory(
     memory_id: str,
     user_id: str,
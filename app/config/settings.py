@@ -1,7 +1,7 @@
 """Application settings and configuration."""
 
 import os
-from typing import List, Optional
+from typing import List, Optional, Literal
 from functools import lru_cache
 from pydantic import BaseSettings, validator
 
@@ -18,21 +18,119 @@ class Settings(BaseSettings):
     
     # Security Configuration
     encryption_key: Optional[str] = None
+    # Cipher new values are written in; older releases cannot read AES-GCM values
+    encryption_cipher: Literal["aes-gcm", "fernet"] = "fernet"
+    # Retired keys, newest first
+    encryption_previous_keys: List[str] = []
+    # Stable key for blinded indexes and content hashes; unset follows the encryption key
+    index_key: Optional[str] = None
     allowed_origins: List[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
     
+    # Compression Configuration
+    # Applies under AES-GCM only; older releases cannot read compressed values
+    compression_codec: Literal["off", "zlib", "zstd"] = "off"
+    compression_min_bytes: int = 512
+    compression_level: int = 6
+    compression_dictionary_path: str = "./data/compression_dictionaries"
+    compression_dictionary_size: int = 16384
+    
+    # Decryption Configuration
+    decrypt_workers: int = 4
+    decrypt_parallel_threshold: int = 32
+    
+    # Ciphertext Migration Configuration
+    # One-way: releases before the compact format cannot read migrated values
+    ciphertext_migration_enabled: bool = False
+    ciphertext_migration_batch_size: int = 500
+    
+    # User Key Configuration
+    user_keys_enabled: bool = False
+    user_key_store_path: str = "./data/user_keys.sqlite3"
+    user_key_cache_entries: int = 10000
+    # Seconds a cached key is trusted before re-checking that no other process destroyed it
+    user_key_recheck_s: float = 5.0
+    
+    # Key Rotation Configuration
+    key_rotation_enabled: bool = False
+    key_rotation_batch_size: int = 200
+    key_rotation_rows_per_second: float = 500.0
+    key_rotation_checkpoint_path: str = "./data/key_rotation.json"
+    
     # Database Configuration
     chroma_db_path: str = "./data/chromadb"
     chroma_collection_name: str = "memory_embeddings"
+    vector_store_shards: int = 1
+    vector_store_workers: int = 4
+    
+    # Hot Tier Configuration
+    hot_tier_enabled: bool = False
+    hot_tier_window_days: float = 30.0
+    hot_tier_max_memories: int = 50000
+    hot_tier_maintenance_interval_s: float = 300.0
     
     # Embedding Configuration
     embedding_model: str = "all-MiniLM-L6-v2"
     embedding_dimension: int = 384
+    embedding_executor_workers: int = 2
     
     # Search Configuration
     default_search_limit: int = 10
     max_search_limit: int = 100
     min_similarity_threshold: float = 0.3
     
+    # Lexical (BM25) Index Configuration
+    lexical_index_enabled: bool = False
+    lexical_index_path: str = "./data/lexical_index.sqlite3"
+    bm25_k1: float = 1.2
+    bm25_b: float = 0.75
+    hybrid_candidate_multiplier: int = 3
+    rrf_k: int = 60
+    
+    # Diversification Configuration
+    mmr_candidate_multiplier: int = 4
+    
+    # Cross-Encoder Re-ranking Configuration
+    cross_encoder_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    rerank_top_n: int = 20
+    rerank_batch_size: int = 16
+    rerank_cache_size: int = 10000
+    
+    # Search Result Cache Configuration
+    search_cache_enabled: bool = False
+    search_cache_max_entries: int = 1000
+    search_cache_max_bytes: int = 64 * 1024 * 1024
+    search_cache_ttl_s: float = 300.0
+    
+    # Plaintext Cache Configuration
+    plaintext_cache_enabled: bool = False
+    plaintext_cache_max_entries: int = 10000
+    plaintext_cache_max_bytes: int = 32 * 1024 * 1024
+    plaintext_cache_ttl_s: float = 300.0
+    
+    # Deduplication Configuration
+    dedup_policy: Literal["off", "reject", "return_existing", "merge"] = "off"
+    content_hash_index_path: str = "./data/content_hashes.sqlite3"
+    # Seconds before an unstored duplicate's claim is presumed lost and taken over
+    dedup_claim_timeout_s: float = 300.0
+    
+    # Asynchronous Ingestion Configuration
+    async_ingest_enabled: bool = False
+    ingest_wal_path: str = "./data/ingest_wal"
+    ingest_batch_size: int = 32
+    ingest_max_batch_wait_ms: float = 10.0
+    ingest_max_queue_size: int = 10000
+    ingest_write_batch_size: int = 256
+    ingest_max_write_wait_ms: float = 100.0
+    
+    # Export/Import Configuration
+    archive_chunk_size: int = 10000
+    
+    # Read-Only Replica Configuration
+    serving_mode: Literal["primary", "replica"] = "primary"
+    snapshot_path: str = "./data/snapshots"
+    snapshot_poll_interval_s: float = 5.0
+    snapshot_retention: int = 2
+    
     # Performance Configuration
     max_content_length: int = 10000
     request_timeout: int = 30
@@ -58,6 +156,14 @@ class Settings(BaseSettings):
         os.makedirs(v, exist_ok=True)
         return v
     
+    @validator('lexical_index_path', 'content_hash_index_path', 'user_key_store_path', 'key_rotation_checkpoint_path')
+    def validate_index_path(cls, v):
+        """Ensure the index file's directory exists."""
+        directory = os.path.dirname(v)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return v
+    
     @validator('allowed_origins')
     def validate_origins(cls, v):
         """Ensure origins are valid."""
@@ -4,9 +4,14 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 
 from .config import get_settings
-from .api import memory_router, health_router
+from .api import memory_router, health_router, admin_router
+from .services import MemoryService, get_ingestion_pipeline, get_replica_vector_store, get_hot_tier
+from .services.search_cache import get_search_result_cache
+from .services.plaintext_cache import get_plaintext_cache
+from .utils.encryption import get_derived_key_cache
 from .utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -20,8 +25,52 @@ async def lifespan(app: FastAPI):
     settings = get_settings()
     logger.info(f"Running {settings.app_name} v{settings.app_version}")
     
+    # Pay for PBKDF2 key derivation once, before the first request
+    keys = [settings.encryption_key, *settings.encryption_previous_keys]
+    if settings.index_key:
+        keys.append(settings.index_key)
+    for key in keys:
+        await asyncio.get_event_loop().run_in_executor(None, get_derived_key_cache().prederive, key)
+    logger.info(f"Derived encryption keys in {get_derived_key_cache().get_stats()['derivation_ms_total']}ms")
+    
+    tier_task = None
+    if settings.serving_mode == "replica":
+        # Serve the published snapshot and swap in newer ones as they appear
+        replica_store = get_replica_vector_store()
+        await replica_store.initialize()
+        background_task = asyncio.create_task(replica_store.watch(
+            settings.snapshot_poll_interval_s,
+            on_swap=get_search_result_cache().clear
+        ))
+        ingestion_enabled = False
+    else:
+        # Build derived indexes for pre-existing memories without blocking startup
+        memory_service = MemoryService()
+        background_task = asyncio.create_task(memory_service.ensure_indexes())
+        ingestion_enabled = settings.async_ingest_enabled
+        
+        # Demote memories that age out of the RAM-resident tier
+        if settings.hot_tier_enabled:
+            tier_task = asyncio.create_task(get_hot_tier().run(settings.hot_tier_maintenance_interval_s))
+    
+    # Replay memories accepted but not yet indexed before the last shutdown
+    if ingestion_enabled:
+        await get_ingestion_pipeline().start()
+    
     yield
     
+    background_task.cancel()
+    if tier_task:
+        tier_task.cancel()
+    if ingestion_enabled:
+        await get_ingestion_pipeline().stop()
+    
+    # Do not leave decrypted texts in memory past shutdown
+    if settings.plaintext_cache_enabled:
+        get_plaintext_cache().clear()
+    if settings.search_cache_enabled:
+        get_search_result_cache().clear()
+    
     # Shutdown
     logger.info("MemoryLink backend is shutting down...")
 
@@ -80,6 +129,7 @@ async def general_exception_handler(request, exc: Exception):
 # Include routers
 app.include_router(health_router)
 app.include_router(memory_router)
+app.include_router(admin_router)
 
 
 # Root endpoint
@@ -2,20 +2,32 @@
 
 from .memory_models import (
     MemoryEntry,
+    MemoryField,
+    MemoryRecord,
+    ListMemoriesResponse,
     AddMemoryRequest,
     AddMemoryResponse,
     SearchMemoryRequest,
     SearchMemoryResponse,
     MemorySearchResult,
+    BatchSearchMemoryRequest,
+    BatchSearchResult,
+    BatchSearchMemoryResponse,
     ErrorResponse
 )
 
 __all__ = [
     "MemoryEntry",
+    "MemoryField",
+    "MemoryRecord",
+    "ListMemoriesResponse",
     "AddMemoryRequest", 
     "AddMemoryResponse",
     "SearchMemoryRequest",
     "SearchMemoryResponse",
     "MemorySearchResult",
+    "BatchSearchMemoryRequest",
+    "BatchSearchResult",
+    "BatchSearchMemoryResponse",
     "ErrorResponse"
 ]
\ No newline at end of file
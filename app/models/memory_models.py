@@ -1,10 +1,21 @@
 """Pydantic models for MemoryLink API."""
 
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+from datetime import datetime, timezone
+from typing import List, Optional, Dict, Any, Literal
 from pydantic import BaseModel, Field, validator
 
 
+# Fields a caller can project memories and search results onto; "id" is always returned
+MemoryField = Literal["text", "tags", "timestamp", "user_id", "metadata", "similarity_score"]
+
+_FIELDS_DESCRIPTION = "Fields to return besides the id (default: all); leaving out text skips decryption"
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC so they compare with aware ones."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
 class MemoryEntry(BaseModel):
     """Core memory entry model."""
     
@@ -37,6 +48,10 @@ class AddMemoryRequest(BaseModel):
     tags: List[str] = Field(default_factory=list, description="Tags to associate with the memory")
     user_id: str = Field(..., description="ID of the user adding the memory")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Additional metadata")
+    on_duplicate: Optional[Literal["off", "reject", "return_existing", "merge"]] = Field(
+        None,
+        description="How to handle text identical to an existing memory (defaults to server policy)"
+    )
     
     @validator('tags')
     def validate_tags(cls, v):
@@ -59,17 +74,39 @@ class AddMemoryResponse(BaseModel):
     id: str = Field(..., description="The generated ID for the stored memory")
     message: str = Field(..., description="Success message")
     timestamp: datetime = Field(..., description="When the memory was stored")
+    deduplicated: bool = Field(default=False, description="Whether an existing identical memory was returned")
+    queued: bool = Field(default=False, description="Whether the memory was accepted for background indexing")
+
+
+class MemoryRecord(BaseModel):
+    """Memory entry projected onto requested fields; unrequested ones are left unset."""
+    
+    id: str = Field(..., description="Unique identifier for the memory")
+    text: Optional[str] = Field(None, description="The memory content")
+    tags: Optional[List[str]] = Field(None, description="Tags associated with the memory")
+    timestamp: Optional[datetime] = Field(None, description="When the memory was created")
+    user_id: Optional[str] = Field(None, description="ID of the user who owns this memory")
+    metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata")
+
+
+class ListMemoriesResponse(BaseModel):
+    """Response model for listing a user's memories."""
+    
+    user_id: str = Field(..., description="ID of the user whose memories are listed")
+    memories: List[MemoryRecord] = Field(..., description="Memories, newest first")
+    total_returned: int = Field(..., description="Number of memories in this page")
+    offset: int = Field(..., description="Offset of the first memory in this page")
 
 
 class MemorySearchResult(BaseModel):
-    """Individual search result model."""
+    """Individual search result model; fields left out of a projection are unset."""
     
     id: str = Field(..., description="Memory ID")
-    text: str = Field(..., description="Memory content")
-    tags: List[str] = Field(..., description="Associated tags")
-    timestamp: datetime = Field(..., description="Creation timestamp")
-    similarity_score: float = Field(..., description="Similarity score (0-1)", ge=0, le=1)
-    metadata: Dict[str, Any] = Field(default_factory=dict, description="Additional metadata")
+    text: Optional[str] = Field(None, description="Memory content")
+    tags: Optional[List[str]] = Field(None, description="Associated tags")
+    timestamp: Optional[datetime] = Field(None, description="Creation timestamp")
+    similarity_score: Optional[float] = Field(None, description="Similarity score (0-1)", ge=0, le=1)
+    metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata")
 
 
 class SearchMemoryRequest(BaseModel):
@@ -80,6 +117,26 @@ class SearchMemoryRequest(BaseModel):
     limit: int = Field(default=10, description="Maximum number of results", ge=1, le=100)
     min_similarity: float = Field(default=0.5, description="Minimum similarity threshold", ge=0, le=1)
     tags: Optional[List[str]] = Field(None, description="Filter by specific tags")
+    since: Optional[datetime] = Field(None, description="Only include memories created at or after this time")
+    until: Optional[datetime] = Field(None, description="Only include memories created at or before this time")
+    filters: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Metadata filter expression, e.g. {\"priority\": {\"$gte\": 3}}"
+    )
+    hybrid: bool = Field(default=False, description="Fuse exact-term (BM25) matches with semantic results")
+    diversity: Optional[float] = Field(
+        None,
+        description="Trade relevance for variety among results (0 = off, 1 = most diverse)",
+        ge=0,
+        le=1
+    )
+    rerank: bool = Field(default=False, description="Re-score top candidates with a cross-encoder")
+    rerank_budget_ms: Optional[float] = Field(
+        None,
+        description="Skip re-ranking if it is estimated to take longer than this",
+        gt=0
+    )
+    fields: Optional[List[MemoryField]] = Field(None, description=_FIELDS_DESCRIPTION)
     
     @validator('query')
     def validate_query(cls, v):
@@ -94,6 +151,14 @@ class SearchMemoryRequest(BaseModel):
         if v:
             v = [tag.strip().lower() for tag in v if tag and tag.strip()]
         return v
+    
+    @validator('until')
+    def validate_time_range(cls, v, values):
+        """Validate the time range is not inverted."""
+        since = values.get('since')
+        if v and since and _as_utc(v) < _as_utc(since):
+            raise ValueError("'until' must not be earlier than 'since'")
+        return v
 
 
 class SearchMemoryResponse(BaseModel):
@@ -105,6 +170,58 @@ class SearchMemoryResponse(BaseModel):
     execution_time_ms: float = Field(..., description="Query execution time in milliseconds")
 
 
+class BatchSearchMemoryRequest(BaseModel):
+    """Request model for running several searches in one call."""
+    
+    queries: List[str] = Field(..., description="Search queries", min_items=1, max_items=50)
+    user_id: str = Field(..., description="ID of the user performing the search")
+    limit: int = Field(default=10, description="Maximum number of results per query", ge=1, le=100)
+    min_similarity: float = Field(default=0.5, description="Minimum similarity threshold", ge=0, le=1)
+    tags: Optional[List[str]] = Field(None, description="Filter by specific tags")
+    since: Optional[datetime] = Field(None, description="Only include memories created at or after this time")
+    until: Optional[datetime] = Field(None, description="Only include memories created at or before this time")
+    filters: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Metadata filter expression applied to every query"
+    )
+    fields: Optional[List[MemoryField]] = Field(None, description=_FIELDS_DESCRIPTION)
+    
+    @validator('queries', each_item=True)
+    def validate_queries(cls, v):
+        """Validate each query is not empty."""
+        if not v or not v.strip():
+            raise ValueError("Search query cannot be empty")
+        if len(v) > 1000:
+            raise ValueError("Search query must be at most 1000 characters")
+        return v.strip()
+    
+    @validator('tags')
+    def validate_tags(cls, v):
+        """Clean and validate tags filter."""
+        return SearchMemoryRequest.validate_tags(v)
+    
+    @validator('until')
+    def validate_time_range(cls, v, values):
+        """Validate the time range is not inverted."""
+        return SearchMemoryRequest.validate_time_range(v, values)
+
+
+class BatchSearchResult(BaseModel):
+    """Search results for one query of a batch."""
+    
+    query: str = Field(..., description="The search query")
+    results: List[MemorySearchResult] = Field(..., description="Search results")
+    total_found: int = Field(..., description="Number of results found for this query")
+
+
+class BatchSearchMemoryResponse(BaseModel):
+    """Response model for batch memory search."""
+    
+    results: List[BatchSearchResult] = Field(..., description="Results grouped per query, in request order")
+    total_queries: int = Field(..., description="Number of queries executed")
+    execution_time_ms: float = Field(..., description="Total execution time in milliseconds")
+
+
 class ErrorResponse(BaseModel):
     """Standard error response model."""
     
@@ -2,6 +2,38 @@
 
 from .embedding_service import EmbeddingService
 from .vector_store import VectorStore
-from .memory_service import MemoryService
+from .sharded_vector_store import ShardedVectorStore, create_vector_store
+from .tiered_vector_store import TieredVectorStore, get_hot_tier
+from .memory_service import MemoryService, DuplicateMemoryError
+from .ingestion import IngestionPipeline, IngestionUnavailableError, get_ingestion_pipeline
+from .memory_archive import MemoryArchive
+from .replica_store import ReplicaVectorStore, SnapshotUserKeys, get_replica_vector_store, get_replica_user_keys, publish_snapshot
+from .ciphertext_migration import CiphertextMigrator, get_ciphertext_migrator
+from .key_rotation import KeyRotationWorker, get_key_rotation_worker
+from .user_keys import UserKeyStore, get_user_key_store
 
-__all__ = ["EmbeddingService", "VectorStore", "MemoryService"]
\ No newline at end of file
+__all__ = [
+    "EmbeddingService",
+    "VectorStore",
+    "ShardedVectorStore",
+    "create_vector_store",
+    "TieredVectorStore",
+    "get_hot_tier",
+    "MemoryService",
+    "DuplicateMemoryError",
+    "IngestionPipeline",
+    "IngestionUnavailableError",
+    "get_ingestion_pipeline",
+    "MemoryArchive",
+    "ReplicaVectorStore",
+    "SnapshotUserKeys",
+    "get_replica_vector_store",
+    "get_replica_user_keys",
+    "publish_snapshot",
+    "CiphertextMigrator",
+    "get_ciphertext_migrator",
+    "KeyRotationWorker",
+    "get_key_rotation_worker",
+    "UserKeyStore",
+    "get_user_key_store"
+]
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""Background rewrite of memories stored in the legacy ciphertext format."""
+
+import asyncio
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from ..utils.encryption import EncryptionService
+from ..utils.logger import get_logger
+from ..config import get_settings
+
+logger = get_logger(__name__)
+
+
+class CiphertextMigrator:
+    """Re-encodes legacy double-base64 documents in the compact format.
+
+    Conversion only strips the outer base64 layer and adds the format
+    header, so nothing is decrypted and the embeddings are kept as they
+    are. Compact rows are skipped, so an interrupted run simply resumes
+    with the next scan.
+    """
+
+    def __init__(self, batch_size: int):
+        """Initialize the migrator."""
+        self.batch_size = batch_size
+        self._lock = asyncio.Lock()
+        self._scanned = 0
+        self._migrated = 0
+        self._failed = 0
+        self._completed_at: Optional[float] = None
+
+    async def run(self, vector_store) -> int:
+        """Scan the store once, rewriting legacy documents; returns how many were rewritten."""
+        async with self._lock:
+            start_time = time.time()
+            migrated = 0
+
+            async for page in vector_store.iter_records(batch_size=self.batch_size, include=["documents"]):
+                memory_ids = []
+                documents = []
+                for memory_id, document in zip(page['ids'], page['documents'] or []):
+                    self._scanned += 1
+                    if not EncryptionService.is_legacy(document):
+                        continue
+                    try:
+                        documents.append(EncryptionService.to_compact(document))
+                    except ValueError:
+                        logger.warning(f"Skipping ciphertext migration of malformed memory {memory_id}")
+                        self._failed += 1
+                        continue
+                    memory_ids.append(memory_id)
+
+                if memory_ids:
+                    migrated += await vector_store.replace_documents(memory_ids, documents)
+
+                # Let requests run between batches
+                await asyncio.sleep(0)
+
+            self._migrated += migrated
+            self._completed_at = time.time()
+            if migrated:
+                logger.info(
+                    f"Rewrote {migrated} memories in the compact ciphertext format "
+                    f"in {round((time.time() - start_time) * 1000, 2)}ms"
+                )
+            return migrated
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get migration progress."""
+        return {
+            "scanned": self._scanned,
+            "migrated": self._migrated,
+            "failed": self._failed,
+            "running": self._lock.locked(),
+            "completed_at": self._completed_at
+        }
+
+
+@lru_cache()
+def get_ciphertext_migrator() -> CiphertextMigrator:
+    """Get the process-wide ciphertext migrator."""
+    return CiphertextMigrator(get_settings().ciphertext_migration_batch_size)
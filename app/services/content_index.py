@@ -0,0 +1,143 @@
+"""Per-user index of keyed content hashes for ingest deduplication."""
+
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Optional, Iterable, Tuple
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS content_hashes (
+    user_id TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    memory_id TEXT NOT NULL,
+    claimed_at REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, content_hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS content_hashes_memory ON content_hashes (memory_id);
+CREATE TABLE IF NOT EXISTS index_meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class ContentHashIndex:
+    """Maps (user, keyed content hash) to the memory holding that text.
+
+    Hashes are HMACs under a key derived from the encryption key, so the
+    index reveals which memories are identical but never their content.
+    The fingerprint of the hashing key is stored alongside, so hashes
+    made under another key are detected and rebuilt. Claims record when
+    they were made, so a hash whose memory never got stored is only taken
+    over once its claim is too old to still be in flight.
+    """
+
+    def __init__(self, path: str):
+        """Open (or create) the index at ``path``."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(content_hashes)")}
+        if "claimed_at" not in columns:
+            # Indexes created before claims were timed; their rows count as long settled
+            self._conn.execute("ALTER TABLE content_hashes ADD COLUMN claimed_at REAL NOT NULL DEFAULT 0")
+
+    def claim(self, user_id: str, content_hash: str, memory_id: str) -> Optional[str]:
+        """Atomically register a hash for a new memory.
+
+        Returns ``None`` if the claim succeeded, otherwise the id of the
+        memory that already holds this content.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO content_hashes (user_id, content_hash, memory_id, claimed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (user_id, content_hash, memory_id, time.time())
+            )
+            if cursor.rowcount:
+                return None
+
+            row = self._conn.execute(
+                "SELECT memory_id FROM content_hashes WHERE user_id = ? AND content_hash = ?",
+                (user_id, content_hash)
+            ).fetchone()
+            return row[0] if row else None
+
+    def take_over(
+        self,
+        user_id: str,
+        content_hash: str,
+        stale_id: str,
+        memory_id: str,
+        claimed_before: float
+    ) -> bool:
+        """Move a hash from a memory that never got stored to a new one.
+
+        Only succeeds while ``stale_id`` still holds the hash and claimed it
+        before ``claimed_before``; a younger claim may still be being written.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE content_hashes SET memory_id = ?, claimed_at = ? "
+                "WHERE user_id = ? AND content_hash = ? AND memory_id = ? AND claimed_at < ?",
+                (memory_id, time.time(), user_id, content_hash, stale_id, claimed_before)
+            )
+            return cursor.rowcount > 0
+
+    def add_many(self, entries: Iterable[Tuple[str, str, str]]):
+        """Register ``(user_id, content_hash, memory_id)`` entries, keeping existing ones."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO content_hashes (user_id, content_hash, memory_id) "
+                "VALUES (?, ?, ?)",
+                list(entries)
+            )
+
+    def release(self, memory_id: str):
+        """Forget the hash held by a memory (after delete or a failed write)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM content_hashes WHERE memory_id = ?", (memory_id,))
+
+    def release_user(self, user_id: str):
+        """Forget every hash held by a user's memories."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM content_hashes WHERE user_id = ?", (user_id,))
+
+    def get_key_fingerprint(self) -> Optional[str]:
+        """Get the fingerprint of the key the stored hashes were made with."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM index_meta WHERE name = 'key_fingerprint'").fetchone()
+            return row[0] if row else None
+
+    def set_key_fingerprint(self, fingerprint: str):
+        """Record the key the stored hashes were made with."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO index_meta (name, value) VALUES ('key_fingerprint', ?)",
+                (fingerprint,)
+            )
+
+    def reset(self):
+        """Forget every hash and the key they were made with."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM content_hashes")
+            self._conn.execute("DELETE FROM index_meta WHERE name = 'key_fingerprint'")
+
+    def count(self) -> int:
+        """Get the number of registered hashes."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM content_hashes").fetchone()[0]
+
+
+@lru_cache()
+def get_content_hash_index(path: str) -> ContentHashIndex:
+    """Get the process-wide content hash index for a path."""
+    logger.info(f"Opening content hash index at {path}")
+    return ContentHashIndex(path)
@@ -1,6 +1,8 @@
 """Embedding service for converting text to vectors."""
 
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Dict, Any
 from sentence_transformers import SentenceTransformer
 from ..utils.logger import get_logger
@@ -9,6 +11,16 @@ from ..config import get_settings
 logger = get_logger(__name__)
 
 
+@lru_cache()
+def get_embedding_executor() -> ThreadPoolExecutor:
+    """Get the shared thread pool for model inference."""
+    settings = get_settings()
+    return ThreadPoolExecutor(
+        max_workers=settings.embedding_executor_workers,
+        thread_name_prefix="embedding"
+    )
+
+
 class EmbeddingService:
     """Service for generating text embeddings."""
     
@@ -27,7 +39,7 @@ class EmbeddingService:
                     # Run in thread pool to avoid blocking
                     loop = asyncio.get_event_loop()
                     self._model = await loop.run_in_executor(
-                        None, 
+                        get_embedding_executor(), 
                         SentenceTransformer, 
                         self.settings.embedding_model
                     )
@@ -44,7 +56,7 @@ class EmbeddingService:
             # Run encoding in thread pool
             loop = asyncio.get_event_loop()
             embedding = await loop.run_in_executor(
-                None,
+                get_embedding_executor(),
                 lambda: self._model.encode(text.strip()).tolist()
             )
             
@@ -72,7 +84,7 @@ class EmbeddingService:
             # Run batch encoding in thread pool
             loop = asyncio.get_event_loop()
             embeddings = await loop.run_in_executor(
-                None,
+                get_embedding_executor(),
                 lambda: self._model.encode(valid_texts).tolist()
             )
             
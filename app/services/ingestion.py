@@ -0,0 +1,364 @@
+"""Write-behind ingestion: durable acceptance now, embedding and indexing in batches."""
+
+import asyncio
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Set, Tuple
+from ..models.memory_models import AddMemoryRequest, MemoryEntry
+from ..utils.logger import get_logger
+from ..config import get_settings
+from .memory_service import MemoryService
+from .pending_overlay import PendingMemory
+from .write_ahead_log import WriteAheadLog
+
+logger = get_logger(__name__)
+
+# Attempts made to apply a batch before it is put back in the queue
+_MAX_APPLY_ATTEMPTS = 3
+
+# Times a memory is put back before it is moved to the dead-letter file
+_MAX_APPLY_ROUNDS = 8
+
+# Backoff between attempts, doubled for each round and capped
+_RETRY_BASE_DELAY_S = 0.5
+_MAX_RETRY_DELAY_S = 30.0
+
+
+class IngestionUnavailableError(Exception):
+    """Raised when the ingestion pipeline cannot accept more memories."""
+
+
+class IngestionPipeline:
+    """Accepts memories into a write-ahead log and indexes them in the background.
+
+    ``enqueue`` returns once the memory is fsynced to the log. Processing
+    has two stages: an embed worker encodes batches of up to ``batch_size``
+    and makes them searchable through the pending overlay straight away,
+    and a write worker stores larger batches of up to ``write_batch_size``
+    in the vector store, then acknowledges them in the overlay and
+    checkpoints the log. Records past the checkpoint are replayed on
+    startup, so accepted memories survive a crash.
+
+    A batch the vector store keeps rejecting is put back in the queue with
+    exponential backoff and stays pending meanwhile. Memories still
+    failing after ``_MAX_APPLY_ROUNDS`` are moved to the log's durable
+    dead-letter file. The checkpoint never passes a memory that was
+    neither stored nor dead-lettered.
+    """
+
+    def __init__(
+        self,
+        memory_service: MemoryService,
+        wal: WriteAheadLog,
+        batch_size: int,
+        max_batch_wait_ms: float,
+        max_queue_size: int,
+        write_batch_size: Optional[int] = None,
+        max_write_wait_ms: Optional[float] = None
+    ):
+        """Initialize the pipeline; call ``start`` to begin processing."""
+        self.memory_service = memory_service
+        self.overlay = memory_service.pending_overlay
+        self.wal = wal
+        self.batch_size = batch_size
+        self.max_batch_wait = max_batch_wait_ms / 1000
+        self.max_queue_size = max_queue_size
+        self.write_batch_size = write_batch_size or batch_size
+        self.max_write_wait = (max_write_wait_ms if max_write_wait_ms is not None else max_batch_wait_ms) / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._retries: Set[asyncio.TimerHandle] = set()
+        self._unapplied: Set[int] = set()
+        self._rounds: Dict[int, int] = {}
+        self._settled_seq = 0
+        self._embedded = 0
+        self._applied = 0
+        self._retried = 0
+        self._failed = 0
+        self._batches = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether both background workers are running."""
+        return bool(self._workers) and not any(worker.done() for worker in self._workers)
+
+    async def start(self):
+        """Replay unapplied log records and start the background workers."""
+        if self.running:
+            return
+
+        self._queue = asyncio.Queue()
+        self._write_queue = asyncio.Queue()
+        replayed = 0
+        for record in self.wal.replay():
+            try:
+                memory = self._from_record(record)
+            except Exception as e:
+                logger.error(f"Skipping unreadable ingestion record {record.get('seq')}: {str(e)}")
+                continue
+            self.overlay.register(memory)
+            self._unapplied.add(record["seq"])
+            self._queue.put_nowait((record["seq"], memory))
+            replayed += 1
+
+        if replayed:
+            logger.info(f"Replaying {replayed} memories from the ingestion log")
+
+        self._workers = [
+            asyncio.create_task(self._run_embedder()),
+            asyncio.create_task(self._run_writer())
+        ]
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop the workers, giving queued memories ``timeout`` seconds to drain."""
+        if not self.running:
+            return
+
+        try:
+            await asyncio.wait_for(self._drained(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Stopping with {self._queue.qsize() + self._write_queue.qsize()} memories queued; "
+                "they will be replayed"
+            )
+
+        for handle in self._retries:
+            handle.cancel()
+        self._retries.clear()
+        for worker in self._workers:
+            worker.cancel()
+        for worker in self._workers:
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+
+    async def enqueue(self, request: AddMemoryRequest) -> Tuple[MemoryEntry, bool]:
+        """Durably accept a memory, returning its entry and whether it was deduplicated."""
+        if not self.running:
+            raise IngestionUnavailableError("Ingestion pipeline is not running")
+        if self._queue.qsize() + self._write_queue.qsize() >= self.max_queue_size:
+            raise IngestionUnavailableError("Ingestion queue is full")
+
+        memory, existing_entry = await self.memory_service.prepare_memory(request)
+        if existing_entry:
+            return existing_entry, True
+
+        self.overlay.register(memory)
+        try:
+            seq = await self.wal.append(self._to_record(memory))
+        except Exception:
+            self.overlay.acknowledge([memory.memory_id])
+            if memory.content_hash:
+                self.memory_service.content_index.release(memory.memory_id)
+            raise
+
+        self._unapplied.add(seq)
+        self._queue.put_nowait((seq, memory))
+        return self.memory_service.pending_entry(memory), False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue, throughput and log statistics."""
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "awaiting_write": self._write_queue.qsize() if self._write_queue else 0,
+            "embedded": self._embedded,
+            "applied": self._applied,
+            "unapplied": len(self._unapplied),
+            "retried": self._retried,
+            "failed": self._failed,
+            "batches": self._batches,
+            "average_batch_size": round(self._applied / self._batches, 2) if self._batches else 0.0,
+            "overlay": self.overlay.get_stats(),
+            "wal": self.wal.get_stats()
+        }
+
+    async def _run_embedder(self):
+        """Embed queued memories in batches and hand them to the writer until cancelled."""
+        while True:
+            batch = await self._take_batch(self._queue, self.batch_size, self.max_batch_wait)
+            try:
+                await self._embed(batch)
+            except Exception as e:
+                logger.error(f"Unexpected error embedding ingestion batch: {str(e)}")
+                for seq, memory in batch:
+                    self._write_queue.put_nowait((seq, memory, None))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _run_writer(self):
+        """Write embedded memories to the vector store in batches until cancelled."""
+        while True:
+            batch = await self._take_batch(self._write_queue, self.write_batch_size, self.max_write_wait)
+            try:
+                await self._apply(batch)
+            except Exception as e:
+                logger.error(f"Unexpected error applying ingestion batch: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+
+    @staticmethod
+    async def _take_batch(queue: asyncio.Queue, size: int, max_wait: float) -> List[Any]:
+        """Wait for one item, take whatever else is waiting, then wait briefly for more."""
+        batch = [await queue.get()]
+
+        deadline = asyncio.get_event_loop().time() + max_wait
+        while len(batch) < size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            remaining = deadline - asyncio.get_event_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _embed(self, batch: List[Tuple[int, PendingMemory]]):
+        """Encode a batch and make it searchable before it is written."""
+        memories = [memory for _, memory in batch]
+        embeddings = None
+
+        for attempt in range(1, _MAX_APPLY_ATTEMPTS + 1):
+            try:
+                embeddings = await self.memory_service.embed_memories(memories)
+                break
+            except Exception as e:
+                logger.error(
+                    f"Failed to embed {len(memories)} queued memories "
+                    f"(attempt {attempt}/{_MAX_APPLY_ATTEMPTS}): {str(e)}"
+                )
+                if attempt < _MAX_APPLY_ATTEMPTS:
+                    await asyncio.sleep(0.5 * attempt)
+
+        if embeddings is not None:
+            self._embedded += len(memories)
+            self.memory_service.publish_pending(memories, embeddings)
+
+        # The writer retries the encode itself for memories without an embedding
+        for index, (seq, memory) in enumerate(batch):
+            self._write_queue.put_nowait((seq, memory, embeddings[index] if embeddings else None))
+
+    async def _apply(self, batch: List[Tuple[int, PendingMemory, Optional[List[float]]]]):
+        """Store a batch, retrying before putting it back, then acknowledge and checkpoint it."""
+        memories = [memory for _, memory, _ in batch]
+        embeddings = [embedding for _, _, embedding in batch]
+        if any(embedding is None for embedding in embeddings):
+            embeddings = None
+
+        for attempt in range(1, _MAX_APPLY_ATTEMPTS + 1):
+            try:
+                await self.memory_service.persist_memories(memories, embeddings)
+                break
+            except Exception as e:
+                logger.error(
+                    f"Failed to apply {len(memories)} queued memories "
+                    f"(attempt {attempt}/{_MAX_APPLY_ATTEMPTS}): {str(e)}"
+                )
+                if attempt < _MAX_APPLY_ATTEMPTS:
+                    await asyncio.sleep(_RETRY_BASE_DELAY_S * attempt)
+        else:
+            await self._retry_or_dead_letter(batch)
+            return
+
+        self._applied += len(memories)
+        self._batches += 1
+        self.overlay.acknowledge([memory.memory_id for memory in memories])
+        await self._settle([seq for seq, _, _ in batch])
+
+    async def _retry_or_dead_letter(self, batch: List[Tuple[int, PendingMemory, Optional[List[float]]]]):
+        """Put a failed batch back in the queue with backoff, dead-lettering memories out of rounds."""
+        retrying = []
+        exhausted = []
+        for item in batch:
+            seq = item[0]
+            self._rounds[seq] = self._rounds.get(seq, 0) + 1
+            (retrying if self._rounds[seq] < _MAX_APPLY_ROUNDS else exhausted).append(item)
+
+        if retrying:
+            rounds = max(self._rounds[seq] for seq, _, _ in retrying)
+            delay = min(_MAX_RETRY_DELAY_S, _RETRY_BASE_DELAY_S * 2 ** rounds)
+            logger.warning(f"Retrying {len(retrying)} queued memories in {delay}s")
+            self._retried += len(retrying)
+
+            def requeue():
+                self._retries.discard(handle)
+                for item in retrying:
+                    self._write_queue.put_nowait(item)
+
+            handle = asyncio.get_running_loop().call_later(delay, requeue)
+            self._retries.add(handle)
+
+        if exhausted:
+            memories = [memory for _, memory, _ in exhausted]
+            # The log must hold the records somewhere durable before the checkpoint passes them
+            await self.wal.dead_letter([
+                {**self._to_record(memory), "seq": seq} for seq, memory, _ in exhausted
+            ])
+            logger.error(f"Moved {len(memories)} memories to the ingestion dead-letter file")
+            self._failed += len(memories)
+            self.memory_service.discard_pending(memories)
+            await self._settle([seq for seq, _, _ in exhausted])
+
+    async def _settle(self, seqs: List[int]):
+        """Mark records as stored or dead-lettered and checkpoint everything before the oldest unsettled one."""
+        for seq in seqs:
+            self._unapplied.discard(seq)
+            self._rounds.pop(seq, None)
+        self._settled_seq = max([self._settled_seq, *seqs])
+
+        checkpoint = min(self._unapplied) - 1 if self._unapplied else self._settled_seq
+        if checkpoint > 0:
+            await self.wal.checkpoint(checkpoint)
+
+    async def _drained(self):
+        """Wait until every queued memory has been embedded and written."""
+        await self._queue.join()
+        await self._write_queue.join()
+
+    @staticmethod
+    def _to_record(memory: PendingMemory) -> Dict[str, Any]:
+        """Serialize a memory for the log; only the encrypted text is written."""
+        return {
+            "id": memory.memory_id,
+            "user_id": memory.user_id,
+            "text": memory.encrypted_text,
+            "tags": memory.tags,
+            "metadata": memory.metadata,
+            "timestamp": memory.timestamp.isoformat(),
+            "content_hash": memory.content_hash
+        }
+
+    def _from_record(self, record: Dict[str, Any]) -> PendingMemory:
+        """Rebuild a memory from a log record."""
+        return PendingMemory(
+            memory_id=record["id"],
+            user_id=record["user_id"],
+            text=self.memory_service.encryption_service.decrypt(record["text"], record["id"]),
+            encrypted_text=record["text"],
+            tags=record["tags"],
+            metadata=record["metadata"],
+            timestamp=datetime.fromisoformat(record["timestamp"]),
+            content_hash=record["content_hash"]
+        )
+
+
+@lru_cache()
+def get_ingestion_pipeline() -> IngestionPipeline:
+    """Get the process-wide ingestion pipeline."""
+    settings = get_settings()
+    return IngestionPipeline(
+        MemoryService(),
+        WriteAheadLog(settings.ingest_wal_path),
+        settings.ingest_batch_size,
+        settings.ingest_max_batch_wait_ms,
+        settings.ingest_max_queue_size,
+        settings.ingest_write_batch_size,
+        settings.ingest_max_write_wait_ms
+    )
@@ -0,0 +1,204 @@
+"""Background re-encryption of memories under the current encryption key."""
+
+import asyncio
+import json
+import math
+import os
+import time
+from concurrent.futures import Executor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from ..utils.encryption import EncryptionService
+from ..utils.logger import get_logger
+from ..config import get_settings
+
+logger = get_logger(__name__)
+
+
+class KeyRotationWorker:
+    """Re-encrypts memories that are not yet under the current key.
+
+    With per-user keys, data keys still wrapped by a previous master key
+    are rewrapped first, and rows under the master key move to their
+    user's key; rows already under a user's key are left alone. Rows are
+    streamed from the vector store in batches, re-encrypted on a
+    thread pool and written back with their embeddings, at most
+    ``rows_per_second`` rewrites a second. The scan position is
+    checkpointed with the target key id after every batch, so a restarted
+    worker resumes where it stopped. Rows already under the current key
+    are skipped without decrypting, and the rotation only counts as
+    complete once a pass from the start finds nothing left to rewrite,
+    which also catches rows shifted past the checkpoint by deletes.
+    """
+
+    def __init__(self, batch_size: int, rows_per_second: float, checkpoint_path: Optional[str] = None):
+        """Initialize the worker, loading any saved checkpoint."""
+        self.batch_size = batch_size
+        self.rows_per_second = rows_per_second
+        self.checkpoint_path = checkpoint_path
+        self._lock = asyncio.Lock()
+        self._checkpoint = self._load_checkpoint()
+        self._scanned = 0
+        self._rewritten = 0
+        self._failed = 0
+
+    async def run(
+        self,
+        vector_store,
+        encryption_service: EncryptionService,
+        executor: Optional[Executor] = None,
+        workers: int = 1
+    ) -> int:
+        """Rewrite every row not under the current key; returns how many were rewritten."""
+        async with self._lock:
+            key_id = encryption_service.key_id.hex()
+            if encryption_service.data_keys is not None:
+                # Rows are current once under a user key, a different target than the master key
+                key_id += "+user-keys"
+                await asyncio.get_running_loop().run_in_executor(executor, encryption_service.data_keys.rewrap)
+            if self._checkpoint.get('key_id') != key_id:
+                self._checkpoint = {"key_id": key_id, "position": 0, "completed": False}
+            if self._checkpoint['completed']:
+                return 0
+
+            start_time = time.time()
+            rewritten = 0
+            while True:
+                resumed_at = self._checkpoint['position']
+                if resumed_at:
+                    logger.info(f"Resuming key rotation to {key_id} at row {resumed_at}")
+                passed = await self._scan(vector_store, encryption_service, executor, workers)
+                rewritten += passed
+                if resumed_at == 0 and passed == 0:
+                    break
+                self._checkpoint['position'] = 0
+
+            self._checkpoint.update(completed=True, completed_at=time.time())
+            self._save_checkpoint()
+            logger.info(
+                f"Key rotation to {key_id} complete: rewrote {rewritten} memories "
+                f"in {round(time.time() - start_time, 2)}s, {self._failed} undecryptable"
+            )
+            return rewritten
+
+    async def _scan(
+        self,
+        vector_store,
+        encryption_service: EncryptionService,
+        executor: Optional[Executor],
+        workers: int
+    ) -> int:
+        """Make one pass from the checkpointed position to the end of the store."""
+        self._failed = 0
+        rewritten = 0
+
+        async for page in vector_store.iter_records(
+            batch_size=self.batch_size,
+            include=["documents", "metadatas"],
+            offset=self._checkpoint['position']
+        ):
+            batch_start = time.perf_counter()
+            pending = [
+                (memory_id, document, (metadata or {}).get('user_id'))
+                for memory_id, document, metadata in zip(
+                    page['ids'], page['documents'] or [], page['metadatas'] or []
+                )
+                if not encryption_service.is_current(document, (metadata or {}).get('user_id'))
+            ]
+            self._scanned += len(page['ids'])
+
+            if pending:
+                documents = await self._reencrypt(encryption_service, executor, workers, pending)
+                replaced = [
+                    (memory_id, document)
+                    for (memory_id, _, _), document in zip(pending, documents)
+                    if document is not None
+                ]
+                self._failed += len(pending) - len(replaced)
+                if replaced:
+                    rewritten += await vector_store.replace_documents(
+                        [memory_id for memory_id, _ in replaced],
+                        [document for _, document in replaced]
+                    )
+
+            self._checkpoint['position'] += len(page['ids'])
+            self._save_checkpoint()
+
+            # Hold rewrites to the configured rate, yielding to requests either way
+            delay = 0.0
+            if pending and self.rows_per_second > 0:
+                delay = len(pending) / self.rows_per_second - (time.perf_counter() - batch_start)
+            await asyncio.sleep(max(0.0, delay))
+
+        self._rewritten += rewritten
+        return rewritten
+
+    @staticmethod
+    async def _reencrypt(
+        encryption_service: EncryptionService,
+        executor: Optional[Executor],
+        workers: int,
+        pending: List[Tuple[str, str, Optional[str]]]
+    ) -> List[Optional[str]]:
+        """Re-encrypt a batch in ``workers`` chunks on the executor, keeping order."""
+        loop = asyncio.get_running_loop()
+        chunk_size = math.ceil(len(pending) / max(1, workers))
+        chunks = [pending[start:start + chunk_size] for start in range(0, len(pending), chunk_size)]
+
+        results = await asyncio.gather(*(
+            loop.run_in_executor(
+                executor,
+                encryption_service.reencrypt_many,
+                [document for _, document, _ in chunk],
+                [memory_id for memory_id, _, _ in chunk],
+                [user_id for _, _, user_id in chunk]
+            )
+            for chunk in chunks
+        ))
+        return [document for chunk_result in results for document in chunk_result]
+
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        """Read the saved checkpoint, if any."""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+
+        try:
+            with open(self.checkpoint_path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable key rotation checkpoint: {str(e)}")
+            return {}
+
+    def _save_checkpoint(self):
+        """Atomically write the checkpoint."""
+        if not self.checkpoint_path:
+            return
+
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self._checkpoint, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get rotation progress."""
+        return {
+            "key_id": self._checkpoint.get('key_id'),
+            "position": self._checkpoint.get('position', 0),
+            "scanned": self._scanned,
+            "rewritten": self._rewritten,
+            "failed": self._failed,
+            "running": self._lock.locked(),
+            "completed": self._checkpoint.get('completed', False),
+            "completed_at": self._checkpoint.get('completed_at')
+        }
+
+
+@lru_cache()
+def get_key_rotation_worker() -> KeyRotationWorker:
+    """Get the process-wide key rotation worker."""
+    settings = get_settings()
+    return KeyRotationWorker(
+        batch_size=settings.key_rotation_batch_size,
+        rows_per_second=settings.key_rotation_rows_per_second,
+        checkpoint_path=settings.key_rotation_checkpoint_path
+    )
@@ -0,0 +1,232 @@
+"""Blinded inverted index for exact-term (BM25) search over encrypted memories."""
+
+import hashlib
+import hmac
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Words, identifiers and dotted/dashed symbols such as ``VectorStore.add_memory``
+TOKEN_PATTERN = re.compile(r"\w+(?:[.:/\-]\w+)*", re.UNICODE)
+SYMBOL_SEPARATORS = re.compile(r"[.:/\-]")
+
+MAX_QUERY_TERMS = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_key INTEGER PRIMARY KEY,
+    memory_id TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_user ON documents (user_id);
+CREATE TABLE IF NOT EXISTS postings (
+    term INTEGER NOT NULL,
+    doc_key INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_key);
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id TEXT PRIMARY KEY,
+    doc_count INTEGER NOT NULL,
+    total_length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS index_meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms, keeping compound code symbols whole.
+
+    A symbol like ``foo.bar-baz`` yields the full symbol plus each part, so
+    both exact-identifier and single-word queries match it.
+    """
+    terms = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group(0)
+        terms.append(token)
+        if SYMBOL_SEPARATORS.search(token):
+            terms.extend(part for part in SYMBOL_SEPARATORS.split(token) if part)
+    return terms
+
+
+class LexicalIndex:
+    """BM25 inverted index whose terms are HMAC-blinded, never plaintext.
+
+    Each term is stored as the first 8 bytes of ``HMAC-SHA256(key, term)``
+    packed into a SQLite integer, so the on-disk index holds no readable
+    tokens and is useless without the encryption key. The fingerprint of
+    the blinding key is stored alongside, so postings blinded under
+    another key are detected and rebuilt.
+    """
+
+    def __init__(self, path: str, blinding_key: bytes, k1: float = 1.2, b: float = 0.75):
+        """Open (or create) the index at ``path``."""
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._blinding_key = blinding_key
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def blind(self, term: str) -> int:
+        """Map a plaintext term to its blinded 64-bit identifier."""
+        digest = hmac.new(self._blinding_key, term.encode('utf-8'), hashlib.sha256).digest()
+        return int.from_bytes(digest[:8], 'big', signed=True)
+
+    def add_document(self, memory_id: str, user_id: str, text: str):
+        """Index a memory's text, replacing any previous entry for it."""
+        self.add_documents([(memory_id, user_id, text)])
+
+    def add_documents(self, documents: Iterable[Tuple[str, str, str]]):
+        """Index several ``(memory_id, user_id, text)`` entries in one transaction."""
+        with self._lock, self._conn:
+            for memory_id, user_id, text in documents:
+                self._remove_locked(memory_id)
+
+                term_counts = Counter(self.blind(term) for term in tokenize(text))
+                length = sum(term_counts.values())
+                cursor = self._conn.execute(
+                    "INSERT INTO documents (memory_id, user_id, length) VALUES (?, ?, ?)",
+                    (memory_id, user_id, length)
+                )
+                doc_key = cursor.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO postings (term, doc_key, tf) VALUES (?, ?, ?)",
+                    [(term, doc_key, tf) for term, tf in term_counts.items()]
+                )
+                self._conn.execute(
+                    "INSERT INTO user_stats (user_id, doc_count, total_length) VALUES (?, 1, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET doc_count = doc_count + 1, "
+                    "total_length = total_length + excluded.total_length",
+                    (user_id, length)
+                )
+
+    def remove_document(self, memory_id: str):
+        """Remove a memory from the index."""
+        with self._lock, self._conn:
+            self._remove_locked(memory_id)
+
+    def remove_documents(self, memory_ids: Iterable[str]):
+        """Remove several memories in one transaction."""
+        with self._lock, self._conn:
+            for memory_id in memory_ids:
+                self._remove_locked(memory_id)
+
+    def _remove_locked(self, memory_id: str):
+        """Remove a memory; the caller holds the lock and transaction."""
+        row = self._conn.execute(
+            "SELECT doc_key, user_id, length FROM documents WHERE memory_id = ?",
+            (memory_id,)
+        ).fetchone()
+        if row is None:
+            return
+
+        doc_key, user_id, length = row
+        self._conn.execute("DELETE FROM postings WHERE doc_key = ?", (doc_key,))
+        self._conn.execute("DELETE FROM documents WHERE doc_key = ?", (doc_key,))
+        self._conn.execute(
+            "UPDATE user_stats SET doc_count = doc_count - 1, total_length = total_length - ? "
+            "WHERE user_id = ?",
+            (length, user_id)
+        )
+
+    def search(self, user_id: str, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Return ``(memory_id, bm25_score)`` pairs for a user's best matches."""
+        query_terms = list(dict.fromkeys(self.blind(term) for term in tokenize(query)))
+        query_terms = query_terms[:MAX_QUERY_TERMS]
+        if not query_terms:
+            return []
+
+        with self._lock:
+            stats = self._conn.execute(
+                "SELECT doc_count, total_length FROM user_stats WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+            if not stats or stats[0] <= 0:
+                return []
+
+            placeholders = ",".join("?" * len(query_terms))
+            rows = self._conn.execute(
+                f"SELECT p.term, p.tf, d.memory_id, d.length FROM postings p "
+                f"JOIN documents d ON d.doc_key = p.doc_key "
+                f"WHERE p.term IN ({placeholders}) AND d.user_id = ?",
+                (*query_terms, user_id)
+            ).fetchall()
+
+        doc_count, total_length = stats
+        avg_length = total_length / doc_count if doc_count else 0.0
+        document_frequency = Counter(term for term, _, _, _ in rows)
+
+        scores: Dict[str, float] = {}
+        for term, tf, memory_id, length in rows:
+            df = document_frequency[term]
+            idf = math.log(1.0 + (doc_count - df + 0.5) / (df + 0.5))
+            norm = 1.0 - self.b + self.b * (length / avg_length if avg_length else 1.0)
+            scores[memory_id] = scores.get(memory_id, 0.0) + idf * (tf * (self.k1 + 1.0)) / (tf + self.k1 * norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
+
+    def get_key_fingerprint(self) -> Optional[str]:
+        """Get the fingerprint of the key the postings were blinded with."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM index_meta WHERE name = 'key_fingerprint'").fetchone()
+            return row[0] if row else None
+
+    def set_key_fingerprint(self, fingerprint: str):
+        """Record the key the postings were blinded with."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO index_meta (name, value) VALUES ('key_fingerprint', ?)",
+                (fingerprint,)
+            )
+
+    def reset(self):
+        """Remove every document and the key they were blinded with."""
+        with self._lock, self._conn:
+            for table in ("postings", "documents", "user_stats"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.execute("DELETE FROM index_meta WHERE name = 'key_fingerprint'")
+
+    def document_count(self) -> int:
+        """Get the number of indexed memories."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics about the index."""
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            postings = self._conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+        return {"indexed_memories": documents, "postings": postings}
+
+
+@lru_cache()
+def get_lexical_index(path: str, blinding_key: bytes, k1: float, b: float) -> LexicalIndex:
+    """Get the process-wide lexical index for a path and key."""
+    logger.info(f"Opening lexical index at {path}")
+    return LexicalIndex(path, blinding_key, k1=k1, b=b)
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse several ranked id lists with reciprocal rank fusion."""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, memory_id in enumerate(ranking, start=1):
+            fused[memory_id] = fused.get(memory_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
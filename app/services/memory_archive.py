@@ -0,0 +1,193 @@
+"""Binary export and import of stored memories with their embeddings."""
+
+import io
+import json
+import tarfile
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional, AsyncIterator, BinaryIO
+import numpy as np
+from ..utils.logger import get_logger
+from ..config import get_settings
+from .memory_service import MemoryService
+
+logger = get_logger(__name__)
+
+ARCHIVE_FORMAT = "memorylink-archive"
+ARCHIVE_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+
+def _records_name(chunk: int) -> str:
+    """Get the archive member holding a chunk's ids, ciphertexts and metadata."""
+    return f"chunks/{chunk:06d}.jsonl"
+
+
+def _embeddings_name(chunk: int) -> str:
+    """Get the archive member holding a chunk's embedding matrix."""
+    return f"chunks/{chunk:06d}.npy"
+
+
+class _TarStream:
+    """Builds a tar archive incrementally, handing back the bytes written so far."""
+
+    def __init__(self):
+        """Start an empty archive."""
+        self._buffer = io.BytesIO()
+        self._tar = tarfile.open(fileobj=self._buffer, mode="w|")
+
+    def add(self, name: str, data: bytes) -> bytes:
+        """Append a member and return the archive bytes produced."""
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self._tar.addfile(info, io.BytesIO(data))
+        return self._drain()
+
+    def close(self) -> bytes:
+        """Finish the archive and return its remaining bytes."""
+        self._tar.close()
+        return self._drain()
+
+    def _drain(self) -> bytes:
+        """Take the buffered bytes."""
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+class MemoryArchive:
+    """Exports and imports the memory store as a chunked tar archive.
+
+    The archive starts with a manifest, followed by one pair of members per
+    chunk: a JSON lines file with each memory's id, ciphertext and metadata,
+    and a float32 ``.npy`` matrix with the matching embeddings. Texts stay
+    encrypted, so an archive can only be imported by a server with the same
+    encryption key and, for texts under per-user keys, the same user key
+    table. Both directions hold a single chunk in memory at a time.
+    """
+
+    def __init__(self, memory_service: MemoryService, chunk_size: Optional[int] = None):
+        """Initialize the archive with a memory service."""
+        self.memory_service = memory_service
+        self.settings = get_settings()
+        self.chunk_size = chunk_size or self.settings.archive_chunk_size
+
+    async def export(
+        self,
+        user_id: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None
+    ) -> AsyncIterator[bytes]:
+        """Stream an archive of the stored memories, optionally for one user and time range."""
+        stream = _TarStream()
+        manifest = {
+            "format": ARCHIVE_FORMAT,
+            "version": ARCHIVE_VERSION,
+            "created_at": datetime.utcnow().isoformat(),
+            "embedding_model": self.settings.embedding_model,
+            "embedding_dimension": self.settings.embedding_dimension,
+            "chunk_size": self.chunk_size,
+            "filters": {"user_id": user_id, "since": since, "until": until}
+        }
+        yield stream.add(MANIFEST_FILE, json.dumps(manifest).encode("utf-8"))
+
+        chunk = 0
+        exported = 0
+        async for memory_ids, encrypted_texts, metadatas, embeddings in (
+            self.memory_service.vector_store.iter_memories(
+                batch_size=self.chunk_size,
+                user_filter=user_id,
+                since=since,
+                until=until
+            )
+        ):
+            records = b"".join(
+                json.dumps({"id": memory_id, "text": text, "metadata": metadata}, default=str).encode("utf-8") + b"\n"
+                for memory_id, text, metadata in zip(memory_ids, encrypted_texts, metadatas)
+            )
+            matrix = io.BytesIO()
+            np.save(matrix, embeddings, allow_pickle=False)
+
+            yield stream.add(_records_name(chunk), records)
+            yield stream.add(_embeddings_name(chunk), matrix.getvalue())
+            chunk += 1
+            exported += len(memory_ids)
+
+        yield stream.close()
+        logger.info(f"Exported {exported} memories in {chunk} chunks")
+
+    async def import_archive(self, fileobj: BinaryIO) -> Dict[str, Any]:
+        """Load an archive into the store without re-embedding."""
+        start_time = time.time()
+        imported = 0
+        chunks = 0
+        manifest = None
+        records: Optional[List[Dict[str, Any]]] = None
+
+        try:
+            with tarfile.open(fileobj=fileobj, mode="r|") as tar:
+                for member in tar:
+                    if not member.isfile():
+                        continue
+                    data = tar.extractfile(member).read()
+
+                    if member.name == MANIFEST_FILE:
+                        manifest = self._check_manifest(json.loads(data))
+                    elif manifest is None:
+                        raise ValueError("Archive does not start with a manifest")
+                    elif member.name.endswith(".jsonl"):
+                        records = [json.loads(line) for line in data.splitlines() if line.strip()]
+                    elif member.name.endswith(".npy"):
+                        if records is None:
+                            raise ValueError(f"Embeddings {member.name} have no matching records")
+                        embeddings = np.load(io.BytesIO(data), allow_pickle=False)
+                        imported += await self._import_chunk(records, embeddings)
+                        chunks += 1
+                        records = None
+
+        except tarfile.TarError as e:
+            raise ValueError(f"Failed to import memories: unreadable archive: {str(e)}")
+
+        if manifest is None:
+            raise ValueError("Failed to import memories: archive has no manifest")
+        if records is not None:
+            raise ValueError("Failed to import memories: archive ends with records but no embeddings")
+
+        logger.info(f"Imported {imported} memories in {chunks} chunks")
+        return {
+            "imported": imported,
+            "chunks": chunks,
+            "elapsed_ms": round((time.time() - start_time) * 1000, 2)
+        }
+
+    async def _import_chunk(self, records: List[Dict[str, Any]], embeddings: np.ndarray) -> int:
+        """Bulk-load one chunk of records and their embeddings."""
+        if embeddings.shape != (len(records), self.settings.embedding_dimension):
+            raise ValueError(
+                f"Failed to import memories: chunk has {len(records)} records "
+                f"but embeddings of shape {embeddings.shape}"
+            )
+
+        return await self.memory_service.import_memories(
+            memory_ids=[record["id"] for record in records],
+            encrypted_texts=[record["text"] for record in records],
+            metadatas=[record["metadata"] for record in records],
+            embeddings=embeddings.tolist()
+        )
+
+    def _check_manifest(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """Reject archives this server cannot load as-is."""
+        if manifest.get("format") != ARCHIVE_FORMAT or manifest.get("version") != ARCHIVE_VERSION:
+            raise ValueError("Failed to import memories: unsupported archive format")
+
+        if (manifest.get("embedding_model") != self.settings.embedding_model
+                or manifest.get("embedding_dimension") != self.settings.embedding_dimension):
+            raise ValueError(
+                f"Failed to import memories: archive embeddings come from "
+                f"{manifest.get('embedding_model')} ({manifest.get('embedding_dimension')} dimensions), "
+                f"but this server uses {self.settings.embedding_model} "
+                f"({self.settings.embedding_dimension} dimensions)"
+            )
+        return manifest
@@ -1,24 +1,89 @@
 """Core memory service for business logic."""
 
+import asyncio
+import hmac
+import hashlib
+import math
 import uuid
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, NamedTuple, Union
 from ..models.memory_models import (
     MemoryEntry, 
+    MemoryRecord,
     AddMemoryRequest, 
     SearchMemoryRequest, 
-    MemorySearchResult
+    MemorySearchResult,
+    BatchSearchMemoryRequest
 )
-from ..utils.encryption import EncryptionService
+from ..utils.encryption import EncryptionService, get_derived_key_cache
+from ..utils.compression import Compressor, CompressionDictionaries, build_dictionary
 from ..utils.logger import get_logger
+from ..utils.timing import StageTimer
 from ..config import get_settings
 from .embedding_service import EmbeddingService
-from .vector_store import VectorStore
+from .ciphertext_migration import get_ciphertext_migrator
+from .key_rotation import get_key_rotation_worker
+from .user_keys import UserKeyStore, get_user_key_store
+from .content_index import ContentHashIndex, get_content_hash_index
+from .lexical_index import LexicalIndex, get_lexical_index, reciprocal_rank_fusion
+from .reranking import maximal_marginal_relevance, get_cross_encoder_reranker
+from .pending_overlay import PendingMemory, PendingOverlay, get_pending_overlay
+from .search_cache import SearchResultCache, get_search_result_cache
+from .plaintext_cache import PlaintextCache, get_plaintext_cache
+from .sharded_vector_store import create_vector_store
+from .replica_store import SnapshotUserKeys, get_replica_user_keys
+from .vector_store import (
+    RESERVED_METADATA_KEYS,
+    TIMESTAMP_EPOCH_KEY,
+    CONTENT_HASH_KEY,
+    to_epoch_seconds
+)
 
 logger = get_logger(__name__)
 
 
+class SearchCandidates(NamedTuple):
+    """Ranked, still-encrypted search results awaiting decryption."""
+    
+    results: List[Tuple[str, float, str, Dict[str, Any]]]
+    plaintexts: Dict[str, str]
+    timer: StageTimer
+    complete: bool = True  # False if an optional stage (e.g. rerank) was skipped
+
+
+class DuplicateMemoryError(ValueError):
+    """Raised when a memory's text already exists and the dedup policy rejects it."""
+    
+    def __init__(self, memory_id: str):
+        super().__init__(f"Memory with identical text already exists: {memory_id}")
+        self.memory_id = memory_id
+
+
+@lru_cache()
+def get_decryption_executor() -> ThreadPoolExecutor:
+    """Get the shared thread pool for decrypting large result sets."""
+    settings = get_settings()
+    return ThreadPoolExecutor(
+        max_workers=settings.decrypt_workers,
+        thread_name_prefix="decrypt"
+    )
+
+
+@lru_cache()
+def get_compressor() -> Compressor:
+    """Get the shared compressor applied to plaintexts before encryption."""
+    settings = get_settings()
+    return Compressor(
+        codec=settings.compression_codec,
+        min_bytes=settings.compression_min_bytes,
+        level=settings.compression_level,
+        dictionaries=CompressionDictionaries(settings.compression_dictionary_path)
+    )
+
+
 class MemoryService:
     """Core service for memory operations."""
     
@@ -26,8 +91,52 @@ class MemoryService:
         """Initialize the memory service."""
         self.settings = get_settings()
         self.embedding_service = EmbeddingService()
-        self.vector_store = VectorStore()
-        self.encryption_service = EncryptionService(self.settings.encryption_key)
+        self.vector_store = create_vector_store()
+        self.user_keys: Optional[Union[UserKeyStore, SnapshotUserKeys]] = self._open_user_keys()
+        self.encryption_service = EncryptionService(
+            self.settings.encryption_key,
+            cipher=self.settings.encryption_cipher,
+            compressor=get_compressor(),
+            previous_keys=self.settings.encryption_previous_keys,
+            data_keys=self.user_keys,
+            index_key=self.settings.index_key
+        )
+        self.lexical_index = self._open_lexical_index()
+        self.content_index: ContentHashIndex = get_content_hash_index(
+            self.settings.content_hash_index_path
+        )
+        self._content_hash_key = self.encryption_service.derive_subkey("content-hash")
+        self.reranker = get_cross_encoder_reranker()
+        self.pending_overlay: PendingOverlay = get_pending_overlay()
+        self.search_cache: Optional[SearchResultCache] = (
+            get_search_result_cache() if self.settings.search_cache_enabled else None
+        )
+        self.plaintext_cache: Optional[PlaintextCache] = (
+            get_plaintext_cache() if self.settings.plaintext_cache_enabled else None
+        )
+    
+    def _open_user_keys(self) -> Optional[Union[UserKeyStore, SnapshotUserKeys]]:
+        """Open the per-user key table, if enabled."""
+        if not self.settings.user_keys_enabled:
+            return None
+        # Replicas read the copy shipped with each snapshot
+        if self.settings.serving_mode == "replica":
+            return get_replica_user_keys()
+        
+        return get_user_key_store()
+    
+    def _open_lexical_index(self) -> Optional[LexicalIndex]:
+        """Open the shared blinded lexical index, if enabled."""
+        # Replicas serve snapshots, which carry no lexical index
+        if not self.settings.lexical_index_enabled or self.settings.serving_mode == "replica":
+            return None
+        
+        return get_lexical_index(
+            self.settings.lexical_index_path,
+            self.encryption_service.derive_subkey("lexical-index"),
+            self.settings.bm25_k1,
+            self.settings.bm25_b
+        )
     
     async def initialize(self):
         """Initialize all dependent services."""
@@ -36,107 +145,275 @@ class MemoryService:
     
     async def add_memory(self, request: AddMemoryRequest) -> MemoryEntry:
         """Add a new memory."""
+        memory_entry, _ = await self.store_memory(request)
+        return memory_entry
+    
+    async def store_memory(self, request: AddMemoryRequest) -> Tuple[MemoryEntry, bool]:
+        """Add a new memory, returning the entry and whether it was deduplicated."""
         start_time = time.time()
         
         try:
-            # Generate unique ID
-            memory_id = str(uuid.uuid4())
-            timestamp = datetime.utcnow()
-            
-            # Create memory entry
-            memory_entry = MemoryEntry(
-                id=memory_id,
-                text=request.text,
-                tags=request.tags,
-                timestamp=timestamp,
-                user_id=request.user_id,
-                metadata=request.metadata
-            )
-            
-            # Generate embedding for the text
-            logger.debug(f"Generating embedding for memory {memory_id}")
-            embedding = await self.embedding_service.encode_text(request.text)
+            pending, existing_entry = await self.prepare_memory(request)
+            if existing_entry:
+                return existing_entry, True
             
-            # Prepare metadata for storage
-            storage_metadata = {
-                "user_id": request.user_id,
-                "tags": request.tags,
-                "timestamp": timestamp.isoformat(),
-                **request.metadata
-            }
-            
-            # Encrypt the text content
-            encrypted_text = self.encryption_service.encrypt(request.text)
-            
-            # Store in vector database
-            await self.vector_store.add_memory(
-                memory_id=memory_id,
-                embedding=embedding,
-                text=encrypted_text,  # Store encrypted text
-                metadata=storage_metadata
-            )
+            try:
+                await self.persist_memories([pending])
+            except Exception:
+                if pending.content_hash:
+                    self.content_index.release(pending.memory_id)
+                raise
             
             processing_time = (time.time() - start_time) * 1000
-            logger.info(f"Added memory {memory_id} in {processing_time:.2f}ms")
+            logger.info(f"Added memory {pending.memory_id} in {processing_time:.2f}ms")
             
-            return memory_entry
+            return self.pending_entry(pending), False
+        
+        except DuplicateMemoryError:
+            raise
         
         except Exception as e:
             logger.error(f"Failed to add memory: {str(e)}")
             raise ValueError(f"Failed to add memory: {str(e)}")
     
+    async def prepare_memory(
+        self,
+        request: AddMemoryRequest
+    ) -> Tuple[Optional[PendingMemory], Optional[MemoryEntry]]:
+        """Assign an id, resolve duplicates and encrypt a new memory.
+        
+        Returns the memory to persist, or the existing entry when the text
+        is a duplicate.
+        """
+        policy = request.on_duplicate or self.settings.dedup_policy
+        
+        # Generate unique ID
+        memory_id = str(uuid.uuid4())
+        timestamp = datetime.utcnow()
+        
+        # Duplicates are resolved from the hash index before any model inference;
+        # with dedup off the text is neither hashed nor claimed
+        content_hash = None
+        if policy != "off":
+            content_hash = self.content_hash(request.user_id, request.text)
+            loop = asyncio.get_event_loop()
+            existing_id = await loop.run_in_executor(
+                None, self.content_index.claim, request.user_id, content_hash, memory_id
+            )
+            if existing_id:
+                # Accepted memories awaiting indexing are not stale claims
+                pending_duplicate = self.pending_overlay.get(existing_id)
+                if pending_duplicate:
+                    if policy == "reject":
+                        raise DuplicateMemoryError(existing_id)
+                    logger.info(f"Deduplicated memory as pending {existing_id}")
+                    return None, self.pending_entry(pending_duplicate)
+                
+                existing_entry = await self._resolve_duplicate(existing_id, request, policy)
+                if existing_entry:
+                    logger.info(f"Deduplicated memory as {existing_id} (policy: {policy})")
+                    return None, existing_entry
+                
+                # Neither stored nor pending: the holder is still being written, or was lost
+                claimed_before = time.time() - self.settings.dedup_claim_timeout_s
+                taken_over = await loop.run_in_executor(
+                    None,
+                    self.content_index.take_over,
+                    request.user_id, content_hash, existing_id, memory_id, claimed_before
+                )
+                if not taken_over:
+                    owner_id = await loop.run_in_executor(
+                        None, self.content_index.claim, request.user_id, content_hash, memory_id
+                    )
+                    if owner_id:
+                        if policy == "reject":
+                            raise DuplicateMemoryError(owner_id)
+                        logger.info(f"Deduplicated memory as in-flight {owner_id}")
+                        return None, MemoryEntry(
+                            id=owner_id,
+                            text=request.text,
+                            tags=request.tags,
+                            timestamp=timestamp,
+                            user_id=request.user_id,
+                            metadata=request.metadata
+                        )
+        
+        try:
+            # Encrypt the text content
+            encrypted_text = self.encryption_service.encrypt(request.text, memory_id, request.user_id)
+        except Exception:
+            if content_hash:
+                self.content_index.release(memory_id)
+            raise
+        
+        pending = PendingMemory(
+            memory_id=memory_id,
+            user_id=request.user_id,
+            text=request.text,
+            encrypted_text=encrypted_text,
+            tags=request.tags,
+            metadata=request.metadata,
+            timestamp=timestamp,
+            content_hash=content_hash
+        )
+        return pending, None
+    
+    async def embed_memories(self, memories: List[PendingMemory]) -> List[List[float]]:
+        """Generate embeddings for prepared memories in one encode pass."""
+        logger.debug(f"Generating embeddings for {len(memories)} memories")
+        return await self.embedding_service.encode_texts([memory.text for memory in memories])
+    
+    def publish_pending(self, memories: List[PendingMemory], embeddings: List[List[float]]):
+        """Make embedded memories searchable through the overlay before they are stored."""
+        self.pending_overlay.attach_embeddings(memories, embeddings)
+        for user_id in {memory.user_id for memory in memories}:
+            self._invalidate_searches(user_id)
+    
+    def discard_pending(self, memories: List[PendingMemory]):
+        """Drop accepted memories that will never be stored, freeing their content hashes."""
+        self.pending_overlay.acknowledge([memory.memory_id for memory in memories])
+        for memory in memories:
+            if memory.content_hash:
+                self.content_index.release(memory.memory_id)
+        for user_id in {memory.user_id for memory in memories}:
+            self._invalidate_searches(user_id)
+    
+    async def persist_memories(
+        self,
+        memories: List[PendingMemory],
+        embeddings: Optional[List[List[float]]] = None
+    ):
+        """Store prepared memories with one bulk write, embedding them first if needed."""
+        if not memories:
+            return
+        
+        if embeddings is None:
+            embeddings = await self.embed_memories(memories)
+        
+        # Store in vector database
+        await self.vector_store.add_memories(
+            memory_ids=[memory.memory_id for memory in memories],
+            embeddings=embeddings,
+            texts=[memory.encrypted_text for memory in memories],  # Store encrypted text
+            metadatas=[self._storage_metadata(memory) for memory in memories]
+        )
+        
+        if self.lexical_index:
+            try:
+                self.lexical_index.add_documents(
+                    [(memory.memory_id, memory.user_id, memory.text) for memory in memories]
+                )
+            except Exception as e:
+                logger.error(f"Failed to index {len(memories)} memories lexically: {str(e)}")
+        
+        for user_id in {memory.user_id for memory in memories}:
+            self._invalidate_searches(user_id)
+    
+    @staticmethod
+    def _storage_metadata(memory: PendingMemory) -> Dict[str, Any]:
+        """Build the metadata stored alongside a memory."""
+        metadata = {
+            "user_id": memory.user_id,
+            "tags": memory.tags,
+            "timestamp": memory.timestamp.isoformat(),
+            **memory.metadata,
+            TIMESTAMP_EPOCH_KEY: to_epoch_seconds(memory.timestamp)
+        }
+        if memory.content_hash:
+            metadata[CONTENT_HASH_KEY] = memory.content_hash
+        return metadata
+    
+    @staticmethod
+    def pending_entry(memory: PendingMemory) -> MemoryEntry:
+        """Build the API entry of a prepared memory."""
+        return MemoryEntry(
+            id=memory.memory_id,
+            text=memory.text,
+            tags=memory.tags,
+            timestamp=memory.timestamp,
+            user_id=memory.user_id,
+            metadata=memory.metadata
+        )
+    
+    def content_hash(self, user_id: str, text: str) -> str:
+        """Compute the keyed hash identifying a user's memory text."""
+        message = f"{user_id}\0{text}".encode('utf-8')
+        return hmac.new(self._content_hash_key, message, hashlib.sha256).hexdigest()[:32]
+    
+    async def _resolve_duplicate(
+        self,
+        existing_id: str,
+        request: AddMemoryRequest,
+        policy: str
+    ) -> Optional[MemoryEntry]:
+        """Apply the dedup policy to an existing memory; ``None`` if it is gone."""
+        result = await self.vector_store.get_memory(existing_id)
+        if not result:
+            return None
+        
+        _, metadata = result
+        
+        if policy == "reject":
+            raise DuplicateMemoryError(existing_id)
+        
+        if policy == "merge":
+            tags = self._parse_tags(metadata.get('tags', []))
+            merged_tags = tags + [tag for tag in request.tags if tag not in tags]
+            updates = {
+                key: value for key, value in request.metadata.items()
+                if key not in RESERVED_METADATA_KEYS and metadata.get(key) != value
+            }
+            if merged_tags != tags:
+                updates["tags"] = merged_tags
+            
+            if updates:
+                await self.vector_store.update_metadata(existing_id, updates)
+                self.reranker.invalidate(existing_id)
+                self._invalidate_searches(request.user_id)
+                metadata = {**metadata, **updates}
+        
+        # The request carries the identical text, so nothing needs decrypting
+        return self._build_memory_entry(existing_id, request.text, metadata)
+    
     async def search_memories(self, request: SearchMemoryRequest) -> List[MemorySearchResult]:
         """Search for memories based on semantic similarity."""
         start_time = time.time()
         
         try:
-            # Generate embedding for the search query
-            logger.debug(f"Generating embedding for query: {request.query[:50]}...")
-            query_embedding = await self.embedding_service.encode_text(request.query)
+            generation = None
+            if self.search_cache:
+                generation = self.search_cache.generation(request.user_id)
+                cached_results = self.search_cache.get(request, generation)
+                if cached_results is not None:
+                    logger.debug(f"Search served from cache in {(time.time() - start_time) * 1000:.3f}ms")
+                    return cached_results
             
-            # Search in vector store
-            results = await self.vector_store.search_memories(
-                query_embedding=query_embedding,
-                limit=request.limit,
-                min_similarity=request.min_similarity,
-                user_filter=request.user_id,
-                tag_filter=request.tags
-            )
+            candidates = await self.find_search_candidates(request)
             
             # Process and decrypt results
+            wants_text = self._wants_text(request.fields)
+            if wants_text:
+                with candidates.timer.stage("decrypt"):
+                    await self._decrypt_hits(candidates.results, candidates.plaintexts)
             search_results = []
-            for memory_id, similarity, encrypted_text, metadata in results:
-                try:
-                    # Decrypt the text content
-                    decrypted_text = self.encryption_service.decrypt(encrypted_text)
-                    
-                    # Parse timestamp
-                    timestamp = datetime.fromisoformat(metadata.get('timestamp', datetime.utcnow().isoformat()))
-                    
-                    # Extract tags
-                    tags = metadata.get('tags', [])
-                    if isinstance(tags, str):
-                        tags = [tag.strip() for tag in tags.split(',') if tag.strip()]
-                    
-                    # Create search result
-                    result = MemorySearchResult(
-                        id=memory_id,
-                        text=decrypted_text,
-                        tags=tags,
-                        timestamp=timestamp,
-                        similarity_score=round(similarity, 4),
-                        metadata={k: v for k, v in metadata.items() if k not in ['user_id', 'tags', 'timestamp']}
-                    )
-                    
-                    search_results.append(result)
-                
-                except Exception as decrypt_error:
-                    logger.error(f"Failed to decrypt memory {memory_id}: {str(decrypt_error)}")
+            for memory_id, similarity, encrypted_text, metadata in candidates.results:
+                text = candidates.plaintexts.get(memory_id)
+                if wants_text and text is None:
                     # Skip this result rather than failing the entire search
                     continue
+                
+                search_results.append(
+                    self._build_search_result(memory_id, similarity, text, metadata, request.fields)
+                )
+            
+            if self.search_cache and candidates.complete:
+                self.search_cache.set(request, generation, search_results)
             
             processing_time = (time.time() - start_time) * 1000
-            logger.info(f"Search completed in {processing_time:.2f}ms, found {len(search_results)} results")
+            logger.info(
+                f"Search completed in {processing_time:.2f}ms, found {len(search_results)} results "
+                f"(timings: {candidates.timer.as_dict()})"
+            )
             
             return search_results
         
@@ -144,12 +421,691 @@ class MemoryService:
             logger.error(f"Failed to search memories: {str(e)}")
             raise ValueError(f"Failed to search memories: {str(e)}")
     
-    async def get_memory(self, memory_id: str, user_id: str) -> Optional[MemoryEntry]:
-        """Get a specific memory by ID."""
+    async def find_search_candidates(self, request: SearchMemoryRequest) -> SearchCandidates:
+        """Retrieve and rank the still-encrypted results of a search."""
+        timer = StageTimer()
+        
+        # Generate embedding for the search query
+        logger.debug(f"Generating embedding for query: {request.query[:50]}...")
+        with timer.stage("embedding"):
+            query_embedding = await self.embedding_service.encode_text(request.query)
+        
+        search_filters = self._search_filters(request)
+        
+        # Ciphertext is only read when text is returned or re-ranked
+        include_documents = self._wants_text(request.fields) or request.rerank
+        
+        # Diversification and re-ranking need a wider pool than the final page
+        candidate_limit = request.limit
+        if request.diversity:
+            candidate_limit *= self.settings.mmr_candidate_multiplier
+        if request.rerank:
+            candidate_limit = max(candidate_limit, self.settings.rerank_top_n)
+        
+        with timer.stage("retrieval"):
+            if request.hybrid and self.lexical_index:
+                results = await self._hybrid_search(
+                    request, query_embedding, search_filters, candidate_limit, include_documents
+                )
+            else:
+                results = await self._search_vectors(
+                    request.user_id, [query_embedding], candidate_limit, search_filters, include_documents
+                )
+                results = results[0]
+        
+        # Texts decrypted by the re-ranker are reused when building results
+        plaintexts: Dict[str, Optional[str]] = {}
+        complete = True
+        
+        if request.rerank:
+            with timer.stage("rerank"):
+                reranked = await self._rerank(request, results, plaintexts)
+            complete = reranked is not None
+            results = reranked if complete else results
+        
+        if request.diversity:
+            with timer.stage("diversify"):
+                results = await self._diversify(results, request.limit, request.diversity)
+        
+        return SearchCandidates(results[:request.limit], plaintexts, timer, complete)
+    
+    async def stream_search_results(
+        self,
+        request: SearchMemoryRequest,
+        candidates: SearchCandidates
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield each search result as soon as it is decrypted, then a summary record."""
+        timer = candidates.timer
+        wants_text = self._wants_text(request.fields)
+        found = 0
+        
+        for memory_id, similarity, encrypted_text, metadata in candidates.results:
+            text = None
+            if wants_text:
+                with timer.stage("decrypt"):
+                    text = self._decrypt_result(memory_id, encrypted_text, candidates.plaintexts)
+                if text is None:
+                    continue
+            
+            found += 1
+            yield {
+                "type": "result",
+                **self._project(self._search_result_fields(memory_id, similarity, text, metadata), request.fields)
+            }
+            # The decrypted text is not needed once it has been sent
+            candidates.plaintexts.pop(memory_id, None)
+        
+        timings = timer.as_dict()
+        logger.info(f"Streamed search completed in {timings['total_ms']:.2f}ms, found {found} results")
+        
+        yield {
+            "type": "summary",
+            "query": request.query,
+            "total_found": found,
+            "execution_time_ms": timings["total_ms"],
+            "timings": timings
+        }
+    
+    def _decrypt_result(
+        self,
+        memory_id: str,
+        encrypted_text: str,
+        plaintexts: Dict[str, Optional[str]]
+    ) -> Optional[str]:
+        """Decrypt a search hit, reusing earlier decryptions; ``None`` if it fails."""
+        if memory_id in plaintexts:
+            return plaintexts[memory_id]
+        
+        try:
+            plaintexts[memory_id] = self._decrypt_text(encrypted_text, memory_id)
+        except Exception as decrypt_error:
+            logger.error(f"Failed to decrypt memory {memory_id}: {str(decrypt_error)}")
+            return None
+        
+        return plaintexts[memory_id]
+    
+    async def _decrypt_hits(
+        self,
+        results: List[Tuple[str, float, str, Dict[str, Any]]],
+        plaintexts: Dict[str, Optional[str]]
+    ):
+        """Decrypt the hits not yet in ``plaintexts``; failures map to ``None``.
+        
+        Batches at or above the parallelism threshold are split across the
+        decryption pool, so large pages do not block the event loop and can
+        use several cores wherever the cipher releases the GIL.
+        """
+        pending = {
+            memory_id: encrypted_text
+            for memory_id, _, encrypted_text, _ in results
+            if memory_id not in plaintexts
+        }
+        if not pending:
+            return
+        
+        memory_ids = list(pending)
+        encrypted_texts = list(pending.values())
+        if len(pending) < self.settings.decrypt_parallel_threshold:
+            decrypted = self._decrypt_texts(encrypted_texts, memory_ids)
+        else:
+            loop = asyncio.get_event_loop()
+            chunk_size = math.ceil(len(pending) / self.settings.decrypt_workers)
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(
+                    get_decryption_executor(),
+                    self._decrypt_texts,
+                    encrypted_texts[start:start + chunk_size],
+                    memory_ids[start:start + chunk_size]
+                )
+                for start in range(0, len(pending), chunk_size)
+            ))
+            decrypted = [text for chunk in chunks for text in chunk]
+        
+        for memory_id, text in zip(memory_ids, decrypted):
+            if text is None:
+                logger.error(f"Failed to decrypt memory {memory_id}")
+            plaintexts[memory_id] = text
+    
+    def _decrypt_text(self, encrypted_text: str, memory_id: str) -> str:
+        """Decrypt a memory text, through the plaintext cache when it is enabled."""
+        if not self.plaintext_cache:
+            return self.encryption_service.decrypt(encrypted_text, memory_id)
+        
+        text = self.plaintext_cache.get(memory_id, encrypted_text)
+        if text is None:
+            text = self.encryption_service.decrypt(encrypted_text, memory_id)
+            self.plaintext_cache.set(memory_id, encrypted_text, text)
+        return text
+    
+    def _decrypt_texts(self, encrypted_texts: List[str], memory_ids: List[str]) -> List[Optional[str]]:
+        """Decrypt memory texts like ``decrypt_many``, decrypting only those not cached."""
+        if not self.plaintext_cache:
+            return self.encryption_service.decrypt_many(encrypted_texts, memory_ids)
+        
+        texts = [
+            self.plaintext_cache.get(memory_id, encrypted_text)
+            for memory_id, encrypted_text in zip(memory_ids, encrypted_texts)
+        ]
+        missing = [index for index, text in enumerate(texts) if text is None]
+        if missing:
+            decrypted = self.encryption_service.decrypt_many(
+                [encrypted_texts[index] for index in missing],
+                [memory_ids[index] for index in missing]
+            )
+            for index, text in zip(missing, decrypted):
+                texts[index] = text
+                if text is not None:
+                    self.plaintext_cache.set(memory_ids[index], encrypted_texts[index], text)
+        return texts
+    
+    async def search_memories_batch(
+        self,
+        request: BatchSearchMemoryRequest
+    ) -> List[Tuple[str, List[MemorySearchResult]]]:
+        """Run several semantic searches with one encode pass and one vector query."""
+        start_time = time.time()
+        
         try:
-            result = await self.vector_store.get_memory(memory_id)
+            query_embeddings = await self.embedding_service.encode_texts(request.queries)
+            
+            wants_text = self._wants_text(request.fields)
+            batch_results = await self._search_vectors(
+                request.user_id, query_embeddings, request.limit, self._search_filters(request), wants_text
+            )
+            
+            # Memories hit by several queries are decrypted once
+            plaintexts: Dict[str, Optional[str]] = {}
+            if wants_text:
+                await self._decrypt_hits([hit for results in batch_results for hit in results], plaintexts)
+            
+            grouped_results = []
+            for query, results in zip(request.queries, batch_results):
+                search_results = []
+                for memory_id, similarity, encrypted_text, metadata in results:
+                    text = plaintexts.get(memory_id)
+                    if wants_text and text is None:
+                        continue
+                    
+                    search_results.append(
+                        self._build_search_result(memory_id, similarity, text, metadata, request.fields)
+                    )
+                
+                grouped_results.append((query, search_results))
+            
+            processing_time = (time.time() - start_time) * 1000
+            logger.info(
+                f"Batch search of {len(request.queries)} queries completed in {processing_time:.2f}ms, "
+                f"decrypted {len(plaintexts)} distinct memories"
+            )
+            
+            return grouped_results
+        
+        except Exception as e:
+            logger.error(f"Failed to search memories: {str(e)}")
+            raise ValueError(f"Failed to search memories: {str(e)}")
+    
+    async def _search_vectors(
+        self,
+        user_id: str,
+        query_embeddings: List[List[float]],
+        limit: int,
+        search_filters: Dict[str, Any],
+        include_documents: bool = True
+    ) -> List[List[Tuple[str, float, str, Dict[str, Any]]]]:
+        """Search the vector index and merge in the user's not-yet-indexed memories."""
+        batch_results = await self.vector_store.search_memories_batch(
+            query_embeddings=query_embeddings,
+            limit=limit,
+            include_documents=include_documents,
+            **search_filters
+        )
+        
+        if not self.pending_overlay.has_pending(user_id):
+            return batch_results
+        
+        pending_hits = self.pending_overlay.search(
+            user_id,
+            query_embeddings,
+            limit,
+            min_similarity=search_filters["min_similarity"],
+            tag_filter=search_filters["tag_filter"],
+            since=search_filters["since"],
+            until=search_filters["until"],
+            metadata_filters=search_filters["metadata_filters"]
+        )
+        
+        merged = []
+        for results, hits in zip(batch_results, pending_hits):
+            indexed_ids = {result[0] for result in results}
+            pending_results = [
+                (memory.memory_id, similarity, memory.encrypted_text, self._storage_metadata(memory))
+                for memory, similarity in hits
+                if memory.memory_id not in indexed_ids
+            ]
+            if pending_results:
+                results = sorted(results + pending_results, key=lambda result: result[1], reverse=True)[:limit]
+            merged.append(results)
+        
+        return merged
+    
+    @staticmethod
+    def _search_filters(request) -> Dict[str, Any]:
+        """Translate a search request's filters into vector store arguments."""
+        return {
+            "min_similarity": request.min_similarity,
+            "user_filter": request.user_id,
+            "tag_filter": request.tags,
+            "since": to_epoch_seconds(request.since) if request.since else None,
+            "until": to_epoch_seconds(request.until) if request.until else None,
+            "metadata_filters": request.filters
+        }
+    
+    @staticmethod
+    def _wants_text(fields: Optional[List[str]]) -> bool:
+        """Whether a projection includes the (encrypted) text."""
+        return fields is None or "text" in fields
+    
+    @staticmethod
+    def _project(record: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+        """Keep the id and the requested fields of a record; ``None`` keeps all."""
+        if fields is None:
+            return record
+        return {key: value for key, value in record.items() if key == "id" or key in fields}
+    
+    @staticmethod
+    def _build_search_result(
+        memory_id: str,
+        similarity: float,
+        text: Optional[str],
+        metadata: Dict[str, Any],
+        fields: Optional[List[str]] = None
+    ) -> MemorySearchResult:
+        """Build an API search result from a decrypted memory, projected onto ``fields``."""
+        return MemorySearchResult(**MemoryService._project(
+            MemoryService._search_result_fields(memory_id, similarity, text, metadata), fields
+        ))
+    
+    @staticmethod
+    def _search_result_fields(
+        memory_id: str,
+        similarity: float,
+        text: Optional[str],
+        metadata: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Get the fields of a search result for a decrypted memory."""
+        return {
+            "id": memory_id,
+            "text": text,
+            "tags": MemoryService._parse_tags(metadata.get('tags', [])),
+            "timestamp": MemoryService._parse_timestamp(metadata),
+            "similarity_score": round(similarity, 4),
+            "metadata": {k: v for k, v in metadata.items() if k not in RESERVED_METADATA_KEYS}
+        }
+    
+    @staticmethod
+    def _build_memory_entry(memory_id: str, text: str, metadata: Dict[str, Any]) -> MemoryEntry:
+        """Build an API memory entry from a decrypted memory."""
+        return MemoryEntry(**MemoryService._memory_entry_fields(memory_id, text, metadata))
+    
+    @staticmethod
+    def _build_memory_record(
+        memory_id: str,
+        text: Optional[str],
+        metadata: Dict[str, Any],
+        fields: Optional[List[str]]
+    ) -> MemoryRecord:
+        """Build a memory projected onto ``fields``."""
+        return MemoryRecord(**MemoryService._project(
+            MemoryService._memory_entry_fields(memory_id, text, metadata), fields
+        ))
+    
+    @staticmethod
+    def _memory_entry_fields(memory_id: str, text: Optional[str], metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the fields of a memory entry for a decrypted memory."""
+        return {
+            "id": memory_id,
+            "text": text,
+            "tags": MemoryService._parse_tags(metadata.get('tags', [])),
+            "timestamp": MemoryService._parse_timestamp(metadata),
+            "user_id": metadata.get('user_id'),
+            "metadata": {k: v for k, v in metadata.items() if k not in RESERVED_METADATA_KEYS}
+        }
+    
+    @staticmethod
+    def _parse_tags(tags: Any) -> List[str]:
+        """Convert stored comma-separated tags back to a list."""
+        if isinstance(tags, str):
+            tags = [tag.strip() for tag in tags.split(',') if tag.strip()]
+        return list(tags)
+    
+    @staticmethod
+    def _parse_timestamp(metadata: Dict[str, Any]) -> datetime:
+        """Parse the stored ISO timestamp of a memory."""
+        return datetime.fromisoformat(metadata.get('timestamp', datetime.utcnow().isoformat()))
+    
+    async def _hybrid_search(
+        self,
+        request: SearchMemoryRequest,
+        query_embedding: List[float],
+        search_filters: Dict[str, Any],
+        limit: int,
+        include_documents: bool = True
+    ) -> List[Tuple[str, float, str, Dict[str, Any]]]:
+        """Fuse semantic and blinded BM25 rankings with reciprocal rank fusion."""
+        candidate_limit = limit * self.settings.hybrid_candidate_multiplier
+        
+        # The BM25 index is SQLite, so it is queried off the event loop alongside the vectors
+        loop = asyncio.get_event_loop()
+        vector_batch, lexical_hits = await asyncio.gather(
+            self._search_vectors(
+                request.user_id, [query_embedding], candidate_limit, search_filters, include_documents
+            ),
+            loop.run_in_executor(
+                None, self.lexical_index.search, request.user_id, request.query, candidate_limit
+            )
+        )
+        vector_results = vector_batch[0]
+        
+        candidates = {result[0]: result for result in vector_results}
+        
+        # Lexical-only hits still have to pass the request's user, tag, time and
+        # metadata filters, but not the similarity floor: an exact term match
+        # is relevant however far its embedding is from the query's
+        lexical_filters = {**search_filters, "min_similarity": 0.0}
+        missing_ids = [memory_id for memory_id, _ in lexical_hits if memory_id not in candidates]
+        for result in await self.vector_store.get_memories_by_ids(
+            missing_ids, query_embedding, include_documents=include_documents, **lexical_filters
+        ):
+            candidates[result[0]] = result
+        
+        fused = reciprocal_rank_fusion(
+            [
+                [result[0] for result in vector_results],
+                [memory_id for memory_id, _ in lexical_hits if memory_id in candidates]
+            ],
+            k=self.settings.rrf_k
+        )
+        
+        return [candidates[memory_id] for memory_id, _ in fused[:limit]]
+    
+    async def _rerank(
+        self,
+        request: SearchMemoryRequest,
+        results: List[Tuple[str, float, str, Dict[str, Any]]],
+        plaintexts: Dict[str, Optional[str]]
+    ) -> Optional[List[Tuple[str, float, str, Dict[str, Any]]]]:
+        """Re-order the top candidates by cross-encoder score; ``None`` if skipped."""
+        top = results[:self.settings.rerank_top_n]
+        
+        await self._decrypt_hits(top, plaintexts)
+        candidates = [
+            (memory_id, plaintexts[memory_id])
+            for memory_id, _, _, _ in top
+            if plaintexts[memory_id] is not None
+        ]
+        
+        scores = await self.reranker.score(request.query, candidates, request.rerank_budget_ms)
+        if scores is None:
+            return None
+        
+        score_by_id = dict(zip((memory_id for memory_id, _ in candidates), scores))
+        reranked = sorted(
+            (result for result in top if result[0] in score_by_id),
+            key=lambda result: score_by_id[result[0]],
+            reverse=True
+        )
+        return reranked + results[len(top):]
+    
+    async def _diversify(
+        self,
+        results: List[Tuple[str, float, str, Dict[str, Any]]],
+        limit: int,
+        diversity: float
+    ) -> List[Tuple[str, float, str, Dict[str, Any]]]:
+        """Re-rank candidates with maximal marginal relevance."""
+        if len(results) <= 1:
+            return results[:limit]
+        
+        memory_ids = [result[0] for result in results]
+        embeddings = await self.vector_store.get_embeddings(memory_ids)
+        embeddings.update(self.pending_overlay.get_embeddings(
+            [memory_id for memory_id in memory_ids if memory_id not in embeddings]
+        ))
+        results = [result for result in results if result[0] in embeddings]
+        
+        selected = maximal_marginal_relevance(
+            [embeddings[result[0]] for result in results],
+            [result[1] for result in results],
+            k=limit,
+            diversity=diversity
+        )
+        return [results[index] for index in selected]
+    
+    def _invalidate_searches(self, user_id: str):
+        """Make cached searches of a user stale after one of their memories changed."""
+        if self.search_cache:
+            self.search_cache.bump(user_id)
+    
+    async def import_memories(
+        self,
+        memory_ids: List[str],
+        encrypted_texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: List[List[float]]
+    ) -> int:
+        """Bulk-load exported memories with their stored embeddings, skipping re-embedding."""
+        if not memory_ids:
+            return 0
+        
+        await self.vector_store.add_memories(
+            memory_ids=memory_ids,
+            embeddings=embeddings,
+            texts=encrypted_texts,
+            metadatas=metadatas
+        )
+        
+        self.content_index.add_many([
+            (metadata.get('user_id', ''), metadata[CONTENT_HASH_KEY], memory_id)
+            for memory_id, metadata in zip(memory_ids, metadatas)
+            if metadata.get(CONTENT_HASH_KEY)
+        ])
+        
+        if self.lexical_index:
+            documents = []
+            texts = self.encryption_service.decrypt_many(encrypted_texts, memory_ids)
+            for memory_id, text, metadata in zip(memory_ids, texts, metadatas):
+                if text is None:
+                    logger.warning(f"Skipping lexical indexing of undecryptable memory {memory_id}")
+                    continue
+                documents.append((memory_id, metadata.get('user_id', ''), text))
+            self.lexical_index.add_documents(documents)
+        
+        for memory_id in memory_ids:
+            self.reranker.invalidate(memory_id)
+        for user_id in {metadata.get('user_id', '') for metadata in metadatas}:
+            self._invalidate_searches(user_id)
+        
+        return len(memory_ids)
+    
+    async def rebuild_lexical_index(self, batch_size: int = 500) -> int:
+        """Re-index every stored memory into the lexical index."""
+        if not self.lexical_index:
+            return 0
+        
+        indexed = 0
+        async for page in self.vector_store.iter_records(batch_size=batch_size):
+            documents = []
+            texts = self.encryption_service.decrypt_many(page['documents'], page['ids'])
+            for memory_id, text, metadata in zip(page['ids'], texts, page['metadatas']):
+                if text is None:
+                    logger.warning(f"Skipping lexical indexing of undecryptable memory {memory_id}")
+                    continue
+                documents.append((memory_id, (metadata or {}).get('user_id', ''), text))
+            
+            self.lexical_index.add_documents(documents)
+            indexed += len(documents)
+        
+        self.lexical_index.set_key_fingerprint(self.encryption_service.index_key_id)
+        logger.info(f"Rebuilt lexical index with {indexed} memories")
+        return indexed
+    
+    async def ensure_lexical_index(self):
+        """Rebuild the lexical index if it is new or was blinded under another key."""
+        if not self.lexical_index:
+            return
+        if self.lexical_index.get_key_fingerprint() == self.encryption_service.index_key_id:
+            return
+        
+        try:
+            if self.lexical_index.document_count() > 0:
+                logger.info("Lexical index was blinded under another key; rebuilding it")
+            self.lexical_index.reset()
+            await self.rebuild_lexical_index()
+        except Exception as e:
+            logger.error(f"Failed to build lexical index: {str(e)}")
+    
+    async def ensure_content_hash_index(self, batch_size: int = 500):
+        """Rebuild the content hash index if it is new or was hashed under another key.
+        
+        Every text is decrypted and rehashed, and hashes kept in stored
+        metadata are rewritten where they were made under another key.
+        Nothing is rebuilt while deduplication is off; the index is brought
+        up to date on the first start with a policy enabled.
+        """
+        if self.settings.dedup_policy == "off":
+            return
+        
+        fingerprint = self.encryption_service.index_key_id
+        if self.content_index.get_key_fingerprint() == fingerprint:
+            return
+        
+        try:
+            if self.content_index.count() > 0:
+                logger.info("Content hash index was hashed under another key; rebuilding it")
+            self.content_index.reset()
+            
+            registered = 0
+            loop = asyncio.get_event_loop()
+            async for page in self.vector_store.iter_records(batch_size=batch_size):
+                # Decryption and hashing are CPU-bound, so each page runs off the event loop
+                entries, hash_updates = await loop.run_in_executor(
+                    get_decryption_executor(), self._hash_page, page
+                )
+                await self.vector_store.update_metadata_many(hash_updates)
+                await loop.run_in_executor(None, self.content_index.add_many, entries)
+                registered += len(entries)
+            
+            self.content_index.set_key_fingerprint(fingerprint)
+            if registered:
+                logger.info(f"Registered content hashes for {registered} memories")
+        
+        except Exception as e:
+            logger.error(f"Failed to build content hash index: {str(e)}")
+    
+    def _hash_page(
+        self,
+        page: Dict[str, Any]
+    ) -> Tuple[List[Tuple[str, str, str]], Dict[str, Dict[str, Any]]]:
+        """Hash a page of stored memories for the content hash index.
+        
+        Returns the index entries and the metadata updates of memories whose
+        stored hash was made under another key.
+        """
+        entries = []
+        hash_updates = {}
+        texts = self.encryption_service.decrypt_many(page['documents'], page['ids'])
+        for memory_id, text, metadata in zip(page['ids'], texts, page['metadatas']):
+            if text is None:
+                logger.warning(f"Skipping content hash of undecryptable memory {memory_id}")
+                continue
+            metadata = metadata or {}
+            user_id = metadata.get('user_id', '')
+            content_hash = self.content_hash(user_id, text)
+            if metadata.get(CONTENT_HASH_KEY) != content_hash:
+                hash_updates[memory_id] = {CONTENT_HASH_KEY: content_hash}
+            
+            entries.append((user_id, content_hash, memory_id))
+        
+        return entries, hash_updates
+    
+    async def ensure_indexes(self):
+        """Build derived indexes that are missing for pre-existing memories."""
+        await self.ensure_content_hash_index()
+        await self.ensure_lexical_index()
+        await self.migrate_ciphertexts()
+        await self.rotate_keys()
+    
+    async def migrate_ciphertexts(self):
+        """Rewrite memories still stored in the legacy ciphertext format."""
+        if not self.settings.ciphertext_migration_enabled:
+            return
+        
+        try:
+            await get_ciphertext_migrator().run(self.vector_store)
+        except Exception as e:
+            logger.error(f"Failed to migrate ciphertexts: {str(e)}")
+    
+    async def rotate_keys(self):
+        """Re-encrypt memories still under a previous key, or not yet under their user's key."""
+        if not self.settings.key_rotation_enabled:
+            return
+        if not self.settings.encryption_previous_keys and not self.user_keys:
+            return
+        
+        try:
+            await get_key_rotation_worker().run(
+                self.vector_store,
+                self.encryption_service,
+                executor=get_decryption_executor(),
+                workers=self.settings.decrypt_workers
+            )
+        except Exception as e:
+            logger.error(f"Failed to rotate encryption keys: {str(e)}")
+    
+    async def train_compression_dictionary(self, sample_size: int = 1000) -> Dict[str, Any]:
+        """Build a dictionary from a sample of stored memories and use it for new writes.
+        
+        Existing values keep the dictionary they were written with.
+        """
+        compressor = self.encryption_service.compressor
+        samples = []
+        async for page in self.vector_store.iter_records(batch_size=min(sample_size, 500), include=["documents"]):
+            texts = self.encryption_service.decrypt_many(page['documents'], page['ids'])
+            samples.extend(text.encode('utf-8') for text in texts if text)
+            if len(samples) >= sample_size:
+                break
+        samples = samples[:sample_size]
+        
+        try:
+            dictionary = build_dictionary(
+                samples,
+                self.settings.compression_dictionary_size,
+                codec=compressor.codec
+            )
+        except Exception as e:
+            raise ValueError(f"Failed to train compression dictionary: {str(e)}")
+        
+        dict_id = compressor.dictionaries.add(dictionary)
+        logger.info(f"Trained compression dictionary {dict_id.hex()} from {len(samples)} memories")
+        return {"dictionary_id": dict_id.hex(), "size": len(dictionary), "samples": len(samples)}
+    
+    async def get_memory(
+        self,
+        memory_id: str,
+        user_id: str,
+        fields: Optional[List[str]] = None
+    ) -> Optional[Union[MemoryEntry, MemoryRecord]]:
+        """Get a specific memory by ID, projected onto ``fields`` when given."""
+        try:
+            wants_text = self._wants_text(fields)
+            result = await self.vector_store.get_memory(memory_id, include_document=wants_text)
             
             if not result:
+                # Read-your-writes for memories accepted but not yet indexed
+                pending = self.pending_overlay.get(memory_id)
+                if pending and pending.user_id == user_id:
+                    entry = self.pending_entry(pending)
+                    return entry if fields is None else MemoryRecord(**self._project(entry.dict(), fields))
                 return None
             
             encrypted_text, metadata = result
@@ -160,37 +1116,59 @@ class MemoryService:
                 return None
             
             # Decrypt the text content
-            decrypted_text = self.encryption_service.decrypt(encrypted_text)
-            
-            # Parse timestamp
-            timestamp = datetime.fromisoformat(metadata.get('timestamp', datetime.utcnow().isoformat()))
-            
-            # Extract tags
-            tags = metadata.get('tags', [])
-            if isinstance(tags, str):
-                tags = [tag.strip() for tag in tags.split(',') if tag.strip()]
-            
-            # Create memory entry
-            memory_entry = MemoryEntry(
-                id=memory_id,
-                text=decrypted_text,
-                tags=tags,
-                timestamp=timestamp,
-                user_id=user_id,
-                metadata={k: v for k, v in metadata.items() if k not in ['user_id', 'tags', 'timestamp']}
-            )
+            decrypted_text = self._decrypt_text(encrypted_text, memory_id) if wants_text else None
             
-            return memory_entry
+            if fields is None:
+                return self._build_memory_entry(memory_id, decrypted_text, metadata)
+            return self._build_memory_record(memory_id, decrypted_text, metadata, fields)
         
         except Exception as e:
             logger.error(f"Failed to get memory {memory_id}: {str(e)}")
             return None
     
+    async def list_memories(
+        self,
+        user_id: str,
+        limit: int = 50,
+        offset: int = 0,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[MemoryRecord]:
+        """List a user's stored memories newest first, projected onto ``fields``."""
+        try:
+            wants_text = self._wants_text(fields)
+            rows = await self.vector_store.list_memories(
+                user_id,
+                limit=limit,
+                offset=offset,
+                since=to_epoch_seconds(since) if since else None,
+                until=to_epoch_seconds(until) if until else None,
+                include_documents=wants_text
+            )
+            
+            texts = (
+                self._decrypt_texts([row[1] for row in rows], [row[0] for row in rows])
+                if wants_text else [None] * len(rows)
+            )
+            
+            records = []
+            for (memory_id, _, metadata), text in zip(rows, texts):
+                if wants_text and text is None:
+                    logger.error(f"Failed to decrypt memory {memory_id}")
+                    continue
+                records.append(self._build_memory_record(memory_id, text, metadata, fields))
+            return records
+        
+        except Exception as e:
+            logger.error(f"Failed to list memories for user {user_id}: {str(e)}")
+            raise ValueError(f"Failed to list memories: {str(e)}")
+    
     async def delete_memory(self, memory_id: str, user_id: str) -> bool:
         """Delete a memory."""
         try:
-            # First check if memory exists and user owns it
-            memory = await self.get_memory(memory_id, user_id)
+            # First check if memory exists and user owns it; nothing needs decrypting
+            memory = await self.get_memory(memory_id, user_id, fields=["user_id"])
             if not memory:
                 return False
             
@@ -198,6 +1176,13 @@ class MemoryService:
             success = await self.vector_store.delete_memory(memory_id)
             
             if success:
+                if self.lexical_index:
+                    self.lexical_index.remove_document(memory_id)
+                self.content_index.release(memory_id)
+                self.reranker.invalidate(memory_id)
+                if self.plaintext_cache:
+                    self.plaintext_cache.invalidate(memory_id)
+                self._invalidate_searches(user_id)
                 logger.info(f"Deleted memory {memory_id} for user {user_id}")
             
             return success
@@ -206,6 +1191,49 @@ class MemoryService:
             logger.error(f"Failed to delete memory {memory_id}: {str(e)}")
             return False
     
+    async def delete_user(self, user_id: str) -> bool:
+        """Crypto-shred a user by destroying their data key; returns whether one existed.
+        
+        This takes one key-table write however many memories the user has:
+        everything written under the key is unreadable from then on. The
+        rows, which still hold embeddings and metadata, are removed later
+        by ``purge_user_memories``.
+        """
+        key_destroyed = self.user_keys.destroy(user_id) if self.user_keys else False
+        self.content_index.release_user(user_id)
+        self._invalidate_searches(user_id)
+        if self.plaintext_cache:
+            # Shredding is rare, so drop every entry rather than index entries by user
+            self.plaintext_cache.clear()
+        return key_destroyed
+    
+    async def purge_user_memories(self, user_id: str, batch_size: int = 500) -> int:
+        """Delete the stored rows of a user's memories, one write per batch."""
+        # Ids are collected first: deleting while paging would shift the offsets
+        memory_ids = []
+        async for page in self.vector_store.iter_records(
+            batch_size=batch_size,
+            where={"user_id": user_id},
+            include=[]
+        ):
+            memory_ids.extend(page['ids'])
+        
+        deleted = 0
+        loop = asyncio.get_event_loop()
+        for start in range(0, len(memory_ids), batch_size):
+            batch = memory_ids[start:start + batch_size]
+            deleted += await self.vector_store.delete_memories(batch)
+            if self.lexical_index:
+                await loop.run_in_executor(None, self.lexical_index.remove_documents, batch)
+            for memory_id in batch:
+                self.reranker.invalidate(memory_id)
+                if self.plaintext_cache:
+                    self.plaintext_cache.invalidate(memory_id)
+        
+        self._invalidate_searches(user_id)
+        logger.info(f"Purged {deleted} memories of user {user_id}")
+        return deleted
+    
     async def get_user_memories_count(self, user_id: str) -> int:
         """Get the count of memories for a user."""
         try:
@@ -236,7 +1264,19 @@ class MemoryService:
                 "embedding_model": self.settings.embedding_model,
                 "embedding_dimension": self.settings.embedding_dimension,
                 **vector_stats,
-                "encryption_enabled": True
+                "encryption_enabled": True,
+                "key_derivation": get_derived_key_cache().get_stats(),
+                "compression": self.encryption_service.compressor.get_stats(),
+                "ciphertext_migration": get_ciphertext_migrator().get_stats(),
+                "key_rotation": get_key_rotation_worker().get_stats(),
+                "user_keys": self.user_keys.get_stats() if self.user_keys else None,
+                "lexical_index": self.lexical_index.get_stats() if self.lexical_index else None,
+                "dedup_policy": self.settings.dedup_policy,
+                "content_hashes": self.content_index.count(),
+                "reranker": self.reranker.get_stats(),
+                "search_cache": self.search_cache.get_stats() if self.search_cache else None,
+                "plaintext_cache": self.plaintext_cache.get_stats() if self.plaintext_cache else None,
+                "pending_overlay": self.pending_overlay.get_stats()
             }
         
         except Exception as e:
@@ -0,0 +1,209 @@
+"""Compilation of user metadata filters into ChromaDB where clauses."""
+
+import operator as operators
+from typing import Any, Dict, List, Iterable, Set
+
+COMPARISON_OPERATORS = ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte")
+MEMBERSHIP_OPERATORS = ("$in", "$nin")
+LOGICAL_OPERATORS = ("$and", "$or")
+RANGE_OPERATORS = ("$gt", "$gte", "$lt", "$lte")
+
+NUMERIC_TYPES = {"int", "float"}
+MAX_FILTER_CONDITIONS = 32
+
+
+class MetadataFilterError(ValueError):
+    """Raised when a metadata filter expression is invalid."""
+
+
+def scalar_type_name(value: Any) -> str:
+    """Return the manifest type name for a scalar metadata value."""
+    # bool is a subclass of int, so it has to be checked first
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "str"
+    raise MetadataFilterError(f"Unsupported filter value: {value!r}")
+
+
+def compile_filters(
+    filters: Dict[str, Any],
+    manifest: Dict[str, List[str]],
+    reserved_keys: Iterable[str] = ()
+) -> List[Dict[str, Any]]:
+    """Compile a filter expression into a list of Chroma where conditions.
+
+    The returned conditions are meant to be AND-ed with the service's own
+    conditions (user, time range). ``manifest`` maps metadata keys to the
+    scalar types stored for them and is used to reject comparisons that can
+    never match, e.g. ``$gte`` on a key that only ever held strings.
+    """
+    if not isinstance(filters, dict):
+        raise MetadataFilterError("Filters must be an object")
+
+    compiler = _FilterCompiler(manifest, set(reserved_keys))
+    return compiler.compile_expression(filters)
+
+
+def evaluate_filters(filters: Dict[str, Any], metadata: Dict[str, Any]) -> bool:
+    """Evaluate a filter expression against one memory's metadata in Python.
+
+    Mirrors how Chroma evaluates the compiled clauses, including that a
+    condition on a key the memory does not have never matches (even
+    ``$ne``/``$nin``). The expression is assumed to have passed
+    ``compile_filters`` already.
+    """
+    for key, value in filters.items():
+        if key == "$and":
+            if not all(evaluate_filters(operand, metadata) for operand in value):
+                return False
+        elif key == "$or":
+            if not any(evaluate_filters(operand, metadata) for operand in value):
+                return False
+        else:
+            condition = value if isinstance(value, dict) else {"$eq": value}
+            if key not in metadata:
+                return False
+            if not all(
+                _evaluate_operator(metadata[key], operator, operand)
+                for operator, operand in condition.items()
+            ):
+                return False
+    return True
+
+
+_COMPARATORS = {
+    "$eq": operators.eq,
+    "$ne": operators.ne,
+    "$gt": operators.gt,
+    "$gte": operators.ge,
+    "$lt": operators.lt,
+    "$lte": operators.le,
+}
+
+
+def _evaluate_operator(value: Any, operator: str, operand: Any) -> bool:
+    """Apply one field operator, comparing only values of compatible types."""
+    if operator in MEMBERSHIP_OPERATORS:
+        matched = any(_evaluate_operator(value, "$eq", item) for item in operand)
+        return matched if operator == "$in" else not matched
+
+    value_type = _comparable_type(value)
+    if value_type is None or value_type != _comparable_type(operand):
+        # Chroma stores each type in its own column, so mismatched types never match
+        return False
+    return _COMPARATORS[operator](value, operand)
+
+
+def _comparable_type(value: Any) -> Any:
+    """Group scalar types the way Chroma compares them (ints and floats together)."""
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "str"
+    return None
+
+
+class _FilterCompiler:
+    """Recursive compiler with a shared condition budget."""
+
+    def __init__(self, manifest: Dict[str, List[str]], reserved_keys: Set[str]):
+        self.manifest = manifest
+        self.reserved_keys = reserved_keys
+        self.condition_count = 0
+
+    def compile_expression(self, expression: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Compile an object whose entries are implicitly AND-ed."""
+        if not isinstance(expression, dict) or not expression:
+            raise MetadataFilterError("Filter expressions must be non-empty objects")
+
+        conditions = []
+        for key, value in expression.items():
+            if key in LOGICAL_OPERATORS:
+                conditions.append(self._compile_logical(key, value))
+            elif key.startswith("$"):
+                raise MetadataFilterError(f"Unsupported filter operator: {key}")
+            else:
+                conditions.extend(self._compile_field(key, value))
+        return conditions
+
+    def _compile_logical(self, operator: str, operands: Any) -> Dict[str, Any]:
+        """Compile an $and/$or list of sub-expressions."""
+        if not isinstance(operands, list) or not operands:
+            raise MetadataFilterError(f"{operator} requires a non-empty list of expressions")
+
+        compiled = []
+        for operand in operands:
+            compiled.append(_combine(self.compile_expression(operand)))
+
+        if len(compiled) == 1:
+            return compiled[0]
+        return {operator: compiled}
+
+    def _compile_field(self, key: str, condition: Any) -> List[Dict[str, Any]]:
+        """Compile the condition(s) attached to one metadata field."""
+        if key in self.reserved_keys or key.startswith("_"):
+            raise MetadataFilterError(f"Cannot filter on reserved metadata key: {key}")
+
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        if not condition:
+            raise MetadataFilterError(f"Empty condition for metadata key: {key}")
+
+        compiled = []
+        for operator, operand in condition.items():
+            self.condition_count += 1
+            if self.condition_count > MAX_FILTER_CONDITIONS:
+                raise MetadataFilterError(
+                    f"Filters may contain at most {MAX_FILTER_CONDITIONS} conditions"
+                )
+            compiled.append(self._compile_operator(key, operator, operand))
+        return compiled
+
+    def _compile_operator(self, key: str, operator: str, operand: Any) -> Dict[str, Any]:
+        """Compile and type-check a single field operator."""
+        stored_types = set(self.manifest.get(key, []))
+
+        if operator in MEMBERSHIP_OPERATORS:
+            if not isinstance(operand, list) or not operand:
+                raise MetadataFilterError(f"{operator} on '{key}' requires a non-empty list")
+            operand_types = {scalar_type_name(item) for item in operand}
+            if len(operand_types) > 1:
+                raise MetadataFilterError(f"{operator} on '{key}' requires values of a single type")
+            return {key: {operator: operand}}
+
+        if operator not in COMPARISON_OPERATORS:
+            raise MetadataFilterError(f"Unsupported filter operator: {operator}")
+
+        operand_type = scalar_type_name(operand)
+
+        if operator in RANGE_OPERATORS:
+            if operand_type not in NUMERIC_TYPES:
+                raise MetadataFilterError(f"{operator} on '{key}' requires a numeric value")
+            if stored_types and not stored_types & NUMERIC_TYPES:
+                raise MetadataFilterError(
+                    f"{operator} on '{key}' can never match: stored values are {sorted(stored_types)}"
+                )
+            return {key: {operator: operand}}
+
+        # Chroma matches $eq/$ne against the column of the operand's type only,
+        # so a numeric key holding both ints and floats needs both spellings
+        if (operand_type in NUMERIC_TYPES and stored_types >= NUMERIC_TYPES
+                and operand == int(operand)):
+            alternates = [{key: {operator: int(operand)}}, {key: {operator: float(operand)}}]
+            return {"$or" if operator == "$eq" else "$and": alternates}
+
+        return {key: {operator: operand}}
+
+
+def _combine(conditions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """AND together a list of conditions, unwrapping single entries."""
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
@@ -0,0 +1,185 @@
+"""In-memory overlay of accepted memories that the vector index has not stored yet."""
+
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, NamedTuple
+import numpy as np
+from ..utils.logger import get_logger
+from .metadata_filters import evaluate_filters
+from .vector_store import to_epoch_seconds
+
+logger = get_logger(__name__)
+
+
+class PendingMemory(NamedTuple):
+    """A new memory that has been accepted but not yet embedded and stored."""
+
+    memory_id: str
+    user_id: str
+    text: str
+    encrypted_text: str
+    tags: List[str]
+    metadata: Dict[str, Any]
+    timestamp: datetime
+    content_hash: Optional[str]
+
+
+class PendingOverlay:
+    """Per-user set of pending memories, searchable by brute force.
+
+    Memories are registered when they are accepted, gain an embedding
+    once the ingestion pipeline has encoded them, and are dropped when the
+    vector store acknowledges the write. Only memories with an embedding
+    are searchable. Each user's embeddings are kept as one matrix, rebuilt
+    lazily after changes, so a search is a single vectorized distance
+    computation over that user's (small) backlog.
+    """
+
+    def __init__(self):
+        """Initialize an empty overlay."""
+        self._lock = threading.Lock()
+        self._memories: Dict[str, PendingMemory] = {}
+        self._embeddings: Dict[str, Dict[str, np.ndarray]] = {}
+        self._matrices: Dict[str, Tuple[List[str], np.ndarray]] = {}
+
+    def register(self, memory: PendingMemory):
+        """Track an accepted memory."""
+        with self._lock:
+            self._memories[memory.memory_id] = memory
+
+    def attach_embeddings(self, memories: List[PendingMemory], embeddings: List[List[float]]):
+        """Make encoded memories searchable."""
+        with self._lock:
+            for memory, embedding in zip(memories, embeddings):
+                if memory.memory_id not in self._memories:
+                    continue
+                vectors = self._embeddings.setdefault(memory.user_id, {})
+                vectors[memory.memory_id] = np.asarray(embedding, dtype=np.float32)
+                self._matrices.pop(memory.user_id, None)
+
+    def acknowledge(self, memory_ids: List[str]):
+        """Drop memories the vector store has written (or given up on)."""
+        with self._lock:
+            for memory_id in memory_ids:
+                memory = self._memories.pop(memory_id, None)
+                if memory is None:
+                    continue
+                vectors = self._embeddings.get(memory.user_id)
+                if vectors and vectors.pop(memory_id, None) is not None:
+                    self._matrices.pop(memory.user_id, None)
+                    if not vectors:
+                        del self._embeddings[memory.user_id]
+
+    def get(self, memory_id: str) -> Optional[PendingMemory]:
+        """Get a pending memory by id."""
+        with self._lock:
+            return self._memories.get(memory_id)
+
+    def get_embeddings(self, memory_ids: List[str]) -> Dict[str, List[float]]:
+        """Get the embeddings of searchable pending memories."""
+        with self._lock:
+            embeddings = {}
+            for memory_id in memory_ids:
+                memory = self._memories.get(memory_id)
+                vector = self._embeddings.get(memory.user_id, {}).get(memory_id) if memory else None
+                if vector is not None:
+                    embeddings[memory_id] = vector.tolist()
+            return embeddings
+
+    def has_pending(self, user_id: str) -> bool:
+        """Check whether a user has searchable pending memories."""
+        return user_id in self._embeddings
+
+    def search(
+        self,
+        user_id: str,
+        query_embeddings: List[List[float]],
+        limit: int,
+        min_similarity: float = 0.5,
+        tag_filter: Optional[List[str]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[PendingMemory, float]]]:
+        """Find a user's pending memories similar to each query embedding.
+
+        Similarity uses the same squared-L2 mapping as the vector store so
+        pending and indexed results can be merged directly.
+        """
+        with self._lock:
+            matrix_entry = self._user_matrix(user_id)
+            if matrix_entry is None:
+                return [[] for _ in query_embeddings]
+            memory_ids, matrix = matrix_entry
+            memories = [self._memories[memory_id] for memory_id in memory_ids]
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        distances = (
+            np.sum(queries ** 2, axis=1, keepdims=True)
+            - 2 * queries @ matrix.T
+            + np.sum(matrix ** 2, axis=1)
+        )
+        similarities = 1.0 - np.minimum(np.maximum(distances, 0.0), 1.0)
+
+        eligible = [
+            self._matches(memory, tag_filter, since, until, metadata_filters)
+            for memory in memories
+        ]
+
+        results = []
+        for row in similarities:
+            hits = [
+                (memories[index], float(row[index]))
+                for index in np.argsort(-row, kind="stable")
+                if eligible[index] and row[index] >= min_similarity
+            ]
+            results.append(hits[:limit])
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get overlay size statistics."""
+        with self._lock:
+            return {
+                "pending": len(self._memories),
+                "searchable": sum(len(vectors) for vectors in self._embeddings.values()),
+                "users": len(self._embeddings)
+            }
+
+    def _user_matrix(self, user_id: str) -> Optional[Tuple[List[str], np.ndarray]]:
+        """Get (and cache) a user's stacked embeddings; the caller holds the lock."""
+        if user_id not in self._matrices:
+            vectors = self._embeddings.get(user_id)
+            if not vectors:
+                return None
+            memory_ids = list(vectors)
+            self._matrices[user_id] = (memory_ids, np.stack([vectors[i] for i in memory_ids]))
+        return self._matrices[user_id]
+
+    @staticmethod
+    def _matches(
+        memory: PendingMemory,
+        tag_filter: Optional[List[str]],
+        since: Optional[float],
+        until: Optional[float],
+        metadata_filters: Optional[Dict[str, Any]]
+    ) -> bool:
+        """Apply the search filters the vector store would apply."""
+        if tag_filter and not any(tag in memory.tags for tag in tag_filter):
+            return False
+
+        epoch = to_epoch_seconds(memory.timestamp)
+        if since is not None and epoch < since:
+            return False
+        if until is not None and epoch > until:
+            return False
+
+        if metadata_filters and not evaluate_filters(metadata_filters, memory.metadata):
+            return False
+        return True
+
+
+@lru_cache()
+def get_pending_overlay() -> PendingOverlay:
+    """Get the process-wide pending overlay."""
+    return PendingOverlay()
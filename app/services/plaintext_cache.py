@@ -0,0 +1,85 @@
+"""Cache of decrypted memory texts for frequently read memories."""
+
+import sys
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from ..utils.cache import LRUCache
+from ..config import get_settings
+
+# Trailing characters of a stored value; they encode its authentication tag
+_VERSION_CHARS = 24
+
+
+class PlaintextCache:
+    """LRU of decrypted texts, bounded by entry count, bytes and age.
+
+    Entries are keyed by memory id and remember the version of the stored
+    value they were decrypted from: its length and trailing characters,
+    which hold the authentication tag that every re-encryption changes. A
+    value rewritten since, by a format migration or key rotation, misses
+    instead of serving the old decryption. Deletes drop entries
+    explicitly, and entries older than ``ttl_s`` are discarded on lookup,
+    so plaintext does not outlive its use for long.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_s: float):
+        """Initialize an empty cache."""
+        self.ttl_s = ttl_s
+        self._texts = LRUCache(max_entries, max_bytes=max_bytes)
+        self._expired = 0
+        self._stale = 0
+
+    def get(self, memory_id: str, encrypted_text: str) -> Optional[str]:
+        """Get the decrypted text of ``encrypted_text``, if cached and fresh."""
+        entry = self._texts.get(memory_id)
+        if entry is None:
+            return None
+
+        version, text, expires_at = entry
+        if version != self.version(encrypted_text):
+            self._texts.pop(memory_id)
+            self._stale += 1
+            return None
+        if time.monotonic() >= expires_at:
+            self._texts.pop(memory_id)
+            self._expired += 1
+            return None
+
+        return text
+
+    def set(self, memory_id: str, encrypted_text: str, text: str):
+        """Cache the decrypted text of a stored value."""
+        self._texts.set(
+            memory_id,
+            (self.version(encrypted_text), text, time.monotonic() + self.ttl_s),
+            size=sys.getsizeof(text)
+        )
+
+    def invalidate(self, memory_id: str):
+        """Drop the cached text of a memory."""
+        self._texts.pop(memory_id)
+
+    def clear(self):
+        """Drop every cached text."""
+        self._texts.clear()
+
+    @staticmethod
+    def version(encrypted_text: str) -> Any:
+        """Identify a stored value without hashing or decrypting it."""
+        return len(encrypted_text), encrypted_text[-_VERSION_CHARS:]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {**self._texts.get_stats(), "ttl_s": self.ttl_s, "expired": self._expired, "stale": self._stale}
+
+
+@lru_cache()
+def get_plaintext_cache() -> PlaintextCache:
+    """Get the process-wide plaintext cache."""
+    settings = get_settings()
+    return PlaintextCache(
+        settings.plaintext_cache_max_entries,
+        settings.plaintext_cache_max_bytes,
+        settings.plaintext_cache_ttl_s
+    )
@@ -0,0 +1,704 @@
+"""Read-only vector store serving memory-mapped snapshots for search replicas."""
+
+import asyncio
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, Callable
+import numpy as np
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from ..utils.encryption import EncryptionService
+from ..utils.logger import get_logger
+from ..config import get_settings
+from .metadata_filters import compile_filters, evaluate_filters
+from .user_keys import UserKeyStore
+from .vector_store import (
+    RESERVED_METADATA_KEYS,
+    TIMESTAMP_EPOCH_KEY,
+    get_vector_store_executor,
+    to_epoch_seconds
+)
+
+logger = get_logger(__name__)
+
+SNAPSHOT_FORMAT = "memorylink-snapshot"
+SNAPSHOT_VERSION = 1
+
+# File in the snapshot root naming the snapshot replicas should serve
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+# Copy of the primary's wrapped per-user key table
+USER_KEYS_FILE = "user_keys.sqlite3"
+
+SearchHit = Tuple[str, float, str, Dict[str, Any]]
+
+
+class ReadOnlyReplicaError(ValueError):
+    """Raised when a write reaches a read-only replica."""
+
+
+class ReplicaSnapshot:
+    """One immutable snapshot, memory-mapped from disk.
+
+    Rows are sorted by user and then timestamp, so a user's memories (and
+    a time range within them) are one contiguous slice of the embedding
+    matrix. Only the pages of the users being searched are read, and
+    replicas on the same host share them through the page cache.
+    """
+
+    def __init__(self, directory: str):
+        """Map a snapshot directory."""
+        self.directory = directory
+        self.name = os.path.basename(directory.rstrip(os.sep))
+
+        with open(os.path.join(directory, MANIFEST_FILE), "r", encoding="utf-8") as handle:
+            self.manifest = json.load(handle)
+        if self.manifest.get("format") != SNAPSHOT_FORMAT or self.manifest.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot format in {directory}")
+
+        self.user_keys_path: Optional[str] = (
+            os.path.join(directory, USER_KEYS_FILE) if self.manifest.get("user_keys") else None
+        )
+        self.count: int = self.manifest["count"]
+        self.users: Dict[str, List[int]] = self.manifest["users"]
+        self.embeddings = self._load("embeddings.npy")
+        self.norms = self._load("norms.npy")
+        self.epochs = self._load("epochs.npy")
+        self.offsets = self._load("offsets.npy")
+        self.ids = self._load("ids.npy")
+        self.id_rows = self._load("id_rows.npy")
+
+        with open(os.path.join(directory, "records.jsonl"), "rb") as handle:
+            self._records = (
+                mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                if os.fstat(handle.fileno()).st_size else b""
+            )
+
+    def record(self, row: int) -> Tuple[str, str, Dict[str, Any]]:
+        """Get the id, encrypted text and metadata stored in a row."""
+        record = json.loads(self._records[int(self.offsets[row]):int(self.offsets[row + 1])])
+        return record["id"], record["text"], record["metadata"]
+
+    def row_of(self, memory_id: str) -> Optional[int]:
+        """Find the row of a memory id by binary search."""
+        if not self.count:
+            return None
+        key = memory_id.encode("utf-8")
+        position = int(np.searchsorted(self.ids, key))
+        if position < self.count and self.ids[position] == key:
+            return int(self.id_rows[position])
+        return None
+
+    def row_range(
+        self,
+        user_id: Optional[str],
+        since: Optional[float],
+        until: Optional[float]
+    ) -> Tuple[int, int]:
+        """Get the rows of a user, narrowed to a time range; without a user, every row."""
+        if user_id is None:
+            return 0, self.count
+        if user_id not in self.users:
+            return 0, 0
+
+        start, end = self.users[user_id]
+        epochs = self.epochs[start:end]
+        first = int(np.searchsorted(epochs, since, side="left")) if since is not None else 0
+        last = int(np.searchsorted(epochs, until, side="right")) if until is not None else end - start
+        return start + first, start + last
+
+    def search(
+        self,
+        query_embeddings: List[List[float]],
+        limit: int,
+        min_similarity: float,
+        user_filter: Optional[str],
+        tag_filter: Optional[List[str]],
+        since: Optional[float],
+        until: Optional[float],
+        metadata_filters: Optional[Dict[str, Any]]
+    ) -> List[List[SearchHit]]:
+        """Exact search of each query over the rows the filters allow."""
+        start, end = self.row_range(user_filter, since, until)
+        if start >= end:
+            return [[] for _ in query_embeddings]
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        matrix = self.embeddings[start:end]
+        distances = (
+            np.sum(queries ** 2, axis=1, keepdims=True)
+            - 2 * queries @ matrix.T
+            + self.norms[start:end]
+        )
+        similarities = 1.0 - np.minimum(np.maximum(distances, 0.0), 1.0)
+
+        # Without a user the time range could not narrow the slice
+        epochs = self.epochs[start:end] if user_filter is None else None
+        post_filtered = bool(tag_filter or metadata_filters or epochs is not None)
+
+        batch = []
+        for row in similarities:
+            if post_filtered or len(row) <= limit:
+                order = np.argsort(-row, kind="stable")
+            else:
+                top = np.argpartition(-row, limit - 1)[:limit]
+                order = top[np.argsort(-row[top], kind="stable")]
+
+            hits = []
+            for index in order:
+                similarity = float(row[index])
+                if similarity < min_similarity or len(hits) >= limit:
+                    break
+                if epochs is not None and not (
+                    (since is None or epochs[index] >= since) and (until is None or epochs[index] <= until)
+                ):
+                    continue
+
+                memory_id, text, metadata = self.record(start + int(index))
+                if tag_filter and not any(tag in metadata.get('tags', []) for tag in tag_filter):
+                    continue
+                if metadata_filters and not evaluate_filters(metadata_filters, metadata):
+                    continue
+                hits.append((memory_id, similarity, text, metadata))
+            batch.append(hits)
+
+        return batch
+
+    def _load(self, filename: str) -> np.ndarray:
+        """Memory-map one array of the snapshot."""
+        return np.load(os.path.join(self.directory, filename), mmap_mode="r")
+
+
+class ReplicaVectorStore:
+    """Vector store answering reads from the current published snapshot.
+
+    Writes raise ``ReadOnlyReplicaError``. ``refresh`` (or the ``watch``
+    loop) maps a newly published snapshot and swaps it in with a single
+    reference assignment; searches already running keep the snapshot they
+    started with.
+    """
+
+    def __init__(self, snapshot_root: Optional[str] = None):
+        """Initialize the replica store."""
+        self.settings = get_settings()
+        self.snapshot_root = snapshot_root or self.settings.snapshot_path
+        self._snapshot: Optional[ReplicaSnapshot] = None
+        self._swaps = 0
+
+    @property
+    def snapshot(self) -> ReplicaSnapshot:
+        """Get the snapshot currently being served."""
+        if self._snapshot is None:
+            raise ValueError(f"No snapshot has been published in {self.snapshot_root}")
+        return self._snapshot
+
+    async def initialize(self):
+        """Map the current snapshot if none is loaded yet."""
+        if self._snapshot is None:
+            await self.refresh()
+
+    async def refresh(self) -> bool:
+        """Swap in the current snapshot if it changed, returning whether it did."""
+        current_path = os.path.join(self.snapshot_root, CURRENT_FILE)
+        if not os.path.exists(current_path):
+            return False
+
+        with open(current_path, "r", encoding="utf-8") as handle:
+            name = handle.read().strip()
+        if self._snapshot is not None and self._snapshot.name == name:
+            return False
+
+        loop = asyncio.get_event_loop()
+        snapshot = await loop.run_in_executor(
+            get_vector_store_executor(),
+            ReplicaSnapshot,
+            os.path.join(self.snapshot_root, name)
+        )
+        self._snapshot = snapshot
+        self._swaps += 1
+        logger.info(f"Serving snapshot {name} with {snapshot.count} memories")
+        return True
+
+    async def watch(self, interval: float, on_swap: Optional[Callable[[], None]] = None):
+        """Poll for newly published snapshots until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await self.refresh() and on_swap:
+                    on_swap()
+            except Exception as e:
+                logger.error(f"Failed to load published snapshot: {str(e)}")
+
+    async def search_memories(
+        self,
+        query_embedding: List[float],
+        limit: int = 10,
+        **filters
+    ) -> List[SearchHit]:
+        """Search for similar memories."""
+        results = await self.search_memories_batch([query_embedding], limit=limit, **filters)
+        return results[0]
+
+    async def search_memories_batch(
+        self,
+        query_embeddings: List[List[float]],
+        limit: int = 10,
+        min_similarity: float = 0.5,
+        user_filter: Optional[str] = None,
+        tag_filter: Optional[List[str]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        include_documents: bool = True
+    ) -> List[List[SearchHit]]:
+        """Search the snapshot for memories similar to each query embedding.
+
+        Texts are read with the metadata of each hit, so they are always included.
+        """
+        await self.initialize()
+        snapshot = self.snapshot
+
+        try:
+            if metadata_filters:
+                # Validate exactly as the primary would
+                compile_filters(metadata_filters, self.get_type_manifest(), reserved_keys=RESERVED_METADATA_KEYS)
+
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                get_vector_store_executor(),
+                lambda: snapshot.search(
+                    query_embeddings, limit, min_similarity, user_filter,
+                    tag_filter, since, until, metadata_filters
+                )
+            )
+
+        except Exception as e:
+            logger.error(f"Failed to search memories: {str(e)}")
+            raise ValueError(f"Failed to search memories: {str(e)}")
+
+    async def get_memories_by_ids(
+        self,
+        memory_ids: List[str],
+        query_embedding: List[float],
+        min_similarity: float = 0.5,
+        user_filter: Optional[str] = None,
+        tag_filter: Optional[List[str]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        include_documents: bool = True
+    ) -> List[SearchHit]:
+        """Fetch specific memories under the same filters as a search."""
+        await self.initialize()
+        snapshot = self.snapshot
+        query = np.asarray(query_embedding, dtype=np.float32)
+
+        memories = []
+        for memory_id in memory_ids:
+            row = snapshot.row_of(memory_id)
+            if row is None:
+                continue
+            _, text, metadata = snapshot.record(row)
+            epoch = float(snapshot.epochs[row])
+            similarity = 1.0 - min(float(np.sum((snapshot.embeddings[row] - query) ** 2)), 1.0)
+
+            if similarity < min_similarity:
+                continue
+            if user_filter and metadata.get('user_id') != user_filter:
+                continue
+            if (since is not None and epoch < since) or (until is not None and epoch > until):
+                continue
+            if tag_filter and not any(tag in metadata.get('tags', []) for tag in tag_filter):
+                continue
+            if metadata_filters and not evaluate_filters(metadata_filters, metadata):
+                continue
+            memories.append((memory_id, similarity, text, metadata))
+        return memories
+
+    async def get_embeddings(self, memory_ids: List[str]) -> Dict[str, List[float]]:
+        """Get the stored embeddings for a set of memories."""
+        await self.initialize()
+        snapshot = self.snapshot
+
+        embeddings = {}
+        for memory_id in memory_ids:
+            row = snapshot.row_of(memory_id)
+            if row is not None:
+                embeddings[memory_id] = snapshot.embeddings[row].tolist()
+        return embeddings
+
+    async def iter_memories(
+        self,
+        batch_size: int = 1000,
+        user_filter: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None
+    ) -> AsyncIterator[Tuple[List[str], List[str], List[Dict[str, Any]], np.ndarray]]:
+        """Page through snapshot memories, optionally for one user and time range."""
+        await self.initialize()
+        snapshot = self.snapshot
+
+        user_ids = [user_filter] if user_filter is not None else list(snapshot.users)
+        for user_id in user_ids:
+            start, end = snapshot.row_range(user_id, since, until)
+            for page_start in range(start, end, batch_size):
+                rows = range(page_start, min(page_start + batch_size, end))
+                records = [snapshot.record(row) for row in rows]
+                yield (
+                    [memory_id for memory_id, _, _ in records],
+                    [text for _, text, _ in records],
+                    [metadata for _, _, metadata in records],
+                    np.asarray(snapshot.embeddings[rows.start:rows.stop])
+                )
+
+    async def iter_records(self, *args, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """Replicas build no derived indexes, so there are no raw rows to page through."""
+        for page in ():
+            yield page
+
+    async def get_memory(
+        self,
+        memory_id: str,
+        include_document: bool = True
+    ) -> Optional[Tuple[Optional[str], Dict[str, Any]]]:
+        """Get a specific memory by ID; the document is ``None`` unless included."""
+        await self.initialize()
+        snapshot = self.snapshot
+
+        row = snapshot.row_of(memory_id)
+        if row is None:
+            return None
+        _, text, metadata = snapshot.record(row)
+        return (text if include_document else None), metadata
+
+    async def get_documents(self, memory_ids: List[str]) -> Dict[str, str]:
+        """Get the stored documents of a set of memories."""
+        await self.initialize()
+        snapshot = self.snapshot
+
+        documents = {}
+        for memory_id in memory_ids:
+            row = snapshot.row_of(memory_id)
+            if row is not None:
+                documents[memory_id] = snapshot.record(row)[1]
+        return documents
+
+    async def list_memories(
+        self,
+        user_filter: str,
+        limit: int = 50,
+        offset: int = 0,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        include_documents: bool = True
+    ) -> List[Tuple[str, Optional[str], Dict[str, Any]]]:
+        """List a user's memories newest first, straight from their time-sorted rows."""
+        await self.initialize()
+        snapshot = self.snapshot
+
+        start, end = snapshot.row_range(user_filter, since, until)
+        rows = range(end - 1 - offset, max(start, end - offset - limit) - 1, -1)
+        memories = []
+        for row in rows:
+            memory_id, text, metadata = snapshot.record(row)
+            memories.append((memory_id, text if include_documents else None, metadata))
+        return memories
+
+    async def add_memory(self, *args, **kwargs) -> bool:
+        """Reject writes."""
+        raise ReadOnlyReplicaError("Vector store is a read-only replica")
+
+    async def add_memories(self, *args, **kwargs) -> int:
+        """Reject writes."""
+        raise ReadOnlyReplicaError("Vector store is a read-only replica")
+
+    async def update_metadata(self, *args, **kwargs) -> bool:
+        """Reject writes."""
+        raise ReadOnlyReplicaError("Vector store is a read-only replica")
+
+    async def update_metadata_many(self, *args, **kwargs) -> int:
+        """Reject writes."""
+        raise ReadOnlyReplicaError("Vector store is a read-only replica")
+
+    async def delete_memory(self, *args, **kwargs) -> bool:
+        """Reject writes."""
+        raise ReadOnlyReplicaError("Vector store is a read-only replica")
+
+    async def delete_memories(self, *args, **kwargs) -> int:
+        """Reject writes."""
+        raise ReadOnlyReplicaError("Vector store is a read-only replica")
+
+    async def replace_documents(self, *args, **kwargs) -> int:
+        """Reject writes."""
+        raise ReadOnlyReplicaError("Vector store is a read-only replica")
+
+    async def backfill_timestamp_epoch(self, batch_size: int = 500) -> int:
+        """Snapshots always carry numeric timestamps."""
+        return 0
+
+    async def backfill_metadata_types(self, batch_size: int = 500) -> int:
+        """Snapshots copy the primary's already restored metadata."""
+        return 0
+
+    async def get_collection_stats(self) -> Dict[str, Any]:
+        """Get statistics about the served snapshot."""
+        await self.initialize()
+        snapshot = self._snapshot
+
+        return {
+            "total_memories": snapshot.count if snapshot else 0,
+            "collection_name": self.settings.chroma_collection_name,
+            "embedding_dimension": self.settings.embedding_dimension,
+            "snapshot": snapshot.name if snapshot else None,
+            "snapshot_created_at": snapshot.manifest.get("created_at") if snapshot else None,
+            "snapshot_swaps": self._swaps
+        }
+
+    def get_type_manifest(self) -> Dict[str, List[str]]:
+        """Get the metadata type manifest captured with the snapshot."""
+        return self._snapshot.manifest.get("type_manifest", {}) if self._snapshot else {}
+
+
+class SnapshotUserKeys:
+    """Per-user data keys read from the key table shipped with the current snapshot.
+
+    Replicas cannot share the primary's key table, so each snapshot carries
+    a copy of it, still wrapped under the master key, and memories written
+    under a user key decrypt as of that snapshot. A key destroyed on the
+    primary disappears from replicas with the next published snapshot.
+    """
+
+    def __init__(self, replica: ReplicaVectorStore, keyring: EncryptionService, cache_entries: int = 10000):
+        """Initialize the key source for a replica store."""
+        self.replica = replica
+        self.keyring = keyring
+        self.cache_entries = cache_entries
+        self._store: Optional[UserKeyStore] = None
+        self._snapshot_name: Optional[str] = None
+
+    def _current(self) -> Optional[UserKeyStore]:
+        """Get the key table of the snapshot being served, reopening it after a swap."""
+        snapshot = self.replica._snapshot
+        if snapshot is None or snapshot.user_keys_path is None:
+            return None
+        if snapshot.name != self._snapshot_name:
+            self._store = UserKeyStore(
+                snapshot.user_keys_path, self.keyring, self.cache_entries, read_only=True
+            )
+            self._snapshot_name = snapshot.name
+        return self._store
+
+    def for_user(self, user_id: str) -> Tuple[bytes, AESGCM]:
+        """Reject creating keys."""
+        raise ReadOnlyReplicaError("User keys are read-only on a replica")
+
+    def get(self, key_id: bytes) -> Optional[AESGCM]:
+        """Get the cipher for a data key id from the current snapshot."""
+        store = self._current()
+        return store.get(key_id) if store else None
+
+    def destroy(self, user_id: str) -> bool:
+        """Reject destroying keys."""
+        raise ReadOnlyReplicaError("User keys are read-only on a replica")
+
+    def rewrap(self) -> int:
+        """Snapshot key tables are rewrapped on the primary."""
+        return 0
+
+    def count(self) -> int:
+        """Count the keys in the current snapshot."""
+        store = self._current()
+        return store.count() if store else 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get key table statistics."""
+        store = self._current()
+        return {**(store.get_stats() if store else {"keys": 0}), "snapshot": self._snapshot_name}
+
+
+async def publish_snapshot(
+    vector_store,
+    snapshot_root: Optional[str] = None,
+    user_keys: Optional[UserKeyStore] = None
+) -> Dict[str, Any]:
+    """Write a snapshot of a primary's vector store and make it current for replicas.
+
+    Rows are first spooled to temporary files in store order, then written
+    sorted by user and timestamp. The snapshot directory is completed under
+    a temporary name and renamed, and ``CURRENT`` is replaced atomically, so
+    replicas never see a partial snapshot. With ``user_keys``, a copy of
+    the wrapped key table is included so replicas can decrypt memories
+    written under per-user keys.
+    """
+    settings = get_settings()
+    snapshot_root = snapshot_root or settings.snapshot_path
+    os.makedirs(snapshot_root, exist_ok=True)
+    start_time = time.time()
+
+    name = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    staging = tempfile.mkdtemp(prefix=f".{name}-", dir=snapshot_root)
+    dimension = settings.embedding_dimension
+
+    try:
+        memory_ids: List[str] = []
+        user_ids: List[str] = []
+        epochs: List[float] = []
+        record_offsets: List[int] = [0]
+
+        # Pass 1: spool rows in store order
+        raw_embeddings_path = os.path.join(staging, "embeddings.raw")
+        raw_records_path = os.path.join(staging, "records.raw")
+        with open(raw_embeddings_path, "wb") as raw_embeddings, open(raw_records_path, "wb") as raw_records:
+            async for page_ids, texts, metadatas, embeddings in vector_store.iter_memories(
+                batch_size=settings.archive_chunk_size
+            ):
+                raw_embeddings.write(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+                for memory_id, text, metadata in zip(page_ids, texts, metadatas):
+                    line = json.dumps({"id": memory_id, "text": text, "metadata": metadata}, default=str).encode("utf-8")
+                    raw_records.write(line + b"\n")
+                    record_offsets.append(record_offsets[-1] + len(line) + 1)
+                    memory_ids.append(memory_id)
+                    user_ids.append(metadata.get('user_id', ''))
+                    epochs.append(_epoch_of(metadata))
+
+        loop = asyncio.get_event_loop()
+        manifest = await loop.run_in_executor(
+            None,
+            _write_sorted_snapshot,
+            staging, memory_ids, user_ids, epochs, record_offsets, dimension
+        )
+        if user_keys is not None:
+            await loop.run_in_executor(None, user_keys.backup, os.path.join(staging, USER_KEYS_FILE))
+
+        manifest.update({
+            "created_at": datetime.utcnow().isoformat(),
+            "embedding_model": settings.embedding_model,
+            "embedding_dimension": dimension,
+            "type_manifest": vector_store.get_type_manifest(),
+            "user_keys": user_keys is not None
+        })
+        with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as handle:
+            json.dump(manifest, handle)
+
+        os.remove(raw_embeddings_path)
+        os.remove(raw_records_path)
+        os.rename(staging, os.path.join(snapshot_root, name))
+
+    except Exception as e:
+        shutil.rmtree(staging, ignore_errors=True)
+        logger.error(f"Failed to publish snapshot: {str(e)}")
+        raise ValueError(f"Failed to publish snapshot: {str(e)}")
+
+    current_temp = os.path.join(snapshot_root, f"{CURRENT_FILE}.tmp")
+    with open(current_temp, "w", encoding="utf-8") as handle:
+        handle.write(name)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(current_temp, os.path.join(snapshot_root, CURRENT_FILE))
+
+    _prune_snapshots(snapshot_root, keep=settings.snapshot_retention)
+    logger.info(f"Published snapshot {name} with {len(memory_ids)} memories")
+
+    return {
+        "snapshot": name,
+        "memories": len(memory_ids),
+        "elapsed_ms": round((time.time() - start_time) * 1000, 2)
+    }
+
+
+def _epoch_of(metadata: Dict[str, Any]) -> float:
+    """Get a memory's numeric timestamp."""
+    if TIMESTAMP_EPOCH_KEY in metadata:
+        return float(metadata[TIMESTAMP_EPOCH_KEY])
+    if metadata.get('timestamp'):
+        return to_epoch_seconds(datetime.fromisoformat(metadata['timestamp']))
+    return 0.0
+
+
+def _write_sorted_snapshot(
+    staging: str,
+    memory_ids: List[str],
+    user_ids: List[str],
+    epochs: List[float],
+    record_offsets: List[int],
+    dimension: int
+) -> Dict[str, Any]:
+    """Write the spooled rows sorted by user and time (runs in a worker thread)."""
+    count = len(memory_ids)
+    user_names, user_codes = np.unique(np.array(user_ids, dtype=object).astype(str), return_inverse=True)
+    epoch_array = np.asarray(epochs, dtype=np.float64)
+    order = np.lexsort((epoch_array, user_codes)) if count else np.zeros(0, dtype=np.int64)
+
+    source = (
+        np.memmap(os.path.join(staging, "embeddings.raw"), dtype=np.float32, mode="r", shape=(count, dimension))
+        if count else np.zeros((0, dimension), dtype=np.float32)
+    )
+    embeddings = np.lib.format.open_memmap(
+        os.path.join(staging, "embeddings.npy"), mode="w+", dtype=np.float32, shape=(count, dimension)
+    )
+    norms = np.empty(count, dtype=np.float32)
+    block = 65536
+    for start in range(0, count, block):
+        rows = source[order[start:start + block]]
+        embeddings[start:start + len(rows)] = rows
+        norms[start:start + len(rows)] = np.sum(rows ** 2, axis=1)
+    embeddings.flush()
+    del embeddings
+
+    offsets = np.empty(count + 1, dtype=np.int64)
+    offsets[0] = 0
+    with open(os.path.join(staging, "records.raw"), "rb") as raw, \
+            open(os.path.join(staging, "records.jsonl"), "wb") as records:
+        for position, row in enumerate(order):
+            raw.seek(record_offsets[row])
+            line = raw.read(record_offsets[row + 1] - record_offsets[row])
+            records.write(line)
+            offsets[position + 1] = offsets[position] + len(line)
+
+    sorted_ids = np.array(memory_ids, dtype=object)[order].astype(str).astype(np.bytes_) if count \
+        else np.zeros(0, dtype="S1")
+    id_order = np.argsort(sorted_ids, kind="stable")
+
+    np.save(os.path.join(staging, "norms.npy"), norms)
+    np.save(os.path.join(staging, "epochs.npy"), epoch_array[order])
+    np.save(os.path.join(staging, "offsets.npy"), offsets)
+    np.save(os.path.join(staging, "ids.npy"), sorted_ids[id_order])
+    np.save(os.path.join(staging, "id_rows.npy"), id_order.astype(np.int64))
+
+    sorted_codes = user_codes[order]
+    users = {}
+    for code, user_id in enumerate(user_names):
+        start = int(np.searchsorted(sorted_codes, code, side="left"))
+        end = int(np.searchsorted(sorted_codes, code, side="right"))
+        users[str(user_id)] = [start, end]
+
+    return {"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION, "count": count, "users": users}
+
+
+def _prune_snapshots(snapshot_root: str, keep: int):
+    """Delete all but the newest ``keep`` snapshots; replicas keep open mappings valid."""
+    snapshots = sorted(
+        entry for entry in os.listdir(snapshot_root)
+        if not entry.startswith(".") and os.path.isdir(os.path.join(snapshot_root, entry))
+    )
+    for name in snapshots[:-keep] if keep > 0 else []:
+        shutil.rmtree(os.path.join(snapshot_root, name), ignore_errors=True)
+
+
+@lru_cache()
+def get_replica_vector_store() -> ReplicaVectorStore:
+    """Get the process-wide replica vector store."""
+    return ReplicaVectorStore()
+
+
+@lru_cache()
+def get_replica_user_keys() -> SnapshotUserKeys:
+    """Get the process-wide user keys of the served snapshot."""
+    settings = get_settings()
+    keyring = EncryptionService(settings.encryption_key, previous_keys=settings.encryption_previous_keys)
+    return SnapshotUserKeys(get_replica_vector_store(), keyring, settings.user_key_cache_entries)
@@ -0,0 +1,208 @@
+"""Re-ranking stages applied to search candidates."""
+
+import asyncio
+import hashlib
+import time
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from ..utils.cache import LRUCache
+from ..utils.logger import get_logger
+from ..config import get_settings
+from .embedding_service import get_embedding_executor
+
+logger = get_logger(__name__)
+
+# Queries remembered per memory in the cross-encoder score cache
+MAX_CACHED_QUERIES_PER_MEMORY = 32
+
+# Weight of the newest batch in the per-pair latency estimate
+_LATENCY_SMOOTHING = 0.3
+
+
+def maximal_marginal_relevance(
+    candidate_embeddings: List[List[float]],
+    relevance: List[float],
+    k: int,
+    diversity: float
+) -> List[int]:
+    """Select ``k`` candidate indices balancing relevance against redundancy.
+
+    Each step picks the candidate maximising
+    ``(1 - diversity) * relevance - diversity * max_sim_to_selected``.
+    All pairwise cosine similarities come from a single matrix product, and
+    the running max-similarity vector is updated in place, so selection is
+    O(n^2) vector work with no Python-level pairwise loop.
+    """
+    count = len(candidate_embeddings)
+    if count == 0 or k <= 0:
+        return []
+    if k >= count and diversity <= 0:
+        return list(range(count))
+
+    vectors = np.asarray(candidate_embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1.0, norms)
+    pairwise = vectors @ vectors.T
+
+    scores = np.asarray(relevance, dtype=np.float32)
+    weight = 1.0 - diversity
+
+    selected = [int(np.argmax(scores))]
+    max_similarity = pairwise[selected[0]].copy()
+    available = np.ones(count, dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < min(k, count):
+        marginal = weight * scores - diversity * max_similarity
+        marginal[~available] = -np.inf
+        choice = int(np.argmax(marginal))
+        selected.append(choice)
+        available[choice] = False
+        np.maximum(max_similarity, pairwise[choice], out=max_similarity)
+
+    return selected
+
+
+class CrossEncoderReranker:
+    """Second-stage re-scoring of search candidates with a cross-encoder.
+    
+    Scores are cached per (query hash, memory id). The cache is keyed by
+    memory id first, so invalidating a changed memory is a single pop.
+    """
+    
+    def __init__(self, model_name: str, batch_size: int, cache_size: int):
+        """Initialize the reranker; the model is loaded lazily."""
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._load_task: Optional[asyncio.Task] = None
+        self._scores = LRUCache(cache_size)
+        self._per_pair_ms: Optional[float] = None
+        self._skipped = 0
+    
+    async def score(
+        self,
+        query: str,
+        candidates: List[Tuple[str, str]],
+        budget_ms: Optional[float] = None
+    ) -> Optional[List[float]]:
+        """Score ``(memory_id, text)`` candidates against a query.
+        
+        Returns ``None`` when the stage is skipped because the latency
+        budget would be exceeded (including while the model is loading).
+        """
+        query_hash = hashlib.sha256(query.encode('utf-8')).hexdigest()
+        
+        scores: List[Optional[float]] = []
+        uncached = []
+        for index, (memory_id, text) in enumerate(candidates):
+            cached = (self._scores.get(memory_id) or {}).get(query_hash)
+            scores.append(cached)
+            if cached is None:
+                uncached.append(index)
+        
+        if uncached:
+            if not await self._ensure_model_loaded(wait=budget_ms is None):
+                self._skipped += 1
+                return None
+            
+            if budget_ms is not None and self._per_pair_ms is not None:
+                estimate_ms = self._per_pair_ms * len(uncached)
+                if estimate_ms > budget_ms:
+                    logger.debug(
+                        f"Skipping rerank: estimated {estimate_ms:.1f}ms exceeds budget {budget_ms:.1f}ms"
+                    )
+                    self._skipped += 1
+                    return None
+            
+            pairs = [(query, candidates[index][1]) for index in uncached]
+            fresh_scores = await self._predict(pairs)
+            
+            for index, value in zip(uncached, fresh_scores):
+                scores[index] = value
+                self._remember(candidates[index][0], query_hash, value)
+        
+        return scores
+    
+    def invalidate(self, memory_id: str):
+        """Drop cached scores for a memory whose content changed or was deleted."""
+        self._scores.pop(memory_id)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache and latency statistics for the stage."""
+        return {
+            "model": self.model_name,
+            "model_loaded": self._model is not None,
+            "per_pair_ms": round(self._per_pair_ms, 3) if self._per_pair_ms is not None else None,
+            "skipped": self._skipped,
+            "score_cache": self._scores.get_stats()
+        }
+    
+    def _remember(self, memory_id: str, query_hash: str, value: float):
+        """Cache a score, keeping only the most recent queries per memory."""
+        per_memory = dict(self._scores.peek(memory_id) or {})
+        per_memory[query_hash] = value
+        while len(per_memory) > MAX_CACHED_QUERIES_PER_MEMORY:
+            per_memory.pop(next(iter(per_memory)))
+        self._scores.set(memory_id, per_memory)
+    
+    async def _ensure_model_loaded(self, wait: bool) -> bool:
+        """Load the model, or start loading it in the background if not waiting."""
+        if self._model is not None:
+            return True
+        
+        if self._load_task is None or (self._load_task.done() and self._model is None):
+            self._load_task = asyncio.create_task(self._load_model())
+        
+        if not wait:
+            return False
+        
+        await self._load_task
+        return self._model is not None
+    
+    async def _load_model(self):
+        """Load the cross-encoder on the embedding executor."""
+        from sentence_transformers import CrossEncoder
+        
+        logger.info(f"Loading cross-encoder model: {self.model_name}")
+        loop = asyncio.get_event_loop()
+        try:
+            self._model = await loop.run_in_executor(
+                get_embedding_executor(),
+                CrossEncoder,
+                self.model_name
+            )
+            logger.info("Cross-encoder model loaded successfully")
+        except Exception as e:
+            logger.error(f"Failed to load cross-encoder model: {str(e)}")
+    
+    async def _predict(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        """Run batched inference on the embedding executor and track latency."""
+        loop = asyncio.get_event_loop()
+        start_time = time.perf_counter()
+        
+        raw_scores = await loop.run_in_executor(
+            get_embedding_executor(),
+            lambda: self._model.predict(pairs, batch_size=self.batch_size)
+        )
+        
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        per_pair = elapsed_ms / len(pairs)
+        if self._per_pair_ms is None:
+            self._per_pair_ms = per_pair
+        else:
+            self._per_pair_ms += _LATENCY_SMOOTHING * (per_pair - self._per_pair_ms)
+        
+        return [float(value) for value in np.asarray(raw_scores).reshape(-1)]
+
+
+@lru_cache()
+def get_cross_encoder_reranker() -> CrossEncoderReranker:
+    """Get the process-wide cross-encoder reranker."""
+    settings = get_settings()
+    return CrossEncoderReranker(
+        settings.cross_encoder_model,
+        settings.rerank_batch_size,
+        settings.rerank_cache_size
+    )
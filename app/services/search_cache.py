@@ -0,0 +1,125 @@
+"""Cache of search results invalidated by per-user write generations."""
+
+import json
+import sys
+import threading
+import time
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Hashable
+from ..models.memory_models import SearchMemoryRequest, MemorySearchResult
+from ..utils.cache import LRUCache
+from ..utils.logger import get_logger
+from ..config import get_settings
+
+logger = get_logger(__name__)
+
+# Rough per-result overhead of the pydantic model and its containers
+_RESULT_OVERHEAD_BYTES = 512
+
+
+class SearchResultCache:
+    """LRU cache of final search results, bounded by entry count and bytes.
+    
+    Every user has a write generation that is bumped whenever one of their
+    memories is added, changed or deleted. Entries remember the generation
+    they were computed under and are discarded once it moves on, so a
+    search never returns results older than the user's last write.
+    Generations are per process, so entries also expire after ``ttl_s``,
+    bounding how long decrypted results outlive writes made elsewhere.
+    """
+    
+    def __init__(self, max_entries: int, max_bytes: int, ttl_s: float = 300.0):
+        """Initialize an empty cache."""
+        self.ttl_s = ttl_s
+        self._results = LRUCache(max_entries, max_bytes=max_bytes)
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stale = 0
+        self._expired = 0
+    
+    def generation(self, user_id: str) -> int:
+        """Get a user's current write generation."""
+        with self._lock:
+            return self._generations.get(user_id, 0)
+    
+    def bump(self, user_id: str):
+        """Invalidate every cached search of a user."""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+    
+    def get(self, request: SearchMemoryRequest, generation: int) -> Optional[List[MemorySearchResult]]:
+        """Get cached results computed under ``generation``, if any."""
+        key = self.make_key(request)
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        
+        entry_generation, results, expires_at = entry
+        if entry_generation != generation:
+            self._results.pop(key)
+            self._stale += 1
+            return None
+        if time.monotonic() >= expires_at:
+            self._results.pop(key)
+            self._expired += 1
+            return None
+        
+        return list(results)
+    
+    def set(self, request: SearchMemoryRequest, generation: int, results: List[MemorySearchResult]):
+        """Cache results computed under ``generation``.
+        
+        The generation must be read before the search starts, so a write
+        that lands mid-search leaves the entry already stale.
+        """
+        if generation != self.generation(request.user_id):
+            return
+        
+        self._results.set(
+            self.make_key(request),
+            (generation, tuple(results), time.monotonic() + self.ttl_s),
+            size=self._estimate_size(results)
+        )
+    
+    def clear(self):
+        """Remove every cached search."""
+        self._results.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        return {**self._results.get_stats(), "ttl_s": self.ttl_s, "stale": self._stale, "expired": self._expired}
+    
+    @staticmethod
+    def make_key(request: SearchMemoryRequest) -> Hashable:
+        """Build the cache key of a search request."""
+        options = request.dict(exclude={"user_id", "query", "limit", "min_similarity", "tags"})
+        return (
+            request.user_id,
+            " ".join(request.query.split()),
+            request.limit,
+            request.min_similarity,
+            tuple(sorted(set(request.tags))) if request.tags else None,
+            json.dumps(options, sort_keys=True, default=str)
+        )
+    
+    @staticmethod
+    def _estimate_size(results: List[MemorySearchResult]) -> int:
+        """Estimate the memory held by a list of results."""
+        return sum(
+            sys.getsizeof(result.text)
+            + len(json.dumps(result.metadata or {}, default=str))
+            + sum(sys.getsizeof(tag) for tag in result.tags or ())
+            + _RESULT_OVERHEAD_BYTES
+            for result in results
+        )
+
+
+@lru_cache()
+def get_search_result_cache() -> SearchResultCache:
+    """Get the process-wide search result cache."""
+    settings = get_settings()
+    return SearchResultCache(
+        settings.search_cache_max_entries,
+        settings.search_cache_max_bytes,
+        settings.search_cache_ttl_s
+    )
@@ -0,0 +1,401 @@
+"""Vector store spreading memories across several local Chroma shards."""
+
+import asyncio
+import hashlib
+import json
+import os
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, Union
+import numpy as np
+from ..utils.logger import get_logger
+from ..config import get_settings
+from .vector_store import VectorStore, TIMESTAMP_EPOCH_KEY
+from .replica_store import get_replica_vector_store
+
+logger = get_logger(__name__)
+
+# File in the Chroma root recording how many shards the data is spread over
+SHARD_LAYOUT_FILE = "shards.json"
+
+SearchHit = Tuple[str, float, str, Dict[str, Any]]
+
+
+def merge_top_k(result_lists: List[List[SearchHit]], limit: int) -> List[SearchHit]:
+    """Merge per-shard results into the overall top ``limit`` by similarity."""
+    hits = [hit for results in result_lists for hit in results]
+    if not hits:
+        return []
+
+    similarities = np.fromiter((hit[1] for hit in hits), dtype=np.float64, count=len(hits))
+    if len(hits) > limit:
+        top = np.argpartition(-similarities, limit - 1)[:limit]
+    else:
+        top = np.arange(len(hits))
+    order = top[np.argsort(-similarities[top], kind="stable")]
+
+    return [hits[index] for index in order]
+
+
+class ShardedVectorStore:
+    """Vector store that partitions memories over N shards by id hash.
+
+    Each shard is an independent ``VectorStore`` with its own persist
+    directory and HNSW graph. Writes go to the shard owning the id; searches
+    fan out to every shard concurrently on the vector store executor and
+    the per-shard top-k lists are merged. All shards share one metadata
+    type manifest so filters compile the same way everywhere.
+    """
+
+    def __init__(self, shard_count: Optional[int] = None):
+        """Initialize the sharded store."""
+        self.settings = get_settings()
+        self.shard_count = shard_count or self.settings.vector_store_shards
+        self.root_directory = self.settings.chroma_db_path
+        self.shards = [
+            VectorStore(
+                persist_directory=os.path.join(self.root_directory, f"shard-{index}"),
+                manifest_scope=self.root_directory
+            )
+            for index in range(self.shard_count)
+        ]
+        self._initialized = False
+
+    async def initialize(self):
+        """Initialize every shard after checking the on-disk shard layout."""
+        if self._initialized:
+            return
+
+        self._check_layout()
+        await asyncio.gather(*(shard.initialize() for shard in self.shards))
+        self._initialized = True
+
+    def shard_index(self, memory_id: str) -> int:
+        """Get the shard owning a memory id (stable across processes)."""
+        digest = hashlib.sha1(memory_id.encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], "big") % self.shard_count
+
+    def shard_for(self, memory_id: str) -> VectorStore:
+        """Get the shard store owning a memory id."""
+        return self.shards[self.shard_index(memory_id)]
+
+    async def add_memory(
+        self,
+        memory_id: str,
+        embedding: List[float],
+        text: str,
+        metadata: Dict[str, Any]
+    ) -> bool:
+        """Add a memory to the shard owning its id."""
+        await self.initialize()
+        return await self.shard_for(memory_id).add_memory(memory_id, embedding, text, metadata)
+
+    async def add_memories(
+        self,
+        memory_ids: List[str],
+        embeddings: List[List[float]],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> int:
+        """Write a batch of memories, one concurrent bulk write per shard."""
+        await self.initialize()
+
+        grouped: Dict[int, List[int]] = {}
+        for position, memory_id in enumerate(memory_ids):
+            grouped.setdefault(self.shard_index(memory_id), []).append(position)
+
+        written = await asyncio.gather(*(
+            self.shards[index].add_memories(
+                [memory_ids[position] for position in positions],
+                [embeddings[position] for position in positions],
+                [texts[position] for position in positions],
+                [metadatas[position] for position in positions]
+            )
+            for index, positions in grouped.items()
+        ))
+        return sum(written)
+
+    async def search_memories(
+        self,
+        query_embedding: List[float],
+        limit: int = 10,
+        **filters
+    ) -> List[SearchHit]:
+        """Search every shard for similar memories."""
+        results = await self.search_memories_batch([query_embedding], limit=limit, **filters)
+        return results[0]
+
+    async def search_memories_batch(
+        self,
+        query_embeddings: List[List[float]],
+        limit: int = 10,
+        **filters
+    ) -> List[List[SearchHit]]:
+        """Search every shard concurrently and merge the per-query top-k."""
+        await self.initialize()
+
+        shard_results = await asyncio.gather(*(
+            shard.search_memories_batch(query_embeddings, limit=limit, **filters)
+            for shard in self.shards
+        ))
+
+        return [
+            merge_top_k([results[query_index] for results in shard_results], limit)
+            for query_index in range(len(query_embeddings))
+        ]
+
+    async def get_memories_by_ids(
+        self,
+        memory_ids: List[str],
+        query_embedding: List[float],
+        **filters
+    ) -> List[SearchHit]:
+        """Fetch specific memories from their shards under search filters."""
+        await self.initialize()
+
+        grouped = self._group_by_shard(memory_ids)
+        shard_results = await asyncio.gather(*(
+            self.shards[index].get_memories_by_ids(ids, query_embedding, **filters)
+            for index, ids in grouped.items()
+        ))
+        return [hit for results in shard_results for hit in results]
+
+    async def get_embeddings(self, memory_ids: List[str]) -> Dict[str, List[float]]:
+        """Get the stored embeddings for a set of memories."""
+        await self.initialize()
+
+        grouped = self._group_by_shard(memory_ids)
+        shard_results = await asyncio.gather(*(
+            self.shards[index].get_embeddings(ids) for index, ids in grouped.items()
+        ))
+
+        embeddings = {}
+        for results in shard_results:
+            embeddings.update(results)
+        return embeddings
+
+    async def iter_records(
+        self,
+        batch_size: int = 500,
+        where: Optional[Dict[str, Any]] = None,
+        include: Optional[List[str]] = None,
+        offset: int = 0
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Page through the rows of every shard in turn, starting ``offset`` rows in."""
+        await self.initialize()
+
+        for shard in self.shards:
+            if offset:
+                # Skip whole shards without reading them
+                count = (await shard.get_collection_stats()).get('total_memories', 0)
+                if offset >= count:
+                    offset -= count
+                    continue
+            async for page in shard.iter_records(batch_size=batch_size, where=where, include=include, offset=offset):
+                offset = 0
+                yield page
+            offset = 0
+
+    async def iter_memories(
+        self,
+        batch_size: int = 1000,
+        **filters
+    ) -> AsyncIterator[Tuple[List[str], List[str], List[Dict[str, Any]], np.ndarray]]:
+        """Page through the memories of every shard in turn."""
+        await self.initialize()
+
+        for shard in self.shards:
+            async for page in shard.iter_memories(batch_size=batch_size, **filters):
+                yield page
+
+    async def get_memory(
+        self,
+        memory_id: str,
+        include_document: bool = True
+    ) -> Optional[Tuple[Optional[str], Dict[str, Any]]]:
+        """Get a specific memory by ID."""
+        await self.initialize()
+        return await self.shard_for(memory_id).get_memory(memory_id, include_document)
+
+    async def get_documents(self, memory_ids: List[str]) -> Dict[str, str]:
+        """Get stored documents from their shards."""
+        await self.initialize()
+
+        grouped = self._group_by_shard(memory_ids)
+        shard_results = await asyncio.gather(*(
+            self.shards[index].get_documents(ids) for index, ids in grouped.items()
+        ))
+
+        documents = {}
+        for results in shard_results:
+            documents.update(results)
+        return documents
+
+    async def list_memories(
+        self,
+        user_filter: str,
+        limit: int = 50,
+        offset: int = 0,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        include_documents: bool = True
+    ) -> List[Tuple[str, Optional[str], Dict[str, Any]]]:
+        """List a user's memories across shards, newest first."""
+        await self.initialize()
+
+        # Each shard's first offset + limit rows cover the merged page
+        shard_rows = await asyncio.gather(*(
+            shard.list_memories(user_filter, offset + limit, 0, since, until, include_documents=False)
+            for shard in self.shards
+        ))
+        rows = sorted(
+            (row for rows in shard_rows for row in rows),
+            key=lambda row: row[2].get(TIMESTAMP_EPOCH_KEY, 0.0),
+            reverse=True
+        )[offset:offset + limit]
+
+        documents = await self.get_documents([row[0] for row in rows]) if include_documents else {}
+        return [(memory_id, documents.get(memory_id), metadata) for memory_id, _, metadata in rows]
+
+    async def update_metadata(self, memory_id: str, metadata: Dict[str, Any]) -> bool:
+        """Update (merge) metadata fields of a stored memory."""
+        await self.initialize()
+        return await self.shard_for(memory_id).update_metadata(memory_id, metadata)
+
+    async def update_metadata_many(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """Update metadata with one write per shard."""
+        await self.initialize()
+
+        grouped = self._group_by_shard(list(updates))
+        updated = await asyncio.gather(*(
+            self.shards[index].update_metadata_many({memory_id: updates[memory_id] for memory_id in ids})
+            for index, ids in grouped.items()
+        ))
+        return sum(updated)
+
+    async def replace_documents(self, memory_ids: List[str], documents: List[str]) -> int:
+        """Rewrite stored documents on their shards."""
+        await self.initialize()
+
+        documents_by_id = dict(zip(memory_ids, documents))
+        grouped = self._group_by_shard(memory_ids)
+        replaced = await asyncio.gather(*(
+            self.shards[index].replace_documents(ids, [documents_by_id[memory_id] for memory_id in ids])
+            for index, ids in grouped.items()
+        ))
+        return sum(replaced)
+
+    async def delete_memory(self, memory_id: str) -> bool:
+        """Delete a memory from its shard."""
+        await self.initialize()
+        return await self.shard_for(memory_id).delete_memory(memory_id)
+
+    async def delete_memories(self, memory_ids: List[str]) -> int:
+        """Delete memories with one write per shard."""
+        await self.initialize()
+
+        grouped = self._group_by_shard(memory_ids)
+        deleted = await asyncio.gather(*(
+            self.shards[index].delete_memories(ids)
+            for index, ids in grouped.items()
+        ))
+        return sum(deleted)
+
+    async def get_collection_stats(self) -> Dict[str, Any]:
+        """Get totals and per-shard statistics."""
+        await self.initialize()
+
+        shard_stats = await asyncio.gather(*(shard.get_collection_stats() for shard in self.shards))
+        counts = [stats.get('total_memories', 0) for stats in shard_stats]
+
+        return {
+            "total_memories": sum(counts),
+            "collection_name": self.settings.chroma_collection_name,
+            "embedding_dimension": self.settings.embedding_dimension,
+            "shard_count": self.shard_count,
+            "shards": [
+                {"shard": index, "path": shard.persist_directory, "memories": count}
+                for index, (shard, count) in enumerate(zip(self.shards, counts))
+            ],
+            "shard_imbalance": round(max(counts) / (sum(counts) / len(counts)), 3) if sum(counts) else 0.0
+        }
+
+    async def backfill_timestamp_epoch(self, batch_size: int = 500) -> int:
+        """Backfill numeric timestamps on every shard."""
+        await self.initialize()
+
+        updated = 0
+        for shard in self.shards:
+            updated += await shard.backfill_timestamp_epoch(batch_size)
+        return updated
+
+    async def backfill_metadata_types(self, batch_size: int = 500) -> int:
+        """Restore stringified legacy metadata values on every shard."""
+        await self.initialize()
+
+        updated = 0
+        for shard in self.shards:
+            updated += await shard.backfill_metadata_types(batch_size)
+        return updated
+
+    def get_type_manifest(self) -> Dict[str, List[str]]:
+        """Get the metadata type manifest shared by all shards."""
+        return self.shards[0].get_type_manifest()
+
+    def _group_by_shard(self, memory_ids: List[str]) -> Dict[int, List[str]]:
+        """Group memory ids by owning shard."""
+        grouped: Dict[int, List[str]] = {}
+        for memory_id in memory_ids:
+            grouped.setdefault(self.shard_index(memory_id), []).append(memory_id)
+        return grouped
+
+    def _check_layout(self):
+        """Refuse to open data that was written with a different shard count."""
+        os.makedirs(self.root_directory, exist_ok=True)
+        layout_path = os.path.join(self.root_directory, SHARD_LAYOUT_FILE)
+
+        if os.path.exists(layout_path):
+            with open(layout_path, "r", encoding="utf-8") as handle:
+                stored_count = json.load(handle).get("shards")
+            if stored_count != self.shard_count:
+                raise ValueError(
+                    f"Vector store at {self.root_directory} has {stored_count} shards, "
+                    f"but VECTOR_STORE_SHARDS is {self.shard_count}"
+                )
+            return
+
+        if os.path.exists(os.path.join(self.root_directory, "chroma.sqlite3")):
+            raise ValueError(
+                f"Vector store at {self.root_directory} holds unsharded data; "
+                "re-import it into an empty directory to enable sharding"
+            )
+
+        with open(layout_path, "w", encoding="utf-8") as handle:
+            json.dump({"shards": self.shard_count}, handle)
+        logger.info(f"Created {self.shard_count}-shard vector store at {self.root_directory}")
+
+
+def create_vector_store():
+    """Create the store configured by ``SERVING_MODE``, ``VECTOR_STORE_SHARDS`` and ``HOT_TIER_ENABLED``."""
+    settings = get_settings()
+    if settings.serving_mode == "replica":
+        return get_replica_vector_store()
+
+    cold_store = _create_disk_store()
+    if not settings.hot_tier_enabled:
+        return cold_store
+
+    # Imported here because the tiered store builds on this module
+    from .tiered_vector_store import TieredVectorStore, get_hot_tier
+    return TieredVectorStore(cold_store, get_hot_tier())
+
+
+def _create_disk_store() -> Union[VectorStore, ShardedVectorStore]:
+    """Create the on-disk Chroma store, sharded if configured."""
+    settings = get_settings()
+    if settings.vector_store_shards > 1:
+        return ShardedVectorStore(settings.vector_store_shards)
+
+    if os.path.exists(os.path.join(settings.chroma_db_path, SHARD_LAYOUT_FILE)):
+        raise ValueError(
+            f"Vector store at {settings.chroma_db_path} is sharded; set VECTOR_STORE_SHARDS to match"
+        )
+    return VectorStore()
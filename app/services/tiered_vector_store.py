@@ -0,0 +1,599 @@
+"""Two-tier vector store: recent memories in RAM, everything on disk."""
+
+import asyncio
+import threading
+import time
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, Union
+import numpy as np
+from ..utils.logger import get_logger
+from ..config import get_settings
+from .metadata_filters import compile_filters, evaluate_filters
+from .sharded_vector_store import ShardedVectorStore, merge_top_k
+from .vector_store import (
+    RESERVED_METADATA_KEYS,
+    TIMESTAMP_EPOCH_KEY,
+    VectorStore,
+    get_vector_store_executor
+)
+
+logger = get_logger(__name__)
+
+SearchHit = Tuple[str, float, str, Dict[str, Any]]
+
+# Share of the hot tier evicted at once when it is over capacity
+_EVICTION_FRACTION = 0.1
+
+
+class _UserTier:
+    """Growable embedding matrix of one user's hot memories."""
+
+    def __init__(self, dimension: int):
+        """Start with room for a few memories."""
+        self.ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.embeddings = np.empty((16, dimension), dtype=np.float32)
+        self.norms = np.empty(16, dtype=np.float32)
+        self.epochs = np.empty(16, dtype=np.float64)
+
+    def __len__(self) -> int:
+        """Get the number of memories."""
+        return len(self.ids)
+
+    def put(self, memory_id: str, embedding: np.ndarray, epoch: float):
+        """Insert or overwrite a memory."""
+        position = self.positions.get(memory_id)
+        if position is None:
+            position = len(self.ids)
+            if position == len(self.embeddings):
+                self._grow()
+            self.ids.append(memory_id)
+            self.positions[memory_id] = position
+
+        self.embeddings[position] = embedding
+        self.norms[position] = float(embedding @ embedding)
+        self.epochs[position] = epoch
+
+    def remove(self, memory_id: str) -> bool:
+        """Remove a memory by moving the last row into its place."""
+        position = self.positions.pop(memory_id, None)
+        if position is None:
+            return False
+
+        last = len(self.ids) - 1
+        if position != last:
+            moved_id = self.ids[last]
+            self.ids[position] = moved_id
+            self.positions[moved_id] = position
+            self.embeddings[position] = self.embeddings[last]
+            self.norms[position] = self.norms[last]
+            self.epochs[position] = self.epochs[last]
+        self.ids.pop()
+        return True
+
+    def _grow(self):
+        """Double the capacity of the arrays."""
+        capacity = len(self.embeddings) * 2
+        self.embeddings = np.resize(self.embeddings, (capacity, self.embeddings.shape[1]))
+        self.norms = np.resize(self.norms, capacity)
+        self.epochs = np.resize(self.epochs, capacity)
+
+
+class HotTier:
+    """RAM-resident exact index of every memory newer than ``boundary``.
+
+    The invariant ``hot == {memories with epoch >= boundary}`` lets searches
+    that only ask for recent memories skip the on-disk tier, and lets the
+    rest split the time range between the tiers. The boundary trails the
+    clock by the configured window and moves forward early when the tier
+    is over capacity, so RAM use stays bounded.
+    """
+
+    def __init__(self, dimension: int, window_seconds: float, max_memories: int):
+        """Initialize an empty, not yet loaded tier."""
+        self.dimension = dimension
+        self.window_seconds = window_seconds
+        self.max_memories = max_memories
+        self.boundary = time.time() - window_seconds
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+        self._lock = threading.Lock()
+        self._users: Dict[str, _UserTier] = {}
+        self._records: Dict[str, Tuple[str, str, Dict[str, Any]]] = {}
+        self._hot_searches = 0
+        self._split_searches = 0
+        self._demoted = 0
+
+    async def load(self, cold_store):
+        """Promote the memories inside the window from the cold tier, once."""
+        async with self._load_lock:
+            if self.loaded:
+                return
+
+            start_time = time.time()
+            promoted = 0
+            async for memory_ids, texts, metadatas, embeddings in cold_store.iter_memories(
+                since=self.boundary
+            ):
+                self.add(memory_ids, embeddings, texts, metadatas)
+                promoted += len(memory_ids)
+
+            self.loaded = True
+            logger.info(
+                f"Promoted {promoted} recent memories to the hot tier "
+                f"in {round((time.time() - start_time) * 1000, 2)}ms"
+            )
+
+    def add(
+        self,
+        memory_ids: List[str],
+        embeddings: Union[List[List[float]], np.ndarray],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> int:
+        """Add the memories that fall inside the window, returning how many did."""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        added = 0
+
+        with self._lock:
+            for index, (memory_id, text, metadata) in enumerate(zip(memory_ids, texts, metadatas)):
+                epoch = metadata.get(TIMESTAMP_EPOCH_KEY)
+                if epoch is None or epoch < self.boundary:
+                    continue
+
+                user_id = metadata.get('user_id', '')
+                previous = self._records.get(memory_id)
+                if previous and previous[0] != user_id:
+                    self._users[previous[0]].remove(memory_id)
+
+                self._users.setdefault(user_id, _UserTier(self.dimension)).put(
+                    memory_id, vectors[index], float(epoch)
+                )
+                self._records[memory_id] = (user_id, text, metadata)
+                added += 1
+
+            if len(self._records) > self.max_memories:
+                self._evict_oldest()
+
+        return added
+
+    def update_metadata(self, memory_id: str, metadata: Dict[str, Any]):
+        """Merge metadata changes into a hot memory; ``None`` removes a key."""
+        with self._lock:
+            record = self._records.get(memory_id)
+            if record is None:
+                return
+            user_id, text, current = record
+            merged = dict(current)
+            for key, value in metadata.items():
+                if value is None:
+                    merged.pop(key, None)
+                else:
+                    merged[key] = value
+            self._records[memory_id] = (user_id, text, merged)
+
+    def replace_text(self, memory_id: str, text: str):
+        """Replace the encrypted text of a hot memory."""
+        with self._lock:
+            record = self._records.get(memory_id)
+            if record is not None:
+                self._records[memory_id] = (record[0], text, record[2])
+
+    def remove(self, memory_id: str):
+        """Drop a memory from the tier."""
+        with self._lock:
+            record = self._records.pop(memory_id, None)
+            if record:
+                self._remove_from_user(record[0], memory_id)
+
+    def get(self, memory_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Get the encrypted text and metadata of a hot memory."""
+        with self._lock:
+            record = self._records.get(memory_id)
+            return (record[1], record[2]) if record else None
+
+    def get_embeddings(self, memory_ids: List[str]) -> Dict[str, List[float]]:
+        """Get the embeddings of hot memories."""
+        with self._lock:
+            embeddings = {}
+            for memory_id in memory_ids:
+                record = self._records.get(memory_id)
+                if record:
+                    tier = self._users[record[0]]
+                    embeddings[memory_id] = tier.embeddings[tier.positions[memory_id]].tolist()
+            return embeddings
+
+    def covers(self, since: Optional[float]) -> bool:
+        """Whether every memory a time range can match is in the hot tier."""
+        return self.loaded and since is not None and since >= self.boundary
+
+    def search(
+        self,
+        query_embeddings: List[List[float]],
+        limit: int,
+        min_similarity: float,
+        user_id: str,
+        tag_filter: Optional[List[str]],
+        since: Optional[float],
+        until: Optional[float],
+        metadata_filters: Optional[Dict[str, Any]]
+    ) -> List[List[SearchHit]]:
+        """Exact search of one user's hot memories."""
+        with self._lock:
+            tier = self._users.get(user_id)
+            if not tier:
+                return [[] for _ in query_embeddings]
+
+            count = len(tier)
+            epochs = tier.epochs[:count]
+            in_range = np.ones(count, dtype=bool)
+            if since is not None:
+                in_range &= epochs >= since
+            if until is not None:
+                in_range &= epochs <= until
+            rows = np.flatnonzero(in_range)
+            if not len(rows):
+                return [[] for _ in query_embeddings]
+
+            queries = np.asarray(query_embeddings, dtype=np.float32)
+            matrix = tier.embeddings[rows]
+            distances = (
+                np.sum(queries ** 2, axis=1, keepdims=True)
+                - 2 * queries @ matrix.T
+                + tier.norms[rows]
+            )
+            similarities = 1.0 - np.minimum(np.maximum(distances, 0.0), 1.0)
+
+            post_filtered = bool(tag_filter or metadata_filters)
+            batch = []
+            for row in similarities:
+                if post_filtered or len(row) <= limit:
+                    order = np.argsort(-row, kind="stable")
+                else:
+                    top = np.argpartition(-row, limit - 1)[:limit]
+                    order = top[np.argsort(-row[top], kind="stable")]
+
+                hits = []
+                for index in order:
+                    similarity = float(row[index])
+                    if similarity < min_similarity or len(hits) >= limit:
+                        break
+                    memory_id = tier.ids[rows[index]]
+                    _, text, metadata = self._records[memory_id]
+                    if tag_filter and not any(tag in metadata.get('tags', []) for tag in tag_filter):
+                        continue
+                    if metadata_filters and not evaluate_filters(metadata_filters, metadata):
+                        continue
+                    hits.append((memory_id, similarity, text, metadata))
+                batch.append(hits)
+            return batch
+
+    def demote(self, now: Optional[float] = None) -> int:
+        """Advance the boundary to the window start and drop memories now outside it."""
+        with self._lock:
+            boundary = (now or time.time()) - self.window_seconds
+            if boundary <= self.boundary:
+                return 0
+            return self._drop_older_than(boundary)
+
+    async def run(self, interval: float):
+        """Demote aged-out memories periodically until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                demoted = self.demote()
+                if demoted:
+                    logger.info(f"Demoted {demoted} memories from the hot tier")
+            except Exception as e:
+                logger.error(f"Failed to maintain the hot tier: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get tier size and routing statistics."""
+        with self._lock:
+            searches = self._hot_searches + self._split_searches
+            return {
+                "loaded": self.loaded,
+                "memories": len(self._records),
+                "max_memories": self.max_memories,
+                "bytes": sum(tier.embeddings.nbytes for tier in self._users.values()),
+                "users": len(self._users),
+                "boundary": self.boundary,
+                "window_seconds": self.window_seconds,
+                "hot_only_searches": self._hot_searches,
+                "split_searches": self._split_searches,
+                "hot_only_rate": round(self._hot_searches / searches, 4) if searches else 0.0,
+                "demoted": self._demoted
+            }
+
+    def record_search(self, hot_only: bool):
+        """Count how a search was routed."""
+        with self._lock:
+            if hot_only:
+                self._hot_searches += 1
+            else:
+                self._split_searches += 1
+
+    def _evict_oldest(self):
+        """Move the boundary past the oldest memories until under capacity; the caller holds the lock."""
+        epochs = np.fromiter(
+            (record[2][TIMESTAMP_EPOCH_KEY] for record in self._records.values()),
+            dtype=np.float64,
+            count=len(self._records)
+        )
+        keep = int(self.max_memories * (1 - _EVICTION_FRACTION))
+        cutoff = float(np.partition(epochs, len(epochs) - keep)[len(epochs) - keep]) if keep else np.inf
+        # Everything strictly older than the kept memories leaves the tier
+        self._drop_older_than(cutoff)
+
+    def _drop_older_than(self, boundary: float) -> int:
+        """Set the boundary and remove memories older than it; the caller holds the lock."""
+        self.boundary = boundary
+        expired = [
+            (record[0], memory_id) for memory_id, record in self._records.items()
+            if record[2][TIMESTAMP_EPOCH_KEY] < boundary
+        ]
+        for user_id, memory_id in expired:
+            del self._records[memory_id]
+            self._remove_from_user(user_id, memory_id)
+        self._demoted += len(expired)
+        return len(expired)
+
+    def _remove_from_user(self, user_id: str, memory_id: str):
+        """Remove a memory from its user's matrix; the caller holds the lock."""
+        tier = self._users.get(user_id)
+        if tier and tier.remove(memory_id) and not len(tier):
+            del self._users[user_id]
+
+
+class TieredVectorStore:
+    """Vector store with a RAM-resident hot tier in front of the on-disk store.
+
+    Every write goes to the cold (durable) store; memories inside the hot
+    window are also kept in the hot tier. Searches whose time range starts
+    inside the window are answered from RAM alone. Other searches query
+    the hot tier for the recent part of the range and the cold store for
+    the older part, and the two top-k lists are merged.
+    """
+
+    def __init__(self, cold_store: Union[VectorStore, ShardedVectorStore], hot_tier: "HotTier"):
+        """Initialize the tiered store around a cold store and the shared hot tier."""
+        self.cold_store = cold_store
+        self.hot_tier = hot_tier
+
+    async def initialize(self):
+        """Initialize the cold store and promote recent memories on first use."""
+        await self.cold_store.initialize()
+        if not self.hot_tier.loaded:
+            await self.hot_tier.load(self.cold_store)
+
+    async def add_memory(
+        self,
+        memory_id: str,
+        embedding: List[float],
+        text: str,
+        metadata: Dict[str, Any]
+    ) -> bool:
+        """Add a memory to the cold store and, if recent, the hot tier."""
+        await self.add_memories([memory_id], [embedding], [text], [metadata])
+        return True
+
+    async def add_memories(
+        self,
+        memory_ids: List[str],
+        embeddings: List[List[float]],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> int:
+        """Write a batch to the cold store, then keep the recent ones hot."""
+        await self.initialize()
+
+        written = await self.cold_store.add_memories(memory_ids, embeddings, texts, metadatas)
+        self.hot_tier.add(memory_ids, embeddings, texts, metadatas)
+        return written
+
+    async def search_memories(
+        self,
+        query_embedding: List[float],
+        limit: int = 10,
+        **filters
+    ) -> List[SearchHit]:
+        """Search both tiers for similar memories."""
+        results = await self.search_memories_batch([query_embedding], limit=limit, **filters)
+        return results[0]
+
+    async def search_memories_batch(
+        self,
+        query_embeddings: List[List[float]],
+        limit: int = 10,
+        min_similarity: float = 0.5,
+        user_filter: Optional[str] = None,
+        tag_filter: Optional[List[str]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        include_documents: bool = True
+    ) -> List[List[SearchHit]]:
+        """Route a search to the hot tier, or split it across both tiers and merge.
+
+        Hot hits always carry their text, which costs nothing to include.
+        """
+        await self.initialize()
+
+        if user_filter is None:
+            # The hot tier is partitioned by user; unscoped searches stay on disk
+            return await self.cold_store.search_memories_batch(
+                query_embeddings, limit=limit, min_similarity=min_similarity,
+                tag_filter=tag_filter, since=since, until=until, metadata_filters=metadata_filters,
+                include_documents=include_documents
+            )
+
+        if metadata_filters:
+            # Validate exactly as the cold store would, even when it is skipped
+            try:
+                compile_filters(metadata_filters, self.get_type_manifest(), reserved_keys=RESERVED_METADATA_KEYS)
+            except ValueError as e:
+                raise ValueError(f"Failed to search memories: {str(e)}")
+
+        boundary = self.hot_tier.boundary
+        hot_only = self.hot_tier.covers(since)
+        self.hot_tier.record_search(hot_only)
+
+        loop = asyncio.get_event_loop()
+        hot_search = loop.run_in_executor(
+            get_vector_store_executor(),
+            lambda: self.hot_tier.search(
+                query_embeddings, limit, min_similarity, user_filter,
+                tag_filter, since, until, metadata_filters
+            )
+        )
+        if hot_only:
+            return await hot_search
+
+        cold_until = boundary if until is None else min(until, boundary)
+        hot_results, cold_results = await asyncio.gather(
+            hot_search,
+            self.cold_store.search_memories_batch(
+                query_embeddings, limit=limit, min_similarity=min_similarity,
+                user_filter=user_filter, tag_filter=tag_filter,
+                since=since, until=cold_until, metadata_filters=metadata_filters,
+                include_documents=include_documents
+            )
+        )
+
+        merged = []
+        for hot_hits, cold_hits in zip(hot_results, cold_results):
+            # A memory exactly on the boundary can come back from both tiers
+            hot_ids = {hit[0] for hit in hot_hits}
+            merged.append(merge_top_k(
+                [hot_hits, [hit for hit in cold_hits if hit[0] not in hot_ids]], limit
+            ))
+        return merged
+
+    async def get_memories_by_ids(
+        self,
+        memory_ids: List[str],
+        query_embedding: List[float],
+        **filters
+    ) -> List[SearchHit]:
+        """Fetch specific memories under search filters from the cold store."""
+        await self.initialize()
+        return await self.cold_store.get_memories_by_ids(memory_ids, query_embedding, **filters)
+
+    async def get_embeddings(self, memory_ids: List[str]) -> Dict[str, List[float]]:
+        """Get embeddings from the hot tier, falling back to the cold store."""
+        await self.initialize()
+
+        embeddings = self.hot_tier.get_embeddings(memory_ids)
+        missing = [memory_id for memory_id in memory_ids if memory_id not in embeddings]
+        if missing:
+            embeddings.update(await self.cold_store.get_embeddings(missing))
+        return embeddings
+
+    async def iter_memories(self, batch_size: int = 1000, **filters) -> AsyncIterator[Tuple]:
+        """Page through memories of the cold store, which holds all of them."""
+        await self.initialize()
+        async for page in self.cold_store.iter_memories(batch_size=batch_size, **filters):
+            yield page
+
+    async def iter_records(self, batch_size: int = 500, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """Page through the raw rows of the cold store."""
+        await self.initialize()
+        async for page in self.cold_store.iter_records(batch_size=batch_size, **kwargs):
+            yield page
+
+    async def get_memory(
+        self,
+        memory_id: str,
+        include_document: bool = True
+    ) -> Optional[Tuple[Optional[str], Dict[str, Any]]]:
+        """Get a specific memory by ID, from RAM when it is hot; the document is ``None`` unless included."""
+        await self.initialize()
+
+        hot = self.hot_tier.get(memory_id)
+        if hot is None:
+            return await self.cold_store.get_memory(memory_id, include_document)
+        text, metadata = hot
+        return (text if include_document else None), metadata
+
+    async def get_documents(self, memory_ids: List[str]) -> Dict[str, str]:
+        """Get stored documents from the cold store."""
+        await self.initialize()
+        return await self.cold_store.get_documents(memory_ids)
+
+    async def list_memories(self, user_filter: str, **options) -> List[Tuple[str, Optional[str], Dict[str, Any]]]:
+        """List a user's memories from the cold store, which holds all of them."""
+        await self.initialize()
+        return await self.cold_store.list_memories(user_filter, **options)
+
+    async def update_metadata(self, memory_id: str, metadata: Dict[str, Any]) -> bool:
+        """Update (merge) metadata fields in both tiers."""
+        await self.initialize()
+
+        updated = await self.cold_store.update_metadata(memory_id, metadata)
+        if updated:
+            self.hot_tier.update_metadata(memory_id, metadata)
+        return updated
+
+    async def update_metadata_many(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """Update metadata of many memories in both tiers."""
+        await self.initialize()
+
+        updated = await self.cold_store.update_metadata_many(updates)
+        for memory_id, metadata in updates.items():
+            self.hot_tier.update_metadata(memory_id, metadata)
+        return updated
+
+    async def replace_documents(self, memory_ids: List[str], documents: List[str]) -> int:
+        """Rewrite stored documents in both tiers."""
+        await self.initialize()
+
+        replaced = await self.cold_store.replace_documents(memory_ids, documents)
+        for memory_id, document in zip(memory_ids, documents):
+            self.hot_tier.replace_text(memory_id, document)
+        return replaced
+
+    async def delete_memory(self, memory_id: str) -> bool:
+        """Delete a memory from both tiers."""
+        await self.initialize()
+
+        self.hot_tier.remove(memory_id)
+        return await self.cold_store.delete_memory(memory_id)
+
+    async def delete_memories(self, memory_ids: List[str]) -> int:
+        """Delete many memories from both tiers."""
+        await self.initialize()
+
+        for memory_id in memory_ids:
+            self.hot_tier.remove(memory_id)
+        return await self.cold_store.delete_memories(memory_ids)
+
+    async def get_collection_stats(self) -> Dict[str, Any]:
+        """Get cold store statistics with the hot tier's."""
+        await self.initialize()
+
+        stats = await self.cold_store.get_collection_stats()
+        stats["hot_tier"] = self.hot_tier.get_stats()
+        return stats
+
+    async def backfill_timestamp_epoch(self, batch_size: int = 500) -> int:
+        """Backfill numeric timestamps in the cold store."""
+        return await self.cold_store.backfill_timestamp_epoch(batch_size)
+
+    async def backfill_metadata_types(self, batch_size: int = 500) -> int:
+        """Restore stringified legacy metadata values in the cold store."""
+        return await self.cold_store.backfill_metadata_types(batch_size)
+
+    def get_type_manifest(self) -> Dict[str, List[str]]:
+        """Get the metadata type manifest of the cold store."""
+        return self.cold_store.get_type_manifest()
+
+
+@lru_cache()
+def get_hot_tier() -> HotTier:
+    """Get the process-wide hot tier."""
+    settings = get_settings()
+    return HotTier(
+        settings.embedding_dimension,
+        settings.hot_tier_window_days * 86400,
+        settings.hot_tier_max_memories
+    )
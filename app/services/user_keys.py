@@ -0,0 +1,234 @@
+"""Per-user data-encryption keys, wrapped by the master key."""
+
+import secrets
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from ..utils.cache import LRUCache
+from ..utils.encryption import DATA_KEY_ID_SIZE, EncryptionService
+from ..utils.logger import get_logger
+from ..config import get_settings
+
+logger = get_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_keys (
+    key_id BLOB PRIMARY KEY,
+    user_id TEXT NOT NULL UNIQUE,
+    wrapped_key TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class UserKeyStore:
+    """Each user's data key, stored only in wrapped form.
+
+    A user gets a random AES-256 key on their first write. Keys are
+    wrapped under the master keyring and bound to their user and id, so
+    rotating the master key rewraps this table instead of every memory.
+    Unwrapped keys are held in a bounded LRU so hot users pay no unwrap
+    cost. Destroying a user's key is a single-row delete that leaves every
+    memory written under it unreadable (crypto-shredding). Other processes
+    sharing the table re-check that a cached key still exists once it has
+    been cached for ``recheck_s`` seconds, so they stop decrypting a
+    shredded user's memories within that window. A ``read_only`` store
+    opens an immutable copy, such as the one shipped with a replica
+    snapshot, and never creates keys.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        keyring: EncryptionService,
+        cache_entries: int = 10000,
+        recheck_s: float = 5.0,
+        read_only: bool = False
+    ):
+        """Open (or create) the key table at ``path``."""
+        self.path = path
+        self.keyring = keyring
+        self.recheck_s = recheck_s
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        if read_only:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=FULL")
+            # Overwrite deleted rows so destroyed keys do not linger in free pages
+            self._conn.execute("PRAGMA secure_delete=ON")
+            self._conn.executescript(_SCHEMA)
+        self._keys = LRUCache(cache_entries)
+        self._user_key_ids = LRUCache(cache_entries)
+        self._unwraps = 0
+        self._destroyed = 0
+        self._rechecks = 0
+
+    def for_user(self, user_id: str) -> Tuple[bytes, AESGCM]:
+        """Get the id and cipher of a user's data key, creating the key on first use."""
+        key_id = self._user_key_ids.get(user_id)
+        if key_id is not None:
+            aead = self._cached(key_id)
+            if aead is not None:
+                return key_id, aead
+            self._user_key_ids.pop(user_id)
+
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT key_id, wrapped_key FROM user_keys WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is None:
+                if self.read_only:
+                    raise ValueError(f"No data key for user {user_id} in read-only key table")
+                key_id = secrets.token_bytes(DATA_KEY_ID_SIZE)
+                wrapped_key = self.keyring.wrap_key(
+                    AESGCM.generate_key(bit_length=256), self._context(key_id, user_id)
+                )
+                # Another process may create the user's key first; keep whichever won
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO user_keys (key_id, user_id, wrapped_key, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key_id, user_id, wrapped_key, time.time())
+                )
+                row = self._conn.execute(
+                    "SELECT key_id, wrapped_key FROM user_keys WHERE user_id = ?", (user_id,)
+                ).fetchone()
+
+        key_id, wrapped_key = bytes(row[0]), row[1]
+        return key_id, self._unwrap(key_id, user_id, wrapped_key)
+
+    def get(self, key_id: bytes) -> Optional[AESGCM]:
+        """Get the cipher for a data key id; ``None`` if it was destroyed or never existed."""
+        aead = self._cached(key_id)
+        if aead is not None:
+            return aead
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_id, wrapped_key FROM user_keys WHERE key_id = ?", (key_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return self._unwrap(key_id, row[0], row[1])
+
+    def destroy(self, user_id: str) -> bool:
+        """Delete a user's data key, making everything written under it unreadable."""
+        if self.read_only:
+            raise ValueError("Cannot destroy keys in a read-only key table")
+
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT key_id FROM user_keys WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            self._conn.execute("DELETE FROM user_keys WHERE user_id = ?", (user_id,))
+
+        with self._lock:
+            # Move the deletion out of the WAL so the wrapped key is gone from disk too
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        self._keys.pop(bytes(row[0]))
+        self._user_key_ids.pop(user_id)
+        self._destroyed += 1
+        logger.info(f"Destroyed data key of user {user_id}")
+        return True
+
+    def rewrap(self) -> int:
+        """Rewrap keys still under a previous master key; returns how many were rewrapped."""
+        if self.read_only:
+            return 0
+
+        with self._lock:
+            rows = self._conn.execute("SELECT key_id, user_id, wrapped_key FROM user_keys").fetchall()
+
+        rewrapped = []
+        for key_id, user_id, wrapped_key in rows:
+            if self.keyring.is_current(wrapped_key):
+                continue
+            context = self._context(bytes(key_id), user_id)
+            rewrapped.append((self.keyring.wrap_key(self.keyring.unwrap_key(wrapped_key, context), context), key_id))
+
+        if rewrapped:
+            with self._lock, self._conn:
+                self._conn.executemany("UPDATE user_keys SET wrapped_key = ? WHERE key_id = ?", rewrapped)
+            logger.info(f"Rewrapped {len(rewrapped)} data keys under the current master key")
+        return len(rewrapped)
+
+    def backup(self, path: str):
+        """Write a consistent copy of the key table to ``path``."""
+        target = sqlite3.connect(path)
+        try:
+            with self._lock:
+                self._conn.backup(target)
+            # A rollback-journal copy opens read-only without creating WAL files beside it
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+
+    def _cached(self, key_id: bytes) -> Optional[AESGCM]:
+        """Get a cached cipher, first re-checking that a key cached a while ago still exists."""
+        entry = self._keys.get(key_id)
+        if entry is None:
+            return None
+
+        aead, checked_at = entry
+        if self.read_only or time.monotonic() - checked_at < self.recheck_s:
+            return aead
+
+        # Another process may have destroyed the key since it was cached
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM user_keys WHERE key_id = ?", (key_id,)).fetchone()
+        self._rechecks += 1
+        if row is None:
+            self._keys.pop(key_id)
+            return None
+        self._keys.set(key_id, (aead, time.monotonic()))
+        return aead
+
+    def _unwrap(self, key_id: bytes, user_id: str, wrapped_key: str) -> AESGCM:
+        """Unwrap a key and cache its cipher."""
+        aead = AESGCM(self.keyring.unwrap_key(wrapped_key, self._context(key_id, user_id)))
+        self._keys.set(key_id, (aead, time.monotonic()))
+        self._user_key_ids.set(user_id, key_id)
+        self._unwraps += 1
+        return aead
+
+    @staticmethod
+    def _context(key_id: bytes, user_id: str) -> str:
+        """Get the associated data binding a wrapped key to its row."""
+        return f"user-key:{key_id.hex()}:{user_id}"
+
+    def count(self) -> int:
+        """Get the number of stored keys."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM user_keys").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get key counts and cache statistics."""
+        return {
+            "keys": self.count(),
+            "unwraps": self._unwraps,
+            "destroyed": self._destroyed,
+            "rechecks": self._rechecks,
+            "cache": self._keys.get_stats()
+        }
+
+
+@lru_cache()
+def get_user_key_store() -> UserKeyStore:
+    """Get the process-wide user key store."""
+    settings = get_settings()
+    logger.info(f"Opening user key store at {settings.user_key_store_path}")
+    keyring = EncryptionService(settings.encryption_key, previous_keys=settings.encryption_previous_keys)
+    return UserKeyStore(
+        settings.user_key_store_path,
+        keyring,
+        settings.user_key_cache_entries,
+        settings.user_key_recheck_s
+    )
@@ -1,32 +1,104 @@
 """Vector storage service using ChromaDB."""
 
+import asyncio
+import json
+import re
 import uuid
-from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, Awaitable, Callable
 import chromadb
+import numpy as np
 from chromadb.config import Settings as ChromaSettings
 from ..utils.logger import get_logger
 from ..config import get_settings
+from .metadata_filters import compile_filters, scalar_type_name
 
 logger = get_logger(__name__)
 
+# Numeric copy of the ISO ``timestamp`` so time ranges can be filtered in Chroma
+TIMESTAMP_EPOCH_KEY = "timestamp_epoch"
+
+# Keyed hash of a memory's text, used for ingest deduplication
+CONTENT_HASH_KEY = "content_hash"
+
+# Metadata keys managed by the service rather than supplied by users
+RESERVED_METADATA_KEYS = ("user_id", "tags", "timestamp", TIMESTAMP_EPOCH_KEY, CONTENT_HASH_KEY)
+
+# Per-row map of keys whose values were JSON-encoded (lists, objects)
+METADATA_TYPES_KEY = "_ml_types"
+
+# Collection metadata flag recording that the epoch backfill has completed
+_BACKFILL_MARKER = "timestamp_epoch_backfilled"
+
+# Collection metadata flag recording that stringified legacy values were restored
+_TYPES_BACKFILL_MARKER = "metadata_types_backfilled"
+
+# How str() rendered ints and floats before metadata kept native types
+_LEGACY_INT = re.compile(r"-?(0|[1-9]\d*)")
+_LEGACY_FLOAT = re.compile(r"-?((0|[1-9]\d*)\.\d+|\d(\.\d+)?e[-+]\d+)")
+
+# Collection metadata entry holding the per-key type manifest
+_TYPE_MANIFEST_KEY = "type_manifest"
+_type_manifests: Dict[str, Dict[str, List[str]]] = {}
+
+
+@lru_cache()
+def get_vector_store_executor() -> ThreadPoolExecutor:
+    """Get the shared thread pool that runs Chroma reads and writes."""
+    settings = get_settings()
+    return ThreadPoolExecutor(
+        max_workers=settings.vector_store_workers,
+        thread_name_prefix="vector-store"
+    )
+
+
+def to_epoch_seconds(value: datetime) -> float:
+    """Convert a datetime to epoch seconds, treating naive values as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def parse_legacy_scalar(value: str) -> Any:
+    """Recover the int, float or bool that ``str()`` turned into ``value``, if any."""
+    if value in ("True", "False"):
+        return value == "True"
+    if _LEGACY_INT.fullmatch(value):
+        number = int(value)
+        # Chroma stores 64-bit integers
+        return number if -2 ** 63 <= number < 2 ** 63 else value
+    if _LEGACY_FLOAT.fullmatch(value):
+        return float(value)
+    return value
+
 
 class VectorStore:
     """Service for storing and searching vector embeddings."""
     
-    def __init__(self):
-        """Initialize the vector store."""
+    def __init__(self, persist_directory: Optional[str] = None, manifest_scope: Optional[str] = None):
+        """Initialize the vector store.
+        
+        ``manifest_scope`` lets several stores (e.g. shards) share one
+        metadata type manifest so filters compile identically for all of them.
+        """
         self.settings = get_settings()
+        self.persist_directory = persist_directory or self.settings.chroma_db_path
+        self._manifest_scope = manifest_scope or self.persist_directory
         self._client = None
         self._collection = None
+        # Created on first use so it belongs to the running event loop
+        self._backfill_lock: Optional[asyncio.Lock] = None
     
     async def initialize(self):
         """Initialize ChromaDB client and collection."""
         if self._client is None:
-            logger.info(f"Initializing ChromaDB at {self.settings.chroma_db_path}")
+            logger.info(f"Initializing ChromaDB at {self.persist_directory}")
             
             # Configure ChromaDB settings
             chroma_settings = ChromaSettings(
-                persist_directory=self.settings.chroma_db_path,
+                persist_directory=self.persist_directory,
                 is_persistent=True,
                 allow_reset=True
             )
@@ -43,9 +115,21 @@ class VectorStore:
                 # Collection doesn't exist, create it
                 self._collection = self._client.create_collection(
                     name=self.settings.chroma_collection_name,
-                    metadata={"description": "MemoryLink embeddings"}
+                    metadata={
+                        "description": "MemoryLink embeddings",
+                        _BACKFILL_MARKER: 1,
+                        _TYPES_BACKFILL_MARKER: 1
+                    }
                 )
                 logger.info(f"Created new collection: {self.settings.chroma_collection_name}")
+            
+            self._load_type_manifest()
+            
+            collection_metadata = self._collection.metadata or {}
+            if not collection_metadata.get(_BACKFILL_MARKER):
+                await self._run_backfill(_BACKFILL_MARKER, self.backfill_timestamp_epoch, "numeric timestamps")
+            if not collection_metadata.get(_TYPES_BACKFILL_MARKER):
+                await self._run_backfill(_TYPES_BACKFILL_MARKER, self.backfill_metadata_types, "metadata types")
     
     async def add_memory(
         self, 
@@ -58,23 +142,18 @@ class VectorStore:
         await self.initialize()
         
         try:
-            # Prepare metadata (ChromaDB requires string values)
-            chroma_metadata = {}
-            for key, value in metadata.items():
-                if isinstance(value, (str, int, float, bool)):
-                    chroma_metadata[key] = str(value)
-                elif isinstance(value, list):
-                    chroma_metadata[key] = ','.join(str(v) for v in value)
-                else:
-                    chroma_metadata[key] = str(value)
+            chroma_metadata, value_types = self._encode_metadata(metadata)
             
-            self._collection.add(
+            await self._run(
+                self._collection.add,
                 ids=[memory_id],
                 embeddings=[embedding],
                 documents=[text],
                 metadatas=[chroma_metadata]
             )
             
+            self._record_types(value_types)
+            
             logger.debug(f"Added memory {memory_id} to vector store")
             return True
         
@@ -82,87 +161,290 @@ class VectorStore:
             logger.error(f"Failed to add memory to vector store: {str(e)}")
             raise ValueError(f"Failed to store memory: {str(e)}")
     
+    async def add_memories(
+        self,
+        memory_ids: List[str],
+        embeddings: List[List[float]],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> int:
+        """Write a batch of memories in one call.
+        
+        Uses upsert so replaying a batch that was already written is harmless.
+        """
+        await self.initialize()
+        
+        if not memory_ids:
+            return 0
+        
+        try:
+            encoded = [self._encode_metadata(metadata) for metadata in metadatas]
+            
+            await self._run(
+                self._collection.upsert,
+                ids=memory_ids,
+                embeddings=embeddings,
+                documents=texts,
+                metadatas=[chroma_metadata for chroma_metadata, _ in encoded]
+            )
+            
+            for _, value_types in encoded:
+                self._record_types(value_types)
+            
+            logger.debug(f"Added {len(memory_ids)} memories to vector store")
+            return len(memory_ids)
+        
+        except Exception as e:
+            logger.error(f"Failed to add memories to vector store: {str(e)}")
+            raise ValueError(f"Failed to store memories: {str(e)}")
+    
     async def search_memories(
         self,
         query_embedding: List[float],
         limit: int = 10,
         min_similarity: float = 0.5,
         user_filter: Optional[str] = None,
-        tag_filter: Optional[List[str]] = None
+        tag_filter: Optional[List[str]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        include_documents: bool = True
     ) -> List[Tuple[str, float, str, Dict[str, Any]]]:
         """Search for similar memories."""
+        results = await self.search_memories_batch(
+            query_embeddings=[query_embedding],
+            limit=limit,
+            min_similarity=min_similarity,
+            user_filter=user_filter,
+            tag_filter=tag_filter,
+            since=since,
+            until=until,
+            metadata_filters=metadata_filters,
+            include_documents=include_documents
+        )
+        return results[0]
+    
+    async def search_memories_batch(
+        self,
+        query_embeddings: List[List[float]],
+        limit: int = 10,
+        min_similarity: float = 0.5,
+        user_filter: Optional[str] = None,
+        tag_filter: Optional[List[str]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        include_documents: bool = True
+    ) -> List[List[Tuple[str, float, str, Dict[str, Any]]]]:
+        """Search for memories similar to each query embedding in a single query.
+        
+        Without ``include_documents`` no ciphertext is read and hits carry
+        ``None`` in place of the encrypted text.
+        """
         await self.initialize()
         
         try:
-            # Build where clause for filtering
-            where_clause = {}
-            if user_filter:
-                where_clause["user_id"] = user_filter
-            
-            if tag_filter:
-                # For tag filtering, we'll need to check if any of the tags match
-                # ChromaDB doesn't support array operations directly, so we'll filter post-query
-                pass
+            where_clause = self._build_search_where(user_filter, since, until, metadata_filters)
             
             # Perform the search
-            results = self._collection.query(
-                query_embeddings=[query_embedding],
+            results = await self._run(
+                self._collection.query,
+                query_embeddings=query_embeddings,
                 n_results=limit * 2,  # Get more to allow for filtering
-                where=where_clause if where_clause else None,
-                include=["documents", "metadatas", "distances"]
+                where=where_clause,
+                include=["documents", "metadatas", "distances"] if include_documents else ["metadatas", "distances"]
             )
             
-            # Process results
-            memories = []
-            if results['ids'] and results['ids'][0]:
-                for i, memory_id in enumerate(results['ids'][0]):
-                    distance = results['distances'][0][i] if results['distances'] else 0
+            # Metadata of memories hit by several queries is processed once
+            processed: Dict[str, Dict[str, Any]] = {}
+            
+            batch = []
+            for query_index in range(len(query_embeddings)):
+                ids = results['ids'][query_index] if results['ids'] else []
+                
+                # Process results
+                memories = []
+                for i, memory_id in enumerate(ids):
+                    distance = results['distances'][query_index][i] if results['distances'] else 0
                     # Convert distance to similarity score (closer to 0 = more similar)
                     similarity = 1.0 - min(distance, 1.0)
                     
                     if similarity < min_similarity:
                         continue
                     
-                    document = results['documents'][0][i] if results['documents'] else ""
-                    metadata = results['metadatas'][0][i] if results['metadatas'] else {}
+                    document = results['documents'][query_index][i] if results.get('documents') else None
                     
-                    # Convert metadata back from strings
-                    processed_metadata = self._process_metadata(metadata)
+                    if memory_id not in processed:
+                        metadata = results['metadatas'][query_index][i] if results['metadatas'] else {}
+                        # Convert metadata back from strings
+                        processed[memory_id] = self._process_metadata(metadata)
+                    processed_metadata = processed[memory_id]
                     
-                    # Filter by tags if specified
-                    if tag_filter:
-                        memory_tags = processed_metadata.get('tags', [])
-                        if isinstance(memory_tags, str):
-                            memory_tags = memory_tags.split(',')
-                        
-                        if not any(tag in memory_tags for tag in tag_filter):
-                            continue
+                    # ChromaDB doesn't support array operations, so tags are filtered post-query
+                    if not self._matches_tags(processed_metadata, tag_filter):
+                        continue
                     
                     memories.append((memory_id, similarity, document, processed_metadata))
+                
+                # Sort by similarity and limit results
+                memories.sort(key=lambda x: x[1], reverse=True)
+                batch.append(memories[:limit])
             
-            # Sort by similarity and limit results
-            memories.sort(key=lambda x: x[1], reverse=True)
-            memories = memories[:limit]
-            
-            logger.debug(f"Found {len(memories)} similar memories")
-            return memories
+            logger.debug(f"Found {sum(len(memories) for memories in batch)} similar memories for {len(batch)} queries")
+            return batch
         
         except Exception as e:
             logger.error(f"Failed to search memories: {str(e)}")
             raise ValueError(f"Failed to search memories: {str(e)}")
     
-    async def get_memory(self, memory_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
-        """Get a specific memory by ID."""
+    async def get_memories_by_ids(
+        self,
+        memory_ids: List[str],
+        query_embedding: List[float],
+        min_similarity: float = 0.5,
+        user_filter: Optional[str] = None,
+        tag_filter: Optional[List[str]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        include_documents: bool = True
+    ) -> List[Tuple[str, float, str, Dict[str, Any]]]:
+        """Fetch specific memories under the same filters as a search.
+        
+        Similarity to ``query_embedding`` is computed from the stored
+        embeddings, so results are comparable with ``search_memories``.
+        """
+        await self.initialize()
+        
+        if not memory_ids:
+            return []
+        
+        try:
+            results = await self._run(
+                self._collection.get,
+                ids=memory_ids,
+                where=self._build_search_where(user_filter, since, until, metadata_filters),
+                include=["documents", "metadatas", "embeddings"] if include_documents else ["metadatas", "embeddings"]
+            )
+            
+            if not results['ids']:
+                return []
+            
+            # Chroma's default space is squared L2 (see search_memories), so use
+            # the same distance-to-similarity mapping for comparable scores
+            query = np.asarray(query_embedding, dtype=np.float32)
+            embeddings = np.asarray(results['embeddings'], dtype=np.float32)
+            distances = np.sum((embeddings - query) ** 2, axis=1)
+            similarities = 1.0 - np.minimum(distances, 1.0)
+            
+            memories = []
+            for i, memory_id in enumerate(results['ids']):
+                similarity = float(similarities[i])
+                if similarity < min_similarity:
+                    continue
+                
+                processed_metadata = self._process_metadata(results['metadatas'][i] or {})
+                if not self._matches_tags(processed_metadata, tag_filter):
+                    continue
+                
+                document = results['documents'][i] if include_documents else None
+                memories.append((memory_id, similarity, document, processed_metadata))
+            
+            return memories
+        
+        except Exception as e:
+            logger.error(f"Failed to fetch memories by id: {str(e)}")
+            raise ValueError(f"Failed to fetch memories: {str(e)}")
+    
+    async def get_embeddings(self, memory_ids: List[str]) -> Dict[str, List[float]]:
+        """Get the stored embeddings for a set of memories."""
+        await self.initialize()
+        
+        if not memory_ids:
+            return {}
+        
+        try:
+            results = await self._run(self._collection.get, ids=memory_ids, include=["embeddings"])
+            return dict(zip(results['ids'], results['embeddings']))
+        
+        except Exception as e:
+            logger.error(f"Failed to get embeddings: {str(e)}")
+            raise ValueError(f"Failed to get embeddings: {str(e)}")
+    
+    async def iter_records(
+        self,
+        batch_size: int = 500,
+        where: Optional[Dict[str, Any]] = None,
+        include: Optional[List[str]] = None,
+        offset: int = 0
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Page through stored rows from ``offset`` on, yielding raw Chroma ``get`` results."""
+        await self.initialize()
+        
+        while True:
+            page = await self._run(
+                self._collection.get,
+                where=where,
+                limit=batch_size,
+                offset=offset,
+                include=include or ["documents", "metadatas"]
+            )
+            if not page['ids']:
+                break
+            
+            yield page
+            offset += len(page['ids'])
+    
+    async def iter_memories(
+        self,
+        batch_size: int = 1000,
+        user_filter: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None
+    ) -> AsyncIterator[Tuple[List[str], List[str], List[Dict[str, Any]], np.ndarray]]:
+        """Page through memories with their embeddings, optionally for one user and time range.
+        
+        Yields ids, encrypted texts, decoded metadata and a float32 embedding matrix.
+        """
+        await self.initialize()
+        
+        where = self._build_search_where(user_filter, since, until, None)
+        offset = 0
+        while True:
+            page = await self._run(
+                self._collection.get,
+                where=where,
+                limit=batch_size,
+                offset=offset,
+                include=["documents", "metadatas", "embeddings"]
+            )
+            if not page['ids']:
+                break
+            
+            yield (
+                page['ids'],
+                page['documents'],
+                [self._process_metadata(metadata or {}) for metadata in page['metadatas']],
+                np.asarray(page['embeddings'], dtype=np.float32)
+            )
+            offset += len(page['ids'])
+    
+    async def get_memory(
+        self,
+        memory_id: str,
+        include_document: bool = True
+    ) -> Optional[Tuple[Optional[str], Dict[str, Any]]]:
+        """Get a specific memory by ID; the document is ``None`` unless included."""
         await self.initialize()
         
         try:
             results = self._collection.get(
                 ids=[memory_id],
-                include=["documents", "metadatas"]
+                include=["documents", "metadatas"] if include_document else ["metadatas"]
             )
             
             if results['ids'] and results['ids'][0]:
-                document = results['documents'][0] if results['documents'] else ""
+                document = results['documents'][0] if results.get('documents') else None
                 metadata = results['metadatas'][0] if results['metadatas'] else {}
                 processed_metadata = self._process_metadata(metadata)
                 return document, processed_metadata
@@ -173,6 +455,152 @@ class VectorStore:
             logger.error(f"Failed to get memory {memory_id}: {str(e)}")
             return None
     
+    async def get_documents(self, memory_ids: List[str]) -> Dict[str, str]:
+        """Get the stored (encrypted) documents of a set of memories."""
+        await self.initialize()
+        
+        if not memory_ids:
+            return {}
+        
+        try:
+            results = await self._run(self._collection.get, ids=memory_ids, include=["documents"])
+            return dict(zip(results['ids'], results['documents']))
+        
+        except Exception as e:
+            logger.error(f"Failed to get documents: {str(e)}")
+            raise ValueError(f"Failed to get documents: {str(e)}")
+    
+    async def list_memories(
+        self,
+        user_filter: str,
+        limit: int = 50,
+        offset: int = 0,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        include_documents: bool = True
+    ) -> List[Tuple[str, Optional[str], Dict[str, Any]]]:
+        """List a user's memories, newest first.
+        
+        Ordering needs every matching row's timestamp, so metadata is read
+        for all of them but documents only for the requested page.
+        """
+        await self.initialize()
+        
+        try:
+            results = await self._run(
+                self._collection.get,
+                where=self._build_search_where(user_filter, since, until, None),
+                include=["metadatas"]
+            )
+            
+            rows = sorted(
+                zip(results['ids'], (metadata or {} for metadata in results['metadatas'])),
+                key=lambda row: row[1].get(TIMESTAMP_EPOCH_KEY, 0.0),
+                reverse=True
+            )[offset:offset + limit]
+            
+            documents = await self.get_documents([memory_id for memory_id, _ in rows]) if include_documents else {}
+            return [
+                (memory_id, documents.get(memory_id), self._process_metadata(metadata))
+                for memory_id, metadata in rows
+            ]
+        
+        except Exception as e:
+            logger.error(f"Failed to list memories: {str(e)}")
+            raise ValueError(f"Failed to list memories: {str(e)}")
+    
+    async def update_metadata(self, memory_id: str, metadata: Dict[str, Any]) -> bool:
+        """Update (merge) metadata fields of a stored memory."""
+        await self.initialize()
+        
+        try:
+            existing = self._collection.get(ids=[memory_id], include=["metadatas"])
+            if not existing['ids']:
+                return False
+            
+            chroma_metadata, value_types = self._merge_metadata(existing['metadatas'][0], metadata)
+            self._collection.update(ids=[memory_id], metadatas=[chroma_metadata])
+            self._record_types(value_types)
+            
+            logger.debug(f"Updated metadata of memory {memory_id}")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Failed to update memory {memory_id}: {str(e)}")
+            raise ValueError(f"Failed to update memory: {str(e)}")
+    
+    async def update_metadata_many(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """Update (merge) metadata fields of many stored memories in one write."""
+        await self.initialize()
+        if not updates:
+            return 0
+        
+        try:
+            existing = await self._run(self._collection.get, ids=list(updates), include=["metadatas"])
+            if not existing['ids']:
+                return 0
+            
+            chroma_metadatas = []
+            value_types: Dict[str, str] = {}
+            for memory_id, existing_metadata in zip(existing['ids'], existing['metadatas']):
+                chroma_metadata, types = self._merge_metadata(existing_metadata, updates[memory_id])
+                chroma_metadatas.append(chroma_metadata)
+                value_types.update(types)
+            
+            await self._run(self._collection.update, ids=existing['ids'], metadatas=chroma_metadatas)
+            self._record_types(value_types)
+            
+            logger.debug(f"Updated metadata of {len(existing['ids'])} memories")
+            return len(existing['ids'])
+        
+        except Exception as e:
+            logger.error(f"Failed to update memories: {str(e)}")
+            raise ValueError(f"Failed to update memories: {str(e)}")
+    
+    def _merge_metadata(
+        self,
+        existing_metadata: Optional[Dict[str, Any]],
+        metadata: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Encode a metadata update, keeping the JSON-encoding flags of fields it does not touch."""
+        chroma_metadata, value_types = self._encode_metadata(metadata)
+        
+        existing_metadata = existing_metadata or {}
+        encoded_keys = json.loads(existing_metadata.get(METADATA_TYPES_KEY) or "{}")
+        for key in metadata:
+            encoded_keys.pop(key, None)
+        encoded_keys.update(json.loads(chroma_metadata.get(METADATA_TYPES_KEY) or "{}"))
+        
+        # Chroma rejects None and merges updates, so an existing map is emptied, not dropped
+        if encoded_keys or METADATA_TYPES_KEY in existing_metadata:
+            chroma_metadata[METADATA_TYPES_KEY] = json.dumps(encoded_keys, sort_keys=True)
+        else:
+            chroma_metadata.pop(METADATA_TYPES_KEY, None)
+        return chroma_metadata, value_types
+    
+    async def replace_documents(self, memory_ids: List[str], documents: List[str]) -> int:
+        """Rewrite the stored documents of existing memories, keeping their embeddings."""
+        await self.initialize()
+        
+        try:
+            existing = await self._run(self._collection.get, ids=memory_ids, include=["embeddings"])
+            if not existing['ids']:
+                return 0
+            
+            # Chroma re-embeds documents updated without embeddings, so pass the stored ones
+            documents_by_id = dict(zip(memory_ids, documents))
+            await self._run(
+                self._collection.update,
+                ids=existing['ids'],
+                embeddings=existing['embeddings'],
+                documents=[documents_by_id[memory_id] for memory_id in existing['ids']]
+            )
+            return len(existing['ids'])
+        
+        except Exception as e:
+            logger.error(f"Failed to replace documents: {str(e)}")
+            raise ValueError(f"Failed to replace documents: {str(e)}")
+    
     async def delete_memory(self, memory_id: str) -> bool:
         """Delete a memory from the vector store."""
         await self.initialize()
@@ -186,6 +614,21 @@ class VectorStore:
             logger.error(f"Failed to delete memory {memory_id}: {str(e)}")
             return False
     
+    async def delete_memories(self, memory_ids: List[str]) -> int:
+        """Delete many memories from the vector store in one write."""
+        await self.initialize()
+        if not memory_ids:
+            return 0
+        
+        try:
+            await self._run(self._collection.delete, ids=memory_ids)
+            logger.debug(f"Deleted {len(memory_ids)} memories from vector store")
+            return len(memory_ids)
+        
+        except Exception as e:
+            logger.error(f"Failed to delete memories: {str(e)}")
+            raise ValueError(f"Failed to delete memories: {str(e)}")
+    
     async def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store."""
         await self.initialize()
@@ -202,16 +645,242 @@ class VectorStore:
             logger.error(f"Failed to get collection stats: {str(e)}")
             return {}
     
+    async def backfill_timestamp_epoch(self, batch_size: int = 500) -> int:
+        """Add the numeric timestamp field to rows stored before it existed."""
+        await self.initialize()
+        
+        updated = 0
+        async for page in self.iter_records(batch_size=batch_size, include=["metadatas"]):
+            update_ids = []
+            update_metadatas = []
+            for memory_id, metadata in zip(page['ids'], page['metadatas'] or []):
+                metadata = metadata or {}
+                if TIMESTAMP_EPOCH_KEY in metadata or not metadata.get('timestamp'):
+                    continue
+                try:
+                    epoch = to_epoch_seconds(datetime.fromisoformat(metadata['timestamp']))
+                except ValueError:
+                    logger.warning(f"Skipping epoch backfill for memory {memory_id}: bad timestamp")
+                    continue
+                update_ids.append(memory_id)
+                update_metadatas.append({TIMESTAMP_EPOCH_KEY: epoch})
+            
+            if update_ids:
+                await self._run(self._collection.update, ids=update_ids, metadatas=update_metadatas)
+                updated += len(update_ids)
+        
+        return updated
+    
+    async def backfill_metadata_types(self, batch_size: int = 500) -> int:
+        """Restore numbers and booleans that rows stored before native types hold as strings.
+        
+        Rows carrying a ``_ml_types`` entry were written with native types
+        and are skipped. Other rows cannot tell a stringified number from a
+        string that merely looks like one, so this runs once, before any
+        filter relies on the restored types.
+        """
+        await self.initialize()
+        
+        updated = 0
+        async for page in self.iter_records(batch_size=batch_size, include=["metadatas"]):
+            update_ids = []
+            update_metadatas = []
+            value_types: Dict[str, str] = {}
+            for memory_id, metadata in zip(page['ids'], page['metadatas'] or []):
+                metadata = metadata or {}
+                if METADATA_TYPES_KEY in metadata:
+                    continue
+                restored = {}
+                for key, value in metadata.items():
+                    if key in RESERVED_METADATA_KEYS or not isinstance(value, str):
+                        continue
+                    value = parse_legacy_scalar(value)
+                    if not isinstance(value, str):
+                        restored[key] = value
+                        value_types[key] = scalar_type_name(value)
+                if not restored:
+                    continue
+                update_ids.append(memory_id)
+                update_metadatas.append(restored)
+            
+            if update_ids:
+                await self._run(self._collection.update, ids=update_ids, metadatas=update_metadatas)
+                self._record_types(value_types)
+                updated += len(update_ids)
+        
+        return updated
+    
+    async def _run(self, function, **kwargs):
+        """Run a blocking Chroma call on the vector store executor."""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            get_vector_store_executor(),
+            lambda: function(**kwargs)
+        )
+    
+    async def _run_backfill(self, marker: str, backfill: Callable[[], Awaitable[int]], description: str):
+        """Run a backfill once per collection and record completion under ``marker``."""
+        if self._backfill_lock is None:
+            self._backfill_lock = asyncio.Lock()
+        
+        async with self._backfill_lock:
+            # Another request may have finished the backfill while we waited
+            self._collection = await self._run(
+                self._client.get_collection,
+                name=self.settings.chroma_collection_name
+            )
+            if (self._collection.metadata or {}).get(marker):
+                return
+            
+            logger.info(f"Backfilling {description} for existing memories")
+            try:
+                updated = await backfill()
+            except Exception as e:
+                # Leave the marker unset so the next start retries
+                logger.error(f"Failed to backfill {description}: {str(e)}")
+                return
+            
+            # Read after the backfill, which may have recorded new metadata types
+            collection_metadata = dict(self._collection.metadata or {})
+            collection_metadata[marker] = 1
+            await self._run(self._collection.modify, metadata=collection_metadata)
+            logger.info(f"Backfilled {description} for {updated} memories")
+    
+    def get_type_manifest(self) -> Dict[str, List[str]]:
+        """Get the value types seen so far for each user metadata key."""
+        return _type_manifests.get(self._manifest_key, {})
+    
+    @property
+    def _manifest_key(self) -> str:
+        """Key of this store's entry in the process-wide manifest registry."""
+        return f"{self._manifest_scope}:{self.settings.chroma_collection_name}"
+    
+    def _load_type_manifest(self):
+        """Load the type manifest stored in the collection metadata."""
+        raw_manifest = (self._collection.metadata or {}).get(_TYPE_MANIFEST_KEY)
+        stored = json.loads(raw_manifest) if raw_manifest else {}
+        
+        # Merge rather than replace so types recorded by this process survive
+        manifest = _type_manifests.setdefault(self._manifest_key, {})
+        for key, types in stored.items():
+            manifest[key] = sorted(set(manifest.get(key, [])) | set(types))
+    
+    def _record_types(self, value_types: Dict[str, str]):
+        """Persist any key/type pairs the manifest has not seen before."""
+        manifest = _type_manifests.setdefault(self._manifest_key, {})
+        new_types = {
+            key: type_name for key, type_name in value_types.items()
+            if type_name not in manifest.get(key, [])
+        }
+        if not new_types:
+            return
+        
+        for key, type_name in new_types.items():
+            manifest[key] = sorted(set(manifest.get(key, [])) | {type_name})
+        
+        collection_metadata = dict(self._collection.metadata or {})
+        collection_metadata[_TYPE_MANIFEST_KEY] = json.dumps(manifest, sort_keys=True)
+        self._collection.modify(metadata=collection_metadata)
+    
+    @staticmethod
+    def _encode_metadata(metadata: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Convert metadata to Chroma values, keeping scalars in their native type.
+        
+        Returns the Chroma metadata and the type of each user metadata value.
+        Lists and objects are stored as JSON strings and flagged in a per-row
+        ``_ml_types`` entry so they decode back to their original shape.
+        """
+        chroma_metadata = {}
+        value_types = {}
+        encoded_keys = {}
+        
+        for key, value in metadata.items():
+            if key == TIMESTAMP_EPOCH_KEY:
+                chroma_metadata[key] = float(value)
+            elif key == 'tags':
+                # Tags stay comma-joined for the post-query tag filter
+                if isinstance(value, (list, tuple)):
+                    chroma_metadata[key] = ','.join(str(v) for v in value)
+                else:
+                    chroma_metadata[key] = str(value)
+            elif isinstance(value, (str, int, float, bool)):
+                chroma_metadata[key] = value
+                value_types[key] = scalar_type_name(value)
+            else:
+                type_name = "list" if isinstance(value, (list, tuple)) else "json"
+                chroma_metadata[key] = json.dumps(value, default=str)
+                encoded_keys[key] = type_name
+                value_types[key] = type_name
+        
+        if encoded_keys:
+            chroma_metadata[METADATA_TYPES_KEY] = json.dumps(encoded_keys, sort_keys=True)
+        
+        for key in RESERVED_METADATA_KEYS:
+            value_types.pop(key, None)
+        
+        return chroma_metadata, value_types
+    
+    def _build_search_where(
+        self,
+        user_filter: Optional[str],
+        since: Optional[float],
+        until: Optional[float],
+        metadata_filters: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Build the where clause shared by searches and filtered lookups."""
+        conditions = []
+        if user_filter:
+            conditions.append({"user_id": user_filter})
+        
+        if since is not None:
+            conditions.append({TIMESTAMP_EPOCH_KEY: {"$gte": float(since)}})
+        
+        if until is not None:
+            conditions.append({TIMESTAMP_EPOCH_KEY: {"$lte": float(until)}})
+        
+        if metadata_filters:
+            conditions.extend(compile_filters(
+                metadata_filters,
+                self.get_type_manifest(),
+                reserved_keys=RESERVED_METADATA_KEYS
+            ))
+        
+        return self._build_where(conditions)
+    
+    @staticmethod
+    def _matches_tags(metadata: Dict[str, Any], tag_filter: Optional[List[str]]) -> bool:
+        """Check whether a memory carries any of the requested tags."""
+        if not tag_filter:
+            return True
+        
+        memory_tags = metadata.get('tags', [])
+        if isinstance(memory_tags, str):
+            memory_tags = memory_tags.split(',')
+        
+        return any(tag in memory_tags for tag in tag_filter)
+    
+    @staticmethod
+    def _build_where(conditions: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Combine single-field conditions into a Chroma where clause."""
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
+    
     def _process_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Process metadata from ChromaDB format back to original format."""
         processed = {}
+        encoded_keys = json.loads(metadata.get(METADATA_TYPES_KEY) or "{}")
         
         for key, value in metadata.items():
-            if key == 'tags' and isinstance(value, str):
+            if key == METADATA_TYPES_KEY:
+                continue
+            elif key == 'tags' and isinstance(value, str):
                 processed[key] = [tag.strip() for tag in value.split(',') if tag.strip()]
-            elif key == 'timestamp':
-                processed[key] = value  # Keep as string for now
+            elif key in encoded_keys and isinstance(value, str):
+                processed[key] = json.loads(value)
             else:
                 processed[key] = value
         
-        return processed
\ No newline at end of file
+        return processed
@@ -0,0 +1,196 @@
+"""Append-only write-ahead log with group-committed fsyncs."""
+
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+LOG_FILE = "ingest.wal"
+CHECKPOINT_FILE = "checkpoint.json"
+DEAD_LETTER_FILE = "dead_letter.wal"
+
+
+class WriteAheadLog:
+    """Durable log of accepted-but-unapplied records.
+
+    Records are JSON lines tagged with a sequence number. Concurrent
+    ``append`` calls are group-committed: while one fsync is running, new
+    records accumulate and are flushed together by the next one. A
+    checkpoint stores the highest sequence number that has been applied;
+    once every written record is applied the log file is truncated.
+    Records that cannot be applied are appended to a separate dead-letter
+    file, which is never truncated, before the checkpoint moves past them.
+    All file I/O runs on a single dedicated thread, so writes, checkpoints
+    and truncation are strictly ordered.
+    """
+
+    def __init__(self, directory: str):
+        """Open (or create) the log in ``directory``."""
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._log_path = os.path.join(directory, LOG_FILE)
+        self._checkpoint_path = os.path.join(directory, CHECKPOINT_FILE)
+        self._dead_letter_path = os.path.join(directory, DEAD_LETTER_FILE)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wal")
+
+        self._checkpoint_seq = self._read_checkpoint()
+        self._discard_torn_tail()
+        self._last_written_seq = max(
+            [self._checkpoint_seq] + [record["seq"] for record in self._read_records()]
+        )
+        self._next_seq = self._last_written_seq + 1
+        self._file = open(self._log_path, "ab")
+
+        self._pending: List[Tuple[bytes, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._fsyncs = 0
+        self._records_written = 0
+        self._dead_lettered = 0
+
+    async def append(self, record: Dict[str, Any]) -> int:
+        """Durably append a record, returning its sequence number."""
+        seq = self._next_seq
+        self._next_seq += 1
+
+        line = (json.dumps({**record, "seq": seq}, separators=(",", ":")) + "\n").encode("utf-8")
+        future = asyncio.get_event_loop().create_future()
+        self._pending.append((line, future))
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+
+        await future
+        return seq
+
+    def replay(self) -> List[Dict[str, Any]]:
+        """Get the records written after the last checkpoint, in order."""
+        records = [
+            record for record in self._read_records()
+            if record["seq"] > self._checkpoint_seq
+        ]
+        return sorted(records, key=lambda record: record["seq"])
+
+    async def checkpoint(self, seq: int):
+        """Mark every record up to ``seq`` as applied."""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self._executor, self._checkpoint_sync, seq)
+
+    async def dead_letter(self, records: List[Dict[str, Any]]):
+        """Durably set aside records that could not be applied."""
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(self._executor, self._dead_letter_sync, records)
+
+    def read_dead_letters(self) -> List[Dict[str, Any]]:
+        """Get every dead-lettered record."""
+        return self._read_records(self._dead_letter_path)
+
+    def close(self):
+        """Close the log file and its I/O thread."""
+        self._executor.submit(self._file.close).result()
+        self._executor.shutdown(wait=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get log size and group-commit statistics."""
+        return {
+            "path": self._log_path,
+            "bytes": os.path.getsize(self._log_path) if os.path.exists(self._log_path) else 0,
+            "checkpoint_seq": self._checkpoint_seq,
+            "last_written_seq": self._last_written_seq,
+            "records_written": self._records_written,
+            "fsyncs": self._fsyncs,
+            "dead_lettered": self._dead_lettered,
+            "records_per_fsync": round(self._records_written / self._fsyncs, 2) if self._fsyncs else 0.0
+        }
+
+    async def _flush(self):
+        """Write and fsync everything appended so far, repeating until idle."""
+        loop = asyncio.get_event_loop()
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                await loop.run_in_executor(self._executor, self._write_sync, batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} records to the ingestion log: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    def _write_sync(self, batch: List[Tuple[bytes, asyncio.Future]]):
+        """Append lines and fsync them once (runs on the log thread)."""
+        self._file.write(b"".join(line for line, _ in batch))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        self._last_written_seq = json.loads(batch[-1][0])["seq"]
+        self._fsyncs += 1
+        self._records_written += len(batch)
+
+    def _dead_letter_sync(self, records: List[Dict[str, Any]]):
+        """Append records to the dead-letter file and fsync it (runs on the log thread)."""
+        with open(self._dead_letter_path, "ab") as handle:
+            for record in records:
+                handle.write((json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8"))
+            handle.flush()
+            os.fsync(handle.fileno())
+        self._dead_lettered += len(records)
+
+    def _checkpoint_sync(self, seq: int):
+        """Persist the checkpoint and truncate a fully applied log (runs on the log thread)."""
+        if seq <= self._checkpoint_seq:
+            return
+
+        temp_path = f"{self._checkpoint_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump({"seq": seq}, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, self._checkpoint_path)
+        self._checkpoint_seq = seq
+
+        if seq >= self._last_written_seq:
+            self._file.truncate(0)
+            os.fsync(self._file.fileno())
+
+    def _read_checkpoint(self) -> int:
+        """Read the last applied sequence number."""
+        if not os.path.exists(self._checkpoint_path):
+            return 0
+        with open(self._checkpoint_path, "r", encoding="utf-8") as handle:
+            return int(json.load(handle).get("seq", 0))
+
+    def _discard_torn_tail(self):
+        """Cut a partial last line left by a crash so new records start on a fresh line."""
+        if not os.path.exists(self._log_path):
+            return
+
+        with open(self._log_path, "r+b") as handle:
+            content = handle.read()
+            if not content or content.endswith(b"\n"):
+                return
+            handle.truncate(content.rfind(b"\n") + 1)
+            logger.warning("Discarded a partially written record at the end of the ingestion log")
+
+    def _read_records(self, path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Read every complete record in the log file (or another file of records)."""
+        path = path or self._log_path
+        if not os.path.exists(path):
+            return []
+
+        records = []
+        with open(path, "rb") as handle:
+            for line_number, line in enumerate(handle, start=1):
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Skip a corrupt line rather than blocking replay of the rest
+                    logger.warning(f"Skipping unreadable ingestion log line {line_number}")
+        return records
@@ -1,6 +1,19 @@
 """Utility modules for MemoryLink backend."""
 
-from .encryption import EncryptionService
+from .encryption import EncryptionService, DerivedKeyCache, get_derived_key_cache
+from .compression import Compressor, CompressionDictionaries, build_dictionary
 from .logger import get_logger
+from .cache import LRUCache
+from .timing import StageTimer
 
-__all__ = ["EncryptionService", "get_logger"]
\ No newline at end of file
+__all__ = [
+    "EncryptionService",
+    "DerivedKeyCache",
+    "get_derived_key_cache",
+    "Compressor",
+    "CompressionDictionaries",
+    "build_dictionary",
+    "get_logger",
+    "LRUCache",
+    "StageTimer"
+]
\ No newline at end of file
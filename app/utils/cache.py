@@ -0,0 +1,103 @@
+"""In-process caching utilities."""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with hit/miss statistics.
+
+    Besides the entry count, the cache can be bounded by the total of the
+    sizes passed to ``set``; entries are evicted until both limits hold.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: Optional[int] = None):
+        """Initialize an empty cache holding at most ``max_entries`` items."""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Get a value and mark it as recently used."""
+        with self._lock:
+            if key not in self._entries:
+                self._misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return self._entries[key]
+
+    def peek(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Get a value without touching recency or statistics."""
+        with self._lock:
+            return self._entries.get(key, default)
+
+    def set(self, key: Hashable, value: Any, size: int = 0):
+        """Store a value, evicting the least recently used entries if full.
+
+        Values larger than ``max_bytes`` on their own are not stored.
+        """
+        with self._lock:
+            self._discard(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self._evictions += 1
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Remove a value from the cache."""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            value = self._entries[key]
+            self._discard(key)
+            return value
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        """Get the number of cached entries."""
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit-rate statistics."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _discard(self, key: Hashable):
+        """Remove an entry and its size; the caller holds the lock."""
+        if key in self._entries:
+            del self._entries[key]
+            self._bytes -= self._sizes.pop(key, 0)
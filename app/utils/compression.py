@@ -0,0 +1,252 @@
+"""Compression of memory plaintexts before encryption."""
+
+import hashlib
+import os
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+from .logger import get_logger
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; zlib is always available
+    zstandard = None
+
+logger = get_logger(__name__)
+
+CODECS = ("off", "zlib", "zstd")
+CODEC_ZLIB = 0x01
+CODEC_ZSTD = 0x02
+
+DICTIONARY_ID_SIZE = 4
+NO_DICTIONARY = bytes(DICTIONARY_ID_SIZE)
+ACTIVE_FILE = "ACTIVE"
+
+# Deflate only looks back 32KB, so longer preset dictionaries are wasted
+_ZLIB_WINDOW = 32 * 1024
+
+
+def dictionary_id(dictionary: bytes) -> bytes:
+    """Get the short id a dictionary is referenced by in ciphertext headers."""
+    return hashlib.sha256(dictionary).digest()[:DICTIONARY_ID_SIZE]
+
+
+def build_dictionary(samples: Iterable[bytes], size: int, codec: str = "zlib") -> bytes:
+    """Build a compression dictionary from sample plaintexts.
+
+    zstd trains a real dictionary. zlib only takes a preset window, so it
+    gets the sample corpus's most frequent words, least frequent first,
+    since deflate finds matches near the end of the window cheapest.
+    """
+    samples = [sample for sample in samples if sample]
+    if not samples:
+        raise ValueError("No samples to build a dictionary from")
+
+    if codec == "zstd" and zstandard is not None:
+        return zstandard.train_dictionary(size, samples).as_bytes()
+
+    counts = Counter(word for sample in samples for word in sample.split() if len(word) > 2)
+    dictionary = b""
+    for word, count in counts.most_common():
+        if count < 2 or len(dictionary) + len(word) + 1 > min(size, _ZLIB_WINDOW):
+            break
+        dictionary = word + b" " + dictionary
+    if not dictionary:
+        raise ValueError("Samples share too little text for a dictionary")
+    return dictionary
+
+
+class CompressionDictionaries:
+    """Dictionaries stored as ``<id>.dict`` files in a directory.
+
+    Dictionaries are never removed, so values compressed with an older one
+    keep decompressing; ``ACTIVE`` names the one used for new values.
+    Unknown ids are looked up on disk again, which lets processes sharing
+    the directory pick up dictionaries trained elsewhere.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """Load the dictionaries in ``directory``, if any."""
+        self.directory = directory
+        self._dictionaries: Dict[bytes, bytes] = {}
+        self._active_id: Optional[bytes] = None
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        """Re-read the directory."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+
+        with self._lock:
+            for name in os.listdir(self.directory):
+                if not name.endswith(".dict"):
+                    continue
+                with open(os.path.join(self.directory, name), "rb") as f:
+                    dictionary = f.read()
+                self._dictionaries[dictionary_id(dictionary)] = dictionary
+
+            active_path = os.path.join(self.directory, ACTIVE_FILE)
+            if os.path.exists(active_path):
+                with open(active_path) as f:
+                    active_id = bytes.fromhex(f.read().strip())
+                if active_id in self._dictionaries:
+                    self._active_id = active_id
+
+    def get(self, dict_id: bytes) -> bytes:
+        """Get a dictionary by id."""
+        dictionary = self._dictionaries.get(dict_id)
+        if dictionary is None:
+            self.reload()
+            dictionary = self._dictionaries.get(dict_id)
+        if dictionary is None:
+            raise ValueError(f"Unknown compression dictionary: {dict_id.hex()}")
+        return dictionary
+
+    def active(self) -> Optional[Tuple[bytes, bytes]]:
+        """Get the id and contents of the dictionary for new values, if any."""
+        active_id = self._active_id
+        if active_id is None:
+            return None
+        return active_id, self._dictionaries[active_id]
+
+    def add(self, dictionary: bytes, activate: bool = True) -> bytes:
+        """Store a dictionary, optionally making it active; returns its id."""
+        dict_id = dictionary_id(dictionary)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._write(f"{dict_id.hex()}.dict", dictionary)
+            if activate:
+                self._write(ACTIVE_FILE, dict_id.hex().encode("ascii"))
+
+        with self._lock:
+            self._dictionaries[dict_id] = dictionary
+            if activate:
+                self._active_id = dict_id
+        return dict_id
+
+    def _write(self, name: str, data: bytes):
+        """Atomically write a file in the directory."""
+        path = os.path.join(self.directory, name)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def get_stats(self) -> Dict[str, object]:
+        """Get the stored and active dictionaries."""
+        with self._lock:
+            return {
+                "dictionaries": len(self._dictionaries),
+                "active": self._active_id.hex() if self._active_id else None
+            }
+
+
+class Compressor:
+    """Compresses plaintexts that are long enough to benefit.
+
+    Decompression works whatever ``codec`` is set to, so values written
+    before compression was switched off keep decrypting.
+    """
+
+    def __init__(
+        self,
+        codec: str = "off",
+        min_bytes: int = 512,
+        level: int = 6,
+        dictionaries: Optional[CompressionDictionaries] = None
+    ):
+        """Initialize the compressor."""
+        if codec not in CODECS:
+            raise ValueError(f"Unsupported compression codec: {codec}")
+        if codec == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed; compressing with zlib instead")
+            codec = "zlib"
+
+        self.codec = codec
+        self.min_bytes = min_bytes
+        self.level = level
+        self.dictionaries = dictionaries or CompressionDictionaries()
+        self._lock = threading.Lock()
+        self._compressed = 0
+        self._skipped = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether new values are compressed."""
+        return self.codec != "off"
+
+    def compress(self, data: bytes) -> Optional[Tuple[int, bytes, bytes]]:
+        """Compress data, returning the codec byte, dictionary id and output.
+
+        Returns ``None`` when the data is under the threshold or does not
+        shrink, in which case it should be stored as is.
+        """
+        if not self.enabled or len(data) < self.min_bytes:
+            return None
+
+        active = self.dictionaries.active()
+        dict_id, dictionary = active if active else (NO_DICTIONARY, None)
+
+        if self.codec == "zstd":
+            codec_byte = CODEC_ZSTD
+            compressed = self._zstd_compressor(dictionary).compress(data)
+        else:
+            codec_byte = CODEC_ZLIB
+            if dictionary:
+                dictionary = dictionary[-_ZLIB_WINDOW:]
+                compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15, zdict=dictionary)
+            else:
+                compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+            compressed = compressor.compress(data) + compressor.flush()
+
+        # The codec byte and dictionary id cost five bytes of header
+        shrunk = len(compressed) + 1 + DICTIONARY_ID_SIZE < len(data)
+        with self._lock:
+            if shrunk:
+                self._compressed += 1
+                self._bytes_in += len(data)
+                self._bytes_out += len(compressed)
+            else:
+                self._skipped += 1
+        return (codec_byte, dict_id, compressed) if shrunk else None
+
+    def decompress(self, codec_byte: int, dict_id: bytes, data: bytes) -> bytes:
+        """Reverse ``compress``."""
+        dictionary = self.dictionaries.get(dict_id) if dict_id != NO_DICTIONARY else None
+
+        if codec_byte == CODEC_ZLIB:
+            if dictionary:
+                decompressor = zlib.decompressobj(-15, zdict=dictionary[-_ZLIB_WINDOW:])
+            else:
+                decompressor = zlib.decompressobj(-15)
+            return decompressor.decompress(data) + decompressor.flush()
+
+        if codec_byte == CODEC_ZSTD:
+            if zstandard is None:
+                raise ValueError("zstandard is required to decompress this value")
+            dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+
+        raise ValueError(f"Unsupported compression codec: {codec_byte}")
+
+    def _zstd_compressor(self, dictionary: Optional[bytes]):
+        """Create a zstd compressor; instances are not safe to share between threads."""
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdCompressor(level=self.level, dict_data=dict_data, write_content_size=True)
+
+    def get_stats(self) -> Dict[str, object]:
+        """Get compression counts and the overall ratio."""
+        with self._lock:
+            return {
+                "codec": self.codec,
+                "min_bytes": self.min_bytes,
+                "compressed": self._compressed,
+                "skipped": self._skipped,
+                "ratio": round(self._bytes_out / self._bytes_in, 3) if self._bytes_in else None,
+                **self.dictionaries.get_stats()
+            }
+
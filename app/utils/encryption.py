@@ -1,22 +1,217 @@
 """Encryption utilities for secure data storage."""
 
 import base64
+import hashlib
+import hmac
+import os
 import secrets
-from typing import str as String
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from .compression import Compressor, DICTIONARY_ID_SIZE
+
+# Compact ciphertexts are the prefix plus unpadded urlsafe base64 of a format
+# byte followed by the raw token; "~" never occurs in legacy values.
+COMPACT_PREFIX = "~"
+FORMAT_FERNET = 0x01
+FORMAT_AES_GCM = 0x02
+# AES-GCM over a compressed plaintext; the payload starts with the codec byte
+# and dictionary id, which are authenticated along with the associated data
+FORMAT_AES_GCM_COMPRESSED = 0x03
+# Wraps any other format with the id of the key it was written under:
+# key id, inner format byte, inner payload
+FORMAT_KEYED = 0x04
+# Like FORMAT_KEYED, but naming a per-user data key instead of a master key
+FORMAT_USER_KEY = 0x05
+
+CIPHERS = ("aes-gcm", "fernet")
+NONCE_SIZE = 12
+KEY_ID_SIZE = 4
+DATA_KEY_ID_SIZE = 8
+
+# Legacy values base64-encode a Fernet token, which always starts "gAAAAA"
+LEGACY_PREFIX = "Z0FBQUFB"
+
+
+class _NonceSequence:
+    """Source of unique 96-bit AES-GCM nonces.
+    
+    A nonce is a random 32-bit prefix followed by a 64-bit counter that
+    starts at a random value. Forked children draw fresh values, so worker
+    processes sharing a key never replay each other's nonces.
+    """
+    
+    def __init__(self):
+        """Initialize with random state."""
+        self.reset()
+    
+    def reset(self):
+        """Start over with a new lock and random state, e.g. in a forked child."""
+        self._lock = threading.Lock()
+        self.reseed()
+    
+    def reseed(self):
+        """Draw a new prefix and counter start."""
+        self._prefix = secrets.token_bytes(4)
+        self._counter = secrets.randbits(64)
+    
+    def take(self, count: int) -> List[bytes]:
+        """Reserve ``count`` consecutive nonces."""
+        with self._lock:
+            if self._counter + count >= 1 << 64:
+                self.reseed()
+            start = self._counter
+            self._counter += count
+            prefix = self._prefix
+        return [prefix + (start + offset).to_bytes(8, "big") for offset in range(count)]
+
+
+_nonce_sequence = _NonceSequence()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_nonce_sequence.reset)
+
+
+class DerivedKeyCache:
+    """Process-wide cache of PBKDF2-derived keys.
+    
+    Entries are keyed by a SHA-256 fingerprint of the key material, so the
+    configured key itself is never used as a dictionary key. Each distinct
+    key is derived once; ``prederive`` lets startup pay that cost before
+    the first request does.
+    """
+    
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._keys: Dict[bytes, bytes] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._derivations = 0
+        self._derivation_ms = 0.0
+        self._last_derivation_ms = None
+    
+    def get(self, key: Union[str, bytes]) -> bytes:
+        """Get the derived key for some key material, deriving it on first use."""
+        if isinstance(key, str):
+            key = key.encode()
+        fingerprint = hashlib.sha256(b"memorylink-kdf:" + key).digest()
+        
+        with self._lock:
+            derived = self._keys.get(fingerprint)
+            if derived is not None:
+                self._hits += 1
+                return derived
+            
+            # Derive under the lock so concurrent first uses share one derivation
+            start_time = time.perf_counter()
+            derived = EncryptionService._derive_key(key)
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            
+            self._keys[fingerprint] = derived
+            self._derivations += 1
+            self._derivation_ms += elapsed_ms
+            self._last_derivation_ms = round(elapsed_ms, 2)
+            return derived
+    
+    def prederive(self, key: Union[str, bytes]):
+        """Derive a key ahead of its first use."""
+        self.get(key)
+    
+    def clear(self):
+        """Forget every derived key."""
+        with self._lock:
+            self._keys.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get derivation counts and timings."""
+        with self._lock:
+            return {
+                "keys": len(self._keys),
+                "hits": self._hits,
+                "derivations": self._derivations,
+                "derivation_ms_total": round(self._derivation_ms, 2),
+                "last_derivation_ms": self._last_derivation_ms
+            }
+
+
+@lru_cache()
+def get_derived_key_cache() -> DerivedKeyCache:
+    """Get the process-wide derived-key cache."""
+    return DerivedKeyCache()
+
+
+def _subkey(master_key: bytes, purpose: str) -> bytes:
+    """Derive an independent key for some purpose from a master key."""
+    return hmac.new(master_key, f"memorylink:{purpose}".encode('utf-8'), hashlib.sha256).digest()
+
+
+class _KeyVersion:
+    """The ciphers for one key in the keyring."""
+    
+    def __init__(self, key: Union[str, bytes]):
+        """Derive the ciphers and the id stored in ciphertext headers."""
+        self.master_key = get_derived_key_cache().get(key)
+        self.key_id = hashlib.sha256(b"memorylink-key-id:" + self.master_key).digest()[:KEY_ID_SIZE]
+        self.fernet = Fernet(base64.urlsafe_b64encode(self.master_key))
+        self.gcm = AESGCM(_subkey(self.master_key, "aes-256-gcm"))
 
 
 class EncryptionService:
     """Service for encrypting and decrypting memory content."""
     
-    def __init__(self, key: String):
-        """Initialize encryption service with key."""
-        self._cipher_suite = self._create_cipher_suite(key)
+    def __init__(
+        self,
+        key: str,
+        cipher: str = "aes-gcm",
+        compressor: Optional[Compressor] = None,
+        previous_keys: Optional[List[str]] = None,
+        data_keys: Optional[Any] = None,
+        index_key: Optional[str] = None
+    ):
+        """Initialize encryption service with key.
+        
+        ``cipher`` picks the format new values are written in; values in
+        every format keep decrypting. Under AES-GCM, ``compressor`` shrinks
+        long plaintexts before they are encrypted. ``previous_keys``
+        (newest first) are retired keys that values may still be under.
+        ``data_keys`` (e.g. a ``UserKeyStore``) supplies per-user keys via
+        ``for_user`` and ``get``; values written for a user are sealed
+        under that user's key. Index subkeys (blinding, content hashes)
+        derive from ``index_key`` when given, so rotating the encryption
+        key leaves blinded indexes valid; otherwise they follow the current
+        key and indexes must be rebuilt after a rotation.
+        """
+        if cipher not in CIPHERS:
+            raise ValueError(f"Unsupported cipher: {cipher}")
+        
+        self._current = _KeyVersion(key)
+        self._keys = [self._current] + [_KeyVersion(previous) for previous in previous_keys or []]
+        self._keys_by_id = {version.key_id: version for version in reversed(self._keys)}
+        
+        self._master_key = get_derived_key_cache().get(index_key) if index_key else self._current.master_key
+        self._cipher_suite = self._current.fernet
+        self._gcm = self._current.gcm
+        self._aead = self._gcm if cipher == "aes-gcm" else None
+        self.compressor = compressor or Compressor()
+        self.data_keys = data_keys
+    
+    @property
+    def key_id(self) -> bytes:
+        """The id of the key new values are written under."""
+        return self._current.key_id
     
-    def _create_cipher_suite(self, key: String) -> Fernet:
-        """Create cipher suite from key."""
+    @property
+    def index_key_id(self) -> str:
+        """Fingerprint of the key index subkeys derive from, stored with each index."""
+        return hashlib.sha256(b"memorylink-index-key-id:" + self._master_key).hexdigest()[:16]
+    
+    @staticmethod
+    def _derive_key(key: str) -> bytes:
+        """Derive 32 bytes of key material from the configured key."""
         if isinstance(key, str):
             key = key.encode()
         
@@ -28,11 +223,18 @@ class EncryptionService:
             salt=salt,
             iterations=100000,
         )
-        derived_key = base64.urlsafe_b64encode(kdf.derive(key))
-        return Fernet(derived_key)
+        return kdf.derive(key)
+    
+    def derive_subkey(self, purpose: str) -> bytes:
+        """Derive an independent key for a non-encryption purpose (e.g. blinding)."""
+        return _subkey(self._master_key, purpose)
     
-    def encrypt(self, data: String) -> String:
-        """Encrypt string data."""
+    def encrypt(self, data: str, associated_data: Optional[str] = None, user_id: Optional[str] = None) -> str:
+        """Encrypt string data, binding it to ``associated_data`` (e.g. the memory id).
+        
+        Fernet has no associated data or per-user keys, so both are ignored
+        under that cipher.
+        """
         if not data:
             return data
         
@@ -40,24 +242,279 @@ class EncryptionService:
             if isinstance(data, str):
                 data = data.encode('utf-8')
             
-            encrypted_data = self._cipher_suite.encrypt(data)
-            return base64.urlsafe_b64encode(encrypted_data).decode('utf-8')
+            if self._aead is None:
+                token = self._cipher_suite.encrypt(data)
+                return self._wrap(FORMAT_FERNET, base64.urlsafe_b64decode(token))
+            
+            return self._seal(data, associated_data, _nonce_sequence.take(1)[0], user_id)
         
         except Exception as e:
             raise ValueError(f"Encryption failed: {str(e)}")
     
-    def decrypt(self, encrypted_data: String) -> String:
-        """Decrypt string data."""
+    def decrypt(self, encrypted_data: str, associated_data: Optional[str] = None) -> str:
+        """Decrypt string data in any supported format."""
         if not encrypted_data:
             return encrypted_data
         
         try:
-            encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode('utf-8'))
-            decrypted_data = self._cipher_suite.decrypt(encrypted_bytes)
-            return decrypted_data.decode('utf-8')
+            return self._open(encrypted_data, associated_data)
         
         except Exception as e:
-            raise ValueError(f"Decryption failed: {str(e)}")
+            # Authentication failures carry no message of their own
+            raise ValueError(f"Decryption failed: {str(e) or type(e).__name__}")
+    
+    def encrypt_many(
+        self,
+        values: List[str],
+        associated_data: Optional[List[str]] = None,
+        user_ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Encrypt several strings, each bound to the matching associated data."""
+        if associated_data is None:
+            associated_data = [None] * len(values)
+        if user_ids is None:
+            user_ids = [None] * len(values)
+        if self._aead is None:
+            return [self.encrypt(value, aad) for value, aad in zip(values, associated_data)]
+        
+        try:
+            nonces = _nonce_sequence.take(len(values))
+            return [
+                self._seal(value.encode('utf-8'), aad, nonce, user_id) if value else value
+                for value, aad, nonce, user_id in zip(values, associated_data, nonces, user_ids)
+            ]
+        
+        except Exception as e:
+            raise ValueError(f"Encryption failed: {str(e)}")
+    
+    def decrypt_many(
+        self,
+        encrypted_values: List[str],
+        associated_data: Optional[List[str]] = None
+    ) -> List[Optional[str]]:
+        """Decrypt several values; entries that fail to decrypt come back as ``None``."""
+        if associated_data is None:
+            associated_data = [None] * len(encrypted_values)
+        
+        plaintexts = []
+        for encrypted_data, aad in zip(encrypted_values, associated_data):
+            if not encrypted_data:
+                plaintexts.append(encrypted_data)
+                continue
+            try:
+                plaintexts.append(self._open(encrypted_data, aad))
+            except Exception:
+                plaintexts.append(None)
+        return plaintexts
+    
+    def reencrypt_many(
+        self,
+        encrypted_values: List[str],
+        associated_data: Optional[List[str]] = None,
+        user_ids: Optional[List[str]] = None
+    ) -> List[Optional[str]]:
+        """Re-encrypt several values under the current key; failures come back as ``None``."""
+        if associated_data is None:
+            associated_data = [None] * len(encrypted_values)
+        if user_ids is None:
+            user_ids = [None] * len(encrypted_values)
+        
+        plaintexts = self.decrypt_many(encrypted_values, associated_data)
+        readable = [index for index, plaintext in enumerate(plaintexts) if plaintext is not None]
+        reencrypted: List[Optional[str]] = [None] * len(encrypted_values)
+        for index, value in zip(readable, self.encrypt_many(
+            [plaintexts[index] for index in readable],
+            [associated_data[index] for index in readable],
+            [user_ids[index] for index in readable]
+        )):
+            reencrypted[index] = value
+        return reencrypted
+    
+    def is_current(self, encrypted_data: str, user_id: Optional[str] = None) -> bool:
+        """Whether a stored value is already under the key it would be written with now.
+        
+        Values under a data key always are: rotating the master key rewraps
+        the data keys rather than the values.
+        """
+        if not encrypted_data:
+            return True
+        if not encrypted_data.startswith(COMPACT_PREFIX):
+            return False
+        
+        try:
+            outer_format, raw = self._unpack(encrypted_data)
+            if outer_format == FORMAT_USER_KEY:
+                return True
+            if user_id is not None and self.data_keys is not None and self._aead is not None:
+                return False
+            return self._split_keyed(outer_format, raw)[0] == self._current.key_id
+        except Exception:
+            return False
+    
+    def wrap_key(self, key: bytes, context: str) -> str:
+        """Encrypt a data key under the current master key, bound to ``context``."""
+        try:
+            nonce = _nonce_sequence.take(1)[0]
+            return self._wrap(FORMAT_AES_GCM, nonce + self._gcm.encrypt(nonce, key, context.encode('utf-8')))
+        
+        except Exception as e:
+            raise ValueError(f"Key wrap failed: {str(e)}")
+    
+    def unwrap_key(self, wrapped_key: str, context: str) -> bytes:
+        """Decrypt a data key wrapped by ``wrap_key`` under any key in the ring."""
+        try:
+            key_id, format_byte, payload = self._parse(wrapped_key)
+            key = self._keys_by_id.get(key_id)
+            if key is None or format_byte != FORMAT_AES_GCM:
+                raise ValueError(f"Unknown key version: {key_id.hex() if key_id else None}")
+            return key.gcm.decrypt(payload[:NONCE_SIZE], payload[NONCE_SIZE:], context.encode('utf-8'))
+        
+        except Exception as e:
+            raise ValueError(f"Key unwrap failed: {str(e) or type(e).__name__}")
+    
+    def _seal(
+        self,
+        data: bytes,
+        associated_data: Optional[str],
+        nonce: bytes,
+        user_id: Optional[str] = None
+    ) -> str:
+        """Encrypt bytes with AES-GCM under a fresh nonce, compressing them first if worthwhile."""
+        if user_id is not None and self.data_keys is not None:
+            data_key_id, aead = self.data_keys.for_user(user_id)
+            key_header = bytes([FORMAT_USER_KEY]) + data_key_id
+        else:
+            aead, key_header = self._aead, None
+        
+        aad = associated_data.encode('utf-8') if associated_data else None
+        compressed = self.compressor.compress(data)
+        if compressed is None:
+            return self._wrap(FORMAT_AES_GCM, nonce + aead.encrypt(nonce, data, aad), key_header)
+        
+        codec_byte, dict_id, data = compressed
+        header = bytes([codec_byte]) + dict_id
+        sealed = aead.encrypt(nonce, data, bytes([FORMAT_AES_GCM_COMPRESSED]) + header + (aad or b""))
+        return self._wrap(FORMAT_AES_GCM_COMPRESSED, header + nonce + sealed, key_header)
+    
+    def _wrap(self, format_byte: int, payload: bytes, key_header: Optional[bytes] = None) -> str:
+        """Pack a payload tagged with the key it is under, by default the current master key."""
+        if key_header is None:
+            key_header = bytes([FORMAT_KEYED]) + self._current.key_id
+        return self._pack(key_header[0], key_header[1:] + bytes([format_byte]) + payload)
+    
+    def _open(self, encrypted_data: str, associated_data: Optional[str]) -> str:
+        """Decrypt a compact or legacy value."""
+        if not encrypted_data.startswith(COMPACT_PREFIX):
+            token = base64.urlsafe_b64decode(encrypted_data.encode('utf-8'))
+            return self._with_any_key(lambda key: key.fernet.decrypt(token).decode('utf-8'))
+        
+        outer_format, raw = self._unpack(encrypted_data)
+        if outer_format == FORMAT_USER_KEY:
+            return self._open_with_data_key(raw, associated_data)
+        
+        key_id, format_byte, payload = self._split_keyed(outer_format, raw)
+        if key_id is None:
+            # Written before ciphertexts carried key ids
+            return self._with_any_key(
+                lambda key: self._open_payload(key.gcm, key.fernet, format_byte, payload, associated_data)
+            )
+        
+        key = self._keys_by_id.get(key_id)
+        if key is None:
+            raise ValueError(f"Unknown key version: {key_id.hex()}")
+        return self._open_payload(key.gcm, key.fernet, format_byte, payload, associated_data)
+    
+    def _open_with_data_key(self, raw: bytes, associated_data: Optional[str]) -> str:
+        """Decrypt a value sealed under a per-user data key."""
+        if self.data_keys is None:
+            raise ValueError("Per-user keys are not configured")
+        if len(raw) <= DATA_KEY_ID_SIZE:
+            raise ValueError("Truncated ciphertext")
+        
+        data_key_id = raw[:DATA_KEY_ID_SIZE]
+        aead = self.data_keys.get(data_key_id)
+        if aead is None:
+            raise ValueError(f"Unknown or destroyed data key: {data_key_id.hex()}")
+        return self._open_payload(aead, None, raw[DATA_KEY_ID_SIZE], raw[DATA_KEY_ID_SIZE + 1:], associated_data)
+    
+    def _open_payload(
+        self,
+        gcm: AESGCM,
+        fernet: Optional[Fernet],
+        format_byte: int,
+        payload: bytes,
+        associated_data: Optional[str]
+    ) -> str:
+        """Decrypt a payload in one of the inner formats with the given ciphers."""
+        if format_byte == FORMAT_AES_GCM:
+            aad = associated_data.encode('utf-8') if associated_data else None
+            return gcm.decrypt(payload[:NONCE_SIZE], payload[NONCE_SIZE:], aad).decode('utf-8')
+        if format_byte == FORMAT_AES_GCM_COMPRESSED:
+            aad = associated_data.encode('utf-8') if associated_data else b""
+            header_size = 1 + DICTIONARY_ID_SIZE
+            header, nonce = payload[:header_size], payload[header_size:header_size + NONCE_SIZE]
+            data = gcm.decrypt(nonce, payload[header_size + NONCE_SIZE:], bytes([format_byte]) + header + aad)
+            return self.compressor.decompress(header[0], header[1:], data).decode('utf-8')
+        if format_byte == FORMAT_FERNET and fernet is not None:
+            return fernet.decrypt(base64.urlsafe_b64encode(payload)).decode('utf-8')
+        raise ValueError(f"Unsupported ciphertext format: {format_byte}")
+    
+    def _with_any_key(self, open_with: Callable[[_KeyVersion], str]) -> str:
+        """Try each key in turn, newest first, for values that do not name theirs."""
+        first_error = None
+        for key in self._keys:
+            try:
+                return open_with(key)
+            except Exception as e:
+                first_error = first_error or e
+        raise first_error
+    
+    @staticmethod
+    def is_legacy(encrypted_data: str) -> bool:
+        """Whether a stored value uses the legacy double-base64 format."""
+        return bool(encrypted_data) and encrypted_data.startswith(LEGACY_PREFIX)
+    
+    @staticmethod
+    def to_compact(encrypted_data: str) -> str:
+        """Re-encode a legacy value in the compact format without decrypting it."""
+        if not EncryptionService.is_legacy(encrypted_data):
+            return encrypted_data
+        
+        try:
+            token = base64.urlsafe_b64decode(encrypted_data.encode('utf-8'))
+            return EncryptionService._pack(FORMAT_FERNET, base64.urlsafe_b64decode(token))
+        
+        except Exception as e:
+            raise ValueError(f"Invalid legacy ciphertext: {str(e)}")
+    
+    @staticmethod
+    def _pack(format_byte: int, payload: bytes) -> str:
+        """Encode a format byte and raw payload as a compact ciphertext."""
+        encoded = base64.urlsafe_b64encode(bytes([format_byte]) + payload).rstrip(b"=")
+        return COMPACT_PREFIX + encoded.decode('ascii')
+    
+    @staticmethod
+    def _unpack(encrypted_data: str) -> Tuple[int, bytes]:
+        """Decode a compact ciphertext into its format byte and payload."""
+        encoded = encrypted_data[len(COMPACT_PREFIX):]
+        raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+        if not raw:
+            raise ValueError("Empty ciphertext")
+        return raw[0], raw[1:]
+    
+    @staticmethod
+    def _parse(encrypted_data: str) -> Tuple[Optional[bytes], int, bytes]:
+        """Decode a compact ciphertext into its master key id (if any), format byte and payload."""
+        return EncryptionService._split_keyed(*EncryptionService._unpack(encrypted_data))
+    
+    @staticmethod
+    def _split_keyed(format_byte: int, payload: bytes) -> Tuple[Optional[bytes], int, bytes]:
+        """Split the master key id off a decoded payload, if it has one."""
+        if format_byte != FORMAT_KEYED:
+            return None, format_byte, payload
+        if len(payload) <= KEY_ID_SIZE:
+            raise ValueError("Truncated ciphertext")
+        return payload[:KEY_ID_SIZE], payload[KEY_ID_SIZE], payload[KEY_ID_SIZE + 1:]
     
     def encrypt_dict(self, data: dict) -> dict:
         """Encrypt sensitive fields in a dictionary."""
@@ -110,6 +567,6 @@ class EncryptionService:
         return decrypted_data
     
     @staticmethod
-    def generate_key() -> String:
+    def generate_key() -> str:
         """Generate a new encryption key."""
         return base64.urlsafe_b64encode(secrets.token_bytes(32)).decode('utf-8')
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""Lightweight per-request stage timing."""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class StageTimer:
+    """Accumulates wall-clock milliseconds spent in named stages."""
+
+    def __init__(self):
+        """Start the timer."""
+        self._start = time.perf_counter()
+        self._stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block, adding to any previous time recorded for ``name``."""
+        stage_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - stage_start) * 1000)
+
+    def add(self, name: str, elapsed_ms: float):
+        """Record time measured elsewhere for a stage."""
+        self._stages[name] = self._stages.get(name, 0.0) + elapsed_ms
+
+    def elapsed_ms(self) -> float:
+        """Get milliseconds since the timer started."""
+        return (time.perf_counter() - self._start) * 1000
+
+    def as_dict(self) -> Dict[str, float]:
+        """Get rounded stage timings plus the total."""
+        timings = {f"{name}_ms": round(value, 2) for name, value in self._stages.items()}
+        timings["total_ms"] = round(self.elapsed_ms(), 2)
+        return timings
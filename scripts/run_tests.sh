@@ -246,7 +246,7 @@ run_performance_tests() {
     if [[ "$RUN_PERFORMANCE" == true ]]; then
         log_info "Running performance tests..."
         
-        pytest tests/performance/ \
+        RUN_ENCRYPTION_BENCHMARKS=1 pytest tests/performance/ \
             --marker=performance \
             --benchmark-json="$TEST_RESULTS_DIR/benchmark-results.json" \
             --benchmark-histogram="$TEST_RESULTS_DIR/benchmark-histogram.svg" \
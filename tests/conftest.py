@@ -8,6 +8,7 @@ import os
 import tempfile
 from unittest.mock import Mock, AsyncMock
 from typing import Dict, Any, List
+import numpy as np
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient
@@ -277,6 +278,190 @@ async def memory_service_with_mocks(mock_encryption_service, mock_embedding_serv
     return mock
 
 
+
+class InMemoryVectorStore:
+    """Vector store double keeping memories in dicts.
+    
+    Each memory has a document, metadata and an optional embedding. Searches
+    rank memories by the dot product of their embedding with the query and
+    apply the similarity, user and tag filters the real stores apply. Writes
+    are applied and recorded so tests can count them; ``fail_after`` makes
+    document rewrites fail once that many batches were written.
+    """
+    
+    def __init__(self, documents=None, metadatas=None, embeddings=None, fail_after=None):
+        """Create the store from mappings of memory ids to their fields."""
+        self.documents = dict(documents or {})
+        self.metadatas = {memory_id: dict((metadatas or {}).get(memory_id, {})) for memory_id in self.documents}
+        self.embeddings = {memory_id: np.asarray(embedding) for memory_id, embedding in (embeddings or {}).items()}
+        self.fail_after = fail_after
+        self.offsets = []
+        self.metadata_writes = []
+        self.replaced = []
+        self.writes = 0
+        self.deletes = []
+    
+    def _matches(self, memory_id, user_filter=None, tag_filter=None):
+        """Whether a memory passes the user and tag filters."""
+        metadata = self.metadatas[memory_id]
+        if user_filter and metadata.get("user_id") != user_filter:
+            return False
+        return not tag_filter or any(tag in metadata.get("tags", []) for tag in tag_filter)
+    
+    def _hit(self, memory_id, query_embedding, include_documents):
+        """Build a search hit scored against ``query_embedding``."""
+        similarity = float(np.dot(query_embedding, self.embeddings[memory_id]))
+        document = self.documents[memory_id] if include_documents else None
+        return memory_id, similarity, document, self.metadatas[memory_id]
+    
+    async def iter_records(self, batch_size=500, where=None, include=None, offset=0):
+        """Yield pages of ids, documents and metadata from ``offset`` on."""
+        self.offsets.append(offset)
+        ids = [
+            memory_id for memory_id in self.documents
+            if not where or all(self.metadatas[memory_id].get(key) == value for key, value in where.items())
+        ]
+        for start in range(offset, len(ids), batch_size):
+            page_ids = ids[start:start + batch_size]
+            yield {
+                "ids": page_ids,
+                "documents": [self.documents[memory_id] for memory_id in page_ids],
+                "metadatas": [self.metadatas[memory_id] for memory_id in page_ids]
+            }
+    
+    async def iter_memories(self, batch_size, **filters):
+        """Yield pages of ids, documents, metadata and embeddings."""
+        ids = list(self.documents)
+        for start in range(0, len(ids), batch_size):
+            page_ids = ids[start:start + batch_size]
+            yield (
+                page_ids,
+                [self.documents[memory_id] for memory_id in page_ids],
+                [self.metadatas[memory_id] for memory_id in page_ids],
+                np.array([self.embeddings[memory_id] for memory_id in page_ids], dtype=np.float32)
+            )
+    
+    def get_type_manifest(self):
+        """Get an empty type manifest."""
+        return {}
+    
+    async def get_memory(self, memory_id, include_document=True):
+        """Get a memory's document and metadata, or ``None``."""
+        if memory_id not in self.documents:
+            return None
+        return (self.documents[memory_id] if include_document else None), self.metadatas[memory_id]
+    
+    async def search_memories(self, query_embedding, **kwargs):
+        """Search for one query embedding."""
+        return (await self.search_memories_batch([query_embedding], **kwargs))[0]
+    
+    async def search_memories_batch(
+        self,
+        query_embeddings,
+        limit=10,
+        min_similarity=0.5,
+        user_filter=None,
+        tag_filter=None,
+        include_documents=True,
+        **filters
+    ):
+        """Rank the memories the filters allow by similarity for each query."""
+        batch = []
+        for query in query_embeddings:
+            hits = [
+                self._hit(memory_id, query, include_documents)
+                for memory_id in self.embeddings
+                if self._matches(memory_id, user_filter, tag_filter)
+            ]
+            hits = sorted((hit for hit in hits if hit[1] >= min_similarity), key=lambda hit: (-hit[1], hit[0]))
+            batch.append(hits[:limit])
+        return batch
+    
+    async def get_memories_by_ids(
+        self,
+        memory_ids,
+        query_embedding,
+        min_similarity=0.5,
+        user_filter=None,
+        tag_filter=None,
+        include_documents=True,
+        **filters
+    ):
+        """Fetch the given memories the filters allow, scored against the query."""
+        hits = [
+            self._hit(memory_id, query_embedding, include_documents)
+            for memory_id in memory_ids
+            if memory_id in self.embeddings and self._matches(memory_id, user_filter, tag_filter)
+        ]
+        return [hit for hit in hits if hit[1] >= min_similarity]
+    
+    async def update_metadata_many(self, updates):
+        """Merge and record batched metadata updates."""
+        self.metadata_writes.append(updates)
+        for memory_id, metadata in updates.items():
+            self.metadatas[memory_id].update(metadata)
+        return len(updates)
+    
+    async def replace_documents(self, memory_ids, documents):
+        """Apply and record rewritten documents."""
+        if self.fail_after is not None and self.writes >= self.fail_after:
+            raise ValueError("Failed to replace documents: disk full")
+        self.writes += 1
+        self.replaced.extend(memory_ids)
+        self.documents.update(zip(memory_ids, documents))
+        return len(memory_ids)
+    
+    async def delete_memories(self, memory_ids):
+        """Delete and record a batch of memories."""
+        self.deletes.append(list(memory_ids))
+        for memory_id in memory_ids:
+            del self.documents[memory_id]
+            del self.metadatas[memory_id]
+            self.embeddings.pop(memory_id, None)
+        return len(memory_ids)
+
+
+@pytest.fixture
+def vector_store_factory():
+    """Provide the in-memory vector store double, called like its constructor."""
+    return InMemoryVectorStore
+
+
+@pytest.fixture
+def memory_service_factory():
+    """Provide a builder of real MemoryService objects around test doubles.
+    
+    The builder skips ``MemoryService.__init__``: it takes the vector store,
+    encryption and embedding services plus settings overrides, keeps the
+    content hash index in memory and leaves the lexical index, caches and
+    user keys off. Tests assign any other collaborator they need.
+    """
+    from app.config import get_settings
+    from app.services.content_index import ContentHashIndex
+    from app.services.memory_service import MemoryService
+    from app.services.pending_overlay import PendingOverlay
+    from app.services.reranking import CrossEncoderReranker
+    from app.utils.encryption import EncryptionService
+    
+    def build(vector_store=None, encryption_service=None, embedding_service=None, **settings_overrides):
+        """Build the service."""
+        service = MemoryService.__new__(MemoryService)
+        service.settings = get_settings().copy(update=settings_overrides)
+        service.embedding_service = embedding_service
+        service.vector_store = vector_store if vector_store is not None else InMemoryVectorStore()
+        service.user_keys = None
+        service.encryption_service = encryption_service or EncryptionService("memory service test key")
+        service.lexical_index = None
+        service.content_index = ContentHashIndex(":memory:")
+        service._content_hash_key = service.encryption_service.derive_subkey("content-hash")
+        service.reranker = CrossEncoderReranker("unused", batch_size=1, cache_size=10)
+        service.pending_overlay = PendingOverlay()
+        service.search_cache = None
+        service.plaintext_cache = None
+        return service
+    
+    return build
+
 # Test markers for categorization
 pytest.mark.unit = pytest.mark.unit
 pytest.mark.integration = pytest.mark.integration
@@ -0,0 +1,281 @@
+"""
+Benchmarks for encrypting and decrypting memory texts.
+Measures every cipher and format at 100 B, 1 KB and 10 KB, one value at a
+time and in batches, with and without compression, plus the key derivation
+paid when an EncryptionService is built.
+
+Each run writes a JSON report (ENCRYPTION_BENCHMARK_OUTPUT, default
+test-results/encryption_benchmarks.json) and fails if a case got slower than
+the stored baseline by more than ENCRYPTION_BENCHMARK_TOLERANCE (default
+1.0, i.e. twice as slow, as microbenchmarks on shared machines are noisy).
+Timings are normalized by a SHA-256 reference workload measured in the same
+run, so a baseline recorded on one machine can gate another. Run with
+UPDATE_ENCRYPTION_BASELINE=1 to record a new baseline.
+
+The benchmarks take a while, so they only run when RUN_ENCRYPTION_BENCHMARKS=1
+(as ``make perf-test`` sets) and are skipped by a plain ``pytest tests/``.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import platform
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+import cryptography
+import pytest
+
+from app.services.user_keys import UserKeyStore
+from app.utils import compression
+from app.utils.compression import Compressor
+from app.utils.encryption import EncryptionService
+
+SCHEMA_VERSION = 1
+SIZES = (100, 1024, 10240)
+BATCH_SIZE = 64
+BENCHMARK_KEY = "benchmark key"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BASELINE_PATH = os.environ.get(
+    "ENCRYPTION_BENCHMARK_BASELINE",
+    os.path.join(ROOT, "tests", "performance", "baselines", "encryption_benchmarks.json")
+)
+OUTPUT_PATH = os.environ.get(
+    "ENCRYPTION_BENCHMARK_OUTPUT",
+    os.path.join(ROOT, "test-results", "encryption_benchmarks.json")
+)
+TOLERANCE = float(os.environ.get("ENCRYPTION_BENCHMARK_TOLERANCE", "1.0"))
+UPDATE_BASELINE = os.environ.get("UPDATE_ENCRYPTION_BASELINE") == "1"
+RUN_BENCHMARKS = os.environ.get("RUN_ENCRYPTION_BENCHMARKS") == "1" or UPDATE_BASELINE
+
+WORDS = (
+    "the project meeting notes review roadmap deploy pipeline incident backlog customer "
+    "release feature bug fix database query latency cache memory search user team plan "
+    "weekly sprint design document api endpoint token budget retrospective action item"
+).split()
+
+
+def make_text(size: int, seed: int = 0) -> str:
+    """Build prose-like text of exactly ``size`` bytes."""
+    rng = random.Random(seed * 100003 + size)
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def measure(operation: Callable[[], Any], items: int = 1, min_time: float = 0.02, repeat: int = 5) -> float:
+    """Get the best time per item of ``operation`` in microseconds.
+
+    The call count is doubled until one round takes ``min_time``, then the
+    fastest of ``repeat`` rounds is kept, as ``timeit`` does.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        if time.perf_counter() - start >= min_time:
+            break
+        number *= 2
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        best = min(best, time.perf_counter() - start)
+    return best / number / items * 1e6
+
+
+def measure_reference() -> float:
+    """Time a fixed SHA-256 workload that calibrates the machine's speed."""
+    block = bytes(range(256)) * 256
+    return measure(lambda: hashlib.sha256(block).digest())
+
+
+def make_services(tmp_dir: str) -> Dict[str, EncryptionService]:
+    """Build one service per format new values can be written in."""
+    services = {
+        "fernet": EncryptionService(BENCHMARK_KEY, cipher="fernet"),
+        "aes-gcm": EncryptionService(BENCHMARK_KEY),
+        "aes-gcm-zlib": EncryptionService(BENCHMARK_KEY, compressor=Compressor("zlib"))
+    }
+    if compression.zstandard is not None:
+        services["aes-gcm-zstd"] = EncryptionService(BENCHMARK_KEY, compressor=Compressor("zstd"))
+
+    keyring = EncryptionService(BENCHMARK_KEY)
+    store = UserKeyStore(os.path.join(tmp_dir, "user_keys.sqlite3"), keyring)
+    services["user-key"] = EncryptionService(BENCHMARK_KEY, data_keys=store)
+    return services
+
+
+def record(cases: Dict[str, Dict[str, Any]], name: str, us_per_op: float, **details):
+    """Add a measured case to the report."""
+    cases[name] = {
+        **details,
+        "us_per_op": round(us_per_op, 3),
+        "ops_per_s": round(1e6 / us_per_op, 1)
+    }
+
+
+def benchmark_formats(cases: Dict[str, Dict[str, Any]], services: Dict[str, EncryptionService]):
+    """Measure encryption and decryption of every format, size and mode."""
+    for name, service in services.items():
+        user_id = "benchmark-user" if name == "user-key" else None
+        for size in SIZES:
+            texts = [make_text(size, seed) for seed in range(BATCH_SIZE)]
+            ids = [f"memory-{seed}" for seed in range(BATCH_SIZE)]
+            user_ids = [user_id] * BATCH_SIZE
+            encrypted = service.encrypt_many(texts, ids, user_ids)
+            assert service.decrypt_many(encrypted, ids) == texts
+
+            details = {"format": name, "size": size}
+            record(cases, f"encrypt/{name}/{size}/single", measure(
+                lambda: service.encrypt(texts[0], ids[0], user_id)
+            ), operation="encrypt", mode="single", **details)
+            record(cases, f"encrypt/{name}/{size}/batch", measure(
+                lambda: service.encrypt_many(texts, ids, user_ids), BATCH_SIZE
+            ), operation="encrypt", mode="batch", **details)
+            record(cases, f"decrypt/{name}/{size}/single", measure(
+                lambda: service.decrypt(encrypted[0], ids[0])
+            ), operation="decrypt", mode="single", **details)
+            record(cases, f"decrypt/{name}/{size}/batch", measure(
+                lambda: service.decrypt_many(encrypted, ids), BATCH_SIZE
+            ), operation="decrypt", mode="batch", **details)
+
+
+def benchmark_legacy(cases: Dict[str, Dict[str, Any]], service: EncryptionService):
+    """Measure decrypting values stored in the original double-base64 Fernet format."""
+    for size in SIZES:
+        texts = [make_text(size, seed) for seed in range(BATCH_SIZE)]
+        legacy = [
+            base64.urlsafe_b64encode(service._cipher_suite.encrypt(text.encode())).decode()
+            for text in texts
+        ]
+        assert service.decrypt_many(legacy) == texts
+
+        details = {"operation": "decrypt", "format": "legacy", "size": size}
+        record(cases, f"decrypt/legacy/{size}/single", measure(
+            lambda: service.decrypt(legacy[0])
+        ), mode="single", **details)
+        record(cases, f"decrypt/legacy/{size}/batch", measure(
+            lambda: service.decrypt_many(legacy), BATCH_SIZE
+        ), mode="batch", **details)
+
+
+def benchmark_key_derivation(cases: Dict[str, Dict[str, Any]]):
+    """Measure PBKDF2 and building a service once its key is derived."""
+    record(cases, "key-derivation/pbkdf2", measure(
+        lambda: EncryptionService._derive_key(BENCHMARK_KEY), min_time=0, repeat=3
+    ), operation="derive", format="pbkdf2-sha256")
+    record(cases, "key-derivation/service-init", measure(
+        lambda: EncryptionService(BENCHMARK_KEY)
+    ), operation="init", format="aes-gcm")
+    record(cases, "key-derivation/service-init-previous-keys", measure(
+        lambda: EncryptionService(BENCHMARK_KEY, previous_keys=["retired key 1", "retired key 2"])
+    ), operation="init", format="aes-gcm")
+
+
+def run_benchmarks(tmp_dir: str) -> Dict[str, Any]:
+    """Run every case and build the report."""
+    cases: Dict[str, Dict[str, Any]] = {}
+    services = make_services(tmp_dir)
+    benchmark_formats(cases, services)
+    benchmark_legacy(cases, services["aes-gcm"])
+    benchmark_key_derivation(cases)
+
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cryptography": cryptography.__version__,
+            "zstandard": compression.zstandard is not None
+        },
+        "reference_us": round(measure_reference(), 3),
+        "batch_size": BATCH_SIZE,
+        "cases": cases
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Compare normalized timings against the baseline; returns one entry per shared case."""
+    scale = baseline["reference_us"] / report["reference_us"]
+    comparison = []
+    for name, case in report["cases"].items():
+        previous = baseline["cases"].get(name)
+        if previous is None:
+            continue
+        ratio = case["us_per_op"] * scale / previous["us_per_op"]
+        comparison.append({
+            "case": name,
+            "baseline_us": previous["us_per_op"],
+            "normalized_us": round(case["us_per_op"] * scale, 3),
+            "ratio": round(ratio, 3),
+            "regressed": ratio > 1 + tolerance
+        })
+    return comparison
+
+
+def write_json(path: str, data: Dict[str, Any]):
+    """Write a report, creating its directory."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+@pytest.fixture(scope="module")
+def report(tmp_path_factory):
+    """Run the benchmarks once for the module."""
+    return run_benchmarks(str(tmp_path_factory.mktemp("encryption-benchmarks")))
+
+
+@pytest.mark.performance
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="Set RUN_ENCRYPTION_BENCHMARKS=1 to run the encryption benchmarks")
+class TestEncryptionBenchmarks:
+    """Benchmark encryption and gate regressions against the baseline."""
+
+    def test_report_covers_every_case(self, report):
+        """Test every format, size and mode was measured."""
+        formats = {case["format"] for case in report["cases"].values()}
+        sizes = {case.get("size") for case in report["cases"].values()}
+
+        assert {"fernet", "aes-gcm", "aes-gcm-zlib", "user-key", "legacy", "pbkdf2-sha256"} <= formats
+        assert set(SIZES) <= sizes
+        assert all(case["us_per_op"] > 0 for case in report["cases"].values())
+
+    def test_no_regression_against_baseline(self, report):
+        """Test no case is slower than the baseline beyond the tolerance."""
+        if UPDATE_BASELINE:
+            write_json(BASELINE_PATH, report)
+            write_json(OUTPUT_PATH, report)
+            pytest.skip(f"Recorded a new baseline at {BASELINE_PATH}")
+
+        if not os.path.exists(BASELINE_PATH):
+            write_json(OUTPUT_PATH, report)
+            pytest.skip(f"No baseline at {BASELINE_PATH}; run with UPDATE_ENCRYPTION_BASELINE=1")
+
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+        assert baseline["schema_version"] == SCHEMA_VERSION
+
+        comparison = compare(report, baseline, TOLERANCE)
+        write_json(OUTPUT_PATH, {**report, "tolerance": TOLERANCE, "comparison": comparison})
+
+        regressions = [entry for entry in comparison if entry["regressed"]]
+        assert not regressions, "Encryption benchmarks regressed:\n" + "\n".join(
+            f"  {entry['case']}: {entry['normalized_us']}us vs {entry['baseline_us']}us "
+            f"(x{entry['ratio']})"
+            for entry in regressions
+        )
@@ -0,0 +1,54 @@
+"""
+Unit tests for the in-process LRU cache.
+Tests recency eviction and byte-size bounds.
+"""
+
+import pytest
+
+from app.utils.cache import LRUCache
+
+
+@pytest.mark.unit
+class TestLRUCache:
+    """Test LRU eviction by entry count and by size."""
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test reading an entry protects it from eviction."""
+        cache = LRUCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.peek("a") == 1
+        assert cache.peek("b") is None
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_byte_limit_evicts_until_within_bound(self):
+        """Test sized entries are evicted once the byte budget is exceeded."""
+        cache = LRUCache(max_entries=10, max_bytes=100)
+        cache.set("a", "x", size=60)
+        cache.set("b", "y", size=30)
+        cache.set("c", "z", size=30)
+
+        assert cache.peek("a") is None
+        assert cache.get_stats()["bytes"] == 60
+
+    def test_oversized_value_is_not_stored(self):
+        """Test a value larger than the whole budget is rejected."""
+        cache = LRUCache(max_entries=10, max_bytes=100)
+        cache.set("a", "x", size=10)
+        cache.set("big", "y", size=500)
+
+        assert cache.peek("big") is None
+        assert cache.peek("a") == "x"
+
+    def test_replacing_and_popping_track_bytes(self):
+        """Test byte accounting follows overwrites and removals."""
+        cache = LRUCache(max_entries=10, max_bytes=100)
+        cache.set("a", "x", size=40)
+        cache.set("a", "y", size=20)
+        assert cache.get_stats()["bytes"] == 20
+
+        assert cache.pop("a") == "y"
+        assert cache.get_stats()["bytes"] == 0
@@ -0,0 +1,128 @@
+"""
+Unit tests for the compact ciphertext format.
+Tests format detection, legacy compatibility, the AES-GCM cipher and the
+background migration.
+"""
+
+import base64
+
+import pytest
+
+from app.services.ciphertext_migration import CiphertextMigrator
+from app.utils.encryption import COMPACT_PREFIX, FORMAT_AES_GCM, FORMAT_FERNET, EncryptionService
+
+
+def legacy_encrypt(service, text):
+    """Encrypt text the way memories were stored before the compact format."""
+    token = service._cipher_suite.encrypt(text.encode("utf-8"))
+    return base64.urlsafe_b64encode(token).decode("utf-8")
+
+
+@pytest.mark.unit
+class TestCompactCiphertext:
+    """Test the versioned compact ciphertext format."""
+
+    @pytest.fixture
+    def service(self):
+        """Create an encryption service."""
+        return EncryptionService("compact format key")
+
+    def test_round_trip_is_compact(self, service):
+        """Test new ciphertexts carry the prefix and are shorter than legacy ones."""
+        text = "remember the milk " * 20
+        compact = service.encrypt(text)
+
+        assert compact.startswith(COMPACT_PREFIX)
+        assert not EncryptionService.is_legacy(compact)
+        assert service.decrypt(compact) == text
+        assert len(compact) < 0.8 * len(legacy_encrypt(service, text))
+
+    def test_legacy_values_still_decrypt(self, service):
+        """Test decryption auto-detects the legacy format."""
+        legacy = legacy_encrypt(service, "old memory")
+
+        assert EncryptionService.is_legacy(legacy)
+        assert service.decrypt(legacy) == "old memory"
+
+    def test_legacy_values_convert_without_key(self, service):
+        """Test conversion needs no key and preserves the plaintext."""
+        legacy = legacy_encrypt(service, "old memory")
+        compact = EncryptionService.to_compact(legacy)
+
+        assert compact.startswith(COMPACT_PREFIX)
+        assert EncryptionService.to_compact(compact) == compact
+        assert service.decrypt(compact) == "old memory"
+
+    def test_unknown_format_is_rejected(self, service):
+        """Test an unsupported format byte fails decryption."""
+        payload = base64.urlsafe_b64encode(b"\x7fjunk").decode("ascii")
+
+        with pytest.raises(ValueError, match="Decryption failed"):
+            service.decrypt(COMPACT_PREFIX + payload)
+
+
+@pytest.mark.unit
+class TestAesGcmCipher:
+    """Test the AEAD cipher and the batch APIs."""
+
+    @pytest.fixture
+    def service(self):
+        """Create a service writing AES-GCM values."""
+        return EncryptionService("compact format key")
+
+    def test_associated_data_is_bound(self, service):
+        """Test a value only decrypts under the memory id it was written for."""
+        encrypted = service.encrypt("secret", "memory-1")
+
+        assert EncryptionService._parse(encrypted)[1] == FORMAT_AES_GCM
+        assert service.decrypt(encrypted, "memory-1") == "secret"
+        with pytest.raises(ValueError, match="InvalidTag"):
+            service.decrypt(encrypted, "memory-2")
+
+    def test_nonces_are_unique(self, service):
+        """Test encrypting the same text twice yields different values."""
+        first, second = service.encrypt_many(["same", "same"], ["m", "m"])
+
+        assert first != second
+        assert EncryptionService._parse(first)[2][:12] != EncryptionService._parse(second)[2][:12]
+
+    def test_batch_round_trip_reports_failures(self, service):
+        """Test batch decryption returns ``None`` for values that fail."""
+        encrypted = service.encrypt_many(["a", "b", ""], ["1", "2", "3"])
+
+        assert service.decrypt_many(encrypted, ["1", "x", "3"]) == ["a", None, ""]
+
+    def test_fernet_values_keep_decrypting(self, service):
+        """Test values written under Fernet decrypt with either cipher selected."""
+        fernet = EncryptionService("compact format key", cipher="fernet")
+        encrypted = fernet.encrypt("older memory", "memory-1")
+
+        assert EncryptionService._parse(encrypted)[1] == FORMAT_FERNET
+        assert service.decrypt(encrypted, "memory-1") == "older memory"
+        assert fernet.decrypt(service.encrypt("newer", "m"), "m") == "newer"
+
+
+@pytest.mark.unit
+class TestCiphertextMigrator:
+    """Test the background rewrite of legacy rows."""
+
+    async def test_rewrites_only_legacy_rows(self, vector_store_factory):
+        """Test legacy rows are converted, compact rows untouched and reruns are no-ops."""
+        service = EncryptionService("compact format key")
+        store = vector_store_factory({
+            "a": legacy_encrypt(service, "alpha"),
+            "b": service.encrypt("beta"),
+            "c": legacy_encrypt(service, "gamma"),
+            "d": "Z0FBQUFBnot-base64!"
+        })
+        migrator = CiphertextMigrator(batch_size=2)
+
+        assert await migrator.run(store) == 2
+        assert store.replaced == ["a", "c"]
+        assert [service.decrypt(store.documents[i]) for i in "abc"] == ["alpha", "beta", "gamma"]
+        assert await migrator.run(store) == 0
+
+        stats = migrator.get_stats()
+        assert stats["migrated"] == 2
+        assert stats["failed"] == 2
+        assert stats["scanned"] == 8
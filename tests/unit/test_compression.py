@@ -0,0 +1,94 @@
+"""
+Unit tests for compressing plaintexts inside the ciphertext envelope.
+Tests the size threshold, the header flag, dictionaries and compatibility.
+"""
+
+import pytest
+
+from app.utils.compression import CompressionDictionaries, Compressor, build_dictionary
+from app.utils.encryption import FORMAT_AES_GCM, FORMAT_AES_GCM_COMPRESSED, KEY_ID_SIZE, EncryptionService
+
+NOTES = "Meeting notes: the team reviewed the quarterly roadmap and agreed on priorities. " * 20
+
+
+def make_service(**options):
+    """Create an AES-GCM service compressing with zlib."""
+    return EncryptionService("compression key", compressor=Compressor("zlib", **options))
+
+
+@pytest.mark.unit
+class TestCompressedCiphertext:
+    """Test compression before encryption."""
+
+    def test_long_values_are_compressed(self):
+        """Test long texts are flagged as compressed, shrink and round-trip."""
+        service = make_service(min_bytes=512)
+        encrypted = service.encrypt(NOTES, "memory-1")
+
+        assert EncryptionService._parse(encrypted)[1] == FORMAT_AES_GCM_COMPRESSED
+        assert len(encrypted) < len(NOTES) / 4
+        assert service.decrypt(encrypted, "memory-1") == NOTES
+        assert service.compressor.get_stats()["compressed"] == 1
+
+    def test_short_values_are_stored_raw(self):
+        """Test texts under the threshold skip compression."""
+        service = make_service(min_bytes=512)
+
+        assert EncryptionService._parse(service.encrypt("short", "m"))[1] == FORMAT_AES_GCM
+        assert service.compressor.get_stats()["compressed"] == 0
+
+    def test_header_is_authenticated(self):
+        """Test tampering with the codec byte or associated data fails decryption."""
+        service = make_service()
+        encrypted = service.encrypt(NOTES, "memory-1")
+        format_byte, payload = EncryptionService._unpack(encrypted)
+        codec_offset = KEY_ID_SIZE + 1
+        tampered = EncryptionService._pack(
+            format_byte, payload[:codec_offset] + bytes([0x02]) + payload[codec_offset + 1:]
+        )
+
+        with pytest.raises(ValueError, match="InvalidTag"):
+            service.decrypt(tampered, "memory-1")
+        with pytest.raises(ValueError, match="InvalidTag"):
+            service.decrypt(encrypted, "memory-2")
+
+    def test_compressed_values_decrypt_with_compression_off(self):
+        """Test switching compression off leaves existing values readable."""
+        encrypted = make_service().encrypt(NOTES, "m")
+
+        assert EncryptionService("compression key").decrypt(encrypted, "m") == NOTES
+
+
+@pytest.mark.unit
+class TestCompressionDictionaries:
+    """Test trained dictionaries."""
+
+    def test_dictionary_shrinks_small_values(self, tmp_path):
+        """Test a trained dictionary beats plain zlib and persists across processes."""
+        corpus = [f"Standup {i}: reviewed the deployment pipeline and the incident backlog".encode() for i in range(50)]
+        value = "Standup 99: reviewed the deployment pipeline and the incident backlog"
+        plain = make_service(min_bytes=32)
+        dictionaries = CompressionDictionaries(str(tmp_path))
+        trained = EncryptionService(
+            "compression key", compressor=Compressor("zlib", min_bytes=32, dictionaries=dictionaries)
+        )
+
+        dictionaries.add(build_dictionary(corpus, 4096))
+        encrypted = trained.encrypt(value, "m")
+
+        assert len(encrypted) < len(plain.encrypt(value, "m"))
+        reopened = EncryptionService(
+            "compression key", compressor=Compressor(dictionaries=CompressionDictionaries(str(tmp_path)))
+        )
+        assert reopened.decrypt(encrypted, "m") == value
+
+    def test_unknown_dictionary_fails(self):
+        """Test values referencing a missing dictionary fail to decrypt."""
+        dictionaries = CompressionDictionaries()
+        dictionaries.add(b"deployment pipeline incident backlog " * 4)
+        encrypted = EncryptionService(
+            "compression key", compressor=Compressor("zlib", min_bytes=1, dictionaries=dictionaries)
+        ).encrypt(NOTES, "m")
+
+        with pytest.raises(ValueError, match="Unknown compression dictionary"):
+            EncryptionService("compression key").decrypt(encrypted, "m")
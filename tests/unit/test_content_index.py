@@ -0,0 +1,112 @@
+"""
+Unit tests for the content hash index.
+Tests hash claiming, per-user scoping, release on delete, taking over
+hashes of memories that were never stored, and skipping the index when
+deduplication is off.
+"""
+
+import time
+
+import pytest
+
+from app.models.memory_models import AddMemoryRequest
+from app.services.content_index import ContentHashIndex
+from app.services.vector_store import CONTENT_HASH_KEY
+from app.utils.encryption import EncryptionService
+
+
+@pytest.mark.unit
+class TestContentHashIndex:
+    """Test claiming and releasing content hashes."""
+
+    @pytest.fixture
+    def index(self):
+        """Create an in-memory index."""
+        return ContentHashIndex(":memory:")
+
+    def test_first_claim_succeeds(self, index):
+        """Test a new hash is claimed by the new memory."""
+        assert index.claim("u1", "h1", "m1") is None
+        assert index.count() == 1
+
+    def test_second_claim_returns_existing_memory(self, index):
+        """Test identical content resolves to the first memory."""
+        index.claim("u1", "h1", "m1")
+
+        assert index.claim("u1", "h1", "m2") == "m1"
+        assert index.count() == 1
+
+    def test_claims_are_scoped_to_user(self, index):
+        """Test the same hash under another user is independent."""
+        index.claim("u1", "h1", "m1")
+
+        assert index.claim("u2", "h1", "m2") is None
+
+    def test_release_frees_the_hash(self, index):
+        """Test a released hash can be claimed again."""
+        index.claim("u1", "h1", "m1")
+        index.release("m1")
+
+        assert index.claim("u1", "h1", "m2") is None
+
+    def test_add_many_keeps_existing_claims(self, index):
+        """Test bulk registration does not overwrite claimed hashes."""
+        index.claim("u1", "h1", "m1")
+        index.add_many([("u1", "h1", "m9"), ("u1", "h2", "m2")])
+
+        assert index.claim("u1", "h1", "m3") == "m1"
+        assert index.count() == 2
+
+    def test_only_old_claims_are_taken_over(self, index):
+        """Test a hash moves to a new memory only once its claim has aged out."""
+        index.claim("u1", "h1", "m1")
+
+        assert index.take_over("u1", "h1", "m1", "m2", claimed_before=time.time() - 60) is False
+        assert index.take_over("u1", "h1", "m1", "m2", claimed_before=time.time() + 1) is True
+        assert index.take_over("u1", "h1", "m1", "m3", claimed_before=time.time() + 1) is False
+        assert index.claim("u1", "h1", "m4") == "m2"
+
+    async def test_concurrent_identical_adds_store_one_copy(self, memory_service_factory):
+        """Test a duplicate of a memory still being written resolves to it instead of a second copy."""
+        service = memory_service_factory(dedup_claim_timeout_s=300)
+        request = AddMemoryRequest(text="same text", user_id="u1", on_duplicate="return_existing")
+
+        first, _ = await service.prepare_memory(request)
+        second, existing = await service.prepare_memory(request)
+
+        assert second is None
+        assert existing.id == first.memory_id
+
+    async def test_lost_claims_are_taken_over(self, memory_service_factory):
+        """Test a duplicate of a memory whose write was lost replaces its claim."""
+        service = memory_service_factory(dedup_claim_timeout_s=0)
+        request = AddMemoryRequest(text="same text", user_id="u1", on_duplicate="return_existing")
+
+        lost, _ = await service.prepare_memory(request)
+        retried, existing = await service.prepare_memory(request)
+
+        assert existing is None
+        assert retried.memory_id != lost.memory_id
+        assert service.content_index.claim("u1", retried.content_hash, "m9") == retried.memory_id
+
+    async def test_adds_are_not_hashed_with_dedup_off(self, memory_service_factory):
+        """Test a memory added without a dedup policy claims no hash and stores none."""
+        service = memory_service_factory(dedup_policy="off")
+
+        pending, _ = await service.prepare_memory(AddMemoryRequest(text="same text", user_id="u1"))
+
+        assert pending.content_hash is None
+        assert service.content_index.count() == 0
+        assert CONTENT_HASH_KEY not in service._storage_metadata(pending)
+
+    async def test_index_is_not_rebuilt_with_dedup_off(self, memory_service_factory):
+        """Test startup leaves the index alone until a dedup policy is enabled."""
+        service = memory_service_factory(dedup_policy="off")
+        await service.ensure_content_hash_index()
+
+        assert service.content_index.get_key_fingerprint() is None
+
+        service.settings = service.settings.copy(update={"dedup_policy": "reject"})
+        await service.ensure_content_hash_index()
+
+        assert service.content_index.get_key_fingerprint() == service.encryption_service.index_key_id
@@ -0,0 +1,74 @@
+"""
+Unit tests for projecting memories and search results onto requested fields.
+Tests that unrequested fields are left unset and searches cache per projection.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.models.memory_models import SearchMemoryRequest
+from app.services.memory_service import MemoryService
+from app.services.search_cache import SearchResultCache
+from app.services.vector_store import TIMESTAMP_EPOCH_KEY
+
+METADATA = {
+    "user_id": "u1",
+    "tags": ["work", "urgent"],
+    "timestamp": datetime(2024, 1, 1).isoformat(),
+    TIMESTAMP_EPOCH_KEY: datetime(2024, 1, 1).timestamp(),
+    "priority": 3
+}
+
+
+@pytest.mark.unit
+class TestFieldProjection:
+    """Test projection of results onto the requested fields."""
+
+    def test_search_result_keeps_id_and_requested_fields(self):
+        """Test a projected result only sets the id and requested fields."""
+        result = MemoryService._build_search_result("m1", 0.87654, None, METADATA, ["tags", "similarity_score"])
+
+        assert result.dict(exclude_unset=True) == {
+            "id": "m1",
+            "tags": ["work", "urgent"],
+            "similarity_score": 0.8765
+        }
+
+    def test_unprojected_result_has_every_field(self):
+        """Test results without a projection are unchanged."""
+        result = MemoryService._build_search_result("m1", 0.5, "hello", METADATA)
+
+        assert set(result.dict(exclude_unset=True)) == {
+            "id", "text", "tags", "timestamp", "similarity_score", "metadata"
+        }
+        assert result.metadata == {"priority": 3}
+
+    def test_memory_record_projection(self):
+        """Test projected memory records leave the text unset."""
+        record = MemoryService._build_memory_record("m1", None, METADATA, ["user_id", "timestamp"])
+
+        assert record.dict(exclude_unset=True) == {
+            "id": "m1",
+            "user_id": "u1",
+            "timestamp": datetime(2024, 1, 1)
+        }
+
+    def test_only_text_needs_decryption(self):
+        """Test which projections need the ciphertext."""
+        assert MemoryService._wants_text(None)
+        assert MemoryService._wants_text(["tags", "text"])
+        assert not MemoryService._wants_text([])
+        assert not MemoryService._wants_text(["tags", "metadata"])
+
+    def test_projections_are_cached_separately(self):
+        """Test a projected search does not share a cache entry with a full one."""
+        full = SearchMemoryRequest(query="q", user_id="u1")
+        projected = SearchMemoryRequest(query="q", user_id="u1", fields=["tags"])
+        cache = SearchResultCache(max_entries=10, max_bytes=1 << 20)
+
+        cache.set(projected, 0, [MemoryService._build_search_result("m1", 0.5, None, METADATA, ["tags"])])
+
+        assert SearchResultCache.make_key(full) != SearchResultCache.make_key(projected)
+        assert cache.get(full, 0) is None
+        assert cache.get(projected, 0)[0].tags == ["work", "urgent"]
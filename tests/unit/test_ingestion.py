@@ -0,0 +1,149 @@
+"""
+Unit tests for the write-behind ingestion pipeline.
+Tests crash replay, retries while the vector store is down and dead-lettering.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.models.memory_models import AddMemoryRequest
+from app.services import ingestion
+from app.services.content_index import ContentHashIndex
+from app.services.ingestion import IngestionPipeline
+from app.services.memory_service import MemoryService
+from app.services.pending_overlay import PendingMemory, PendingOverlay
+from app.services.write_ahead_log import WriteAheadLog
+from app.utils.encryption import EncryptionService
+
+
+class FakeMemoryService:
+    """Memory service double whose vector store can fail or hang."""
+
+    def __init__(self, tmp_path, failures=0, hang=False):
+        """Create the service, failing the first ``failures`` writes."""
+        self.pending_overlay = PendingOverlay()
+        self.content_index = ContentHashIndex(str(tmp_path / "content_hashes.sqlite3"))
+        self.encryption_service = EncryptionService("ingestion key")
+        self.failures = failures
+        self.hang = hang
+        self.stored = {}
+        self.invalidated = set()
+
+    async def prepare_memory(self, request):
+        """Encrypt a new memory."""
+        memory_id = f"memory-{request.text}"
+        return PendingMemory(
+            memory_id=memory_id,
+            user_id=request.user_id,
+            text=request.text,
+            encrypted_text=self.encryption_service.encrypt(request.text, memory_id),
+            tags=[],
+            metadata={},
+            timestamp=datetime(2024, 1, 1),
+            content_hash=request.text
+        ), None
+
+    pending_entry = staticmethod(MemoryService.pending_entry)
+
+    async def embed_memories(self, memories):
+        """Encode memories as constant vectors."""
+        return [[0.1, 0.2] for _ in memories]
+
+    def publish_pending(self, memories, embeddings):
+        """Make memories searchable in the overlay."""
+        self.pending_overlay.attach_embeddings(memories, embeddings)
+
+    async def persist_memories(self, memories, embeddings=None):
+        """Store memories unless the store is down."""
+        if self.hang:
+            await asyncio.Event().wait()
+        if self.failures:
+            self.failures -= 1
+            raise ValueError("Failed to add memories: connection refused")
+        self.stored.update((memory.memory_id, memory.text) for memory in memories)
+
+    def discard_pending(self, memories):
+        """Drop memories that will never be stored."""
+        self.pending_overlay.acknowledge([memory.memory_id for memory in memories])
+        self.invalidated.update(memory.user_id for memory in memories)
+
+
+def make_pipeline(service, directory):
+    """Create a pipeline over a log in ``directory``."""
+    return IngestionPipeline(service, WriteAheadLog(str(directory)), 8, 1, 100)
+
+
+async def wait_until(predicate, timeout=5.0):
+    """Poll until ``predicate`` holds."""
+    deadline = asyncio.get_event_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_event_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    """Shrink the retry backoff."""
+    monkeypatch.setattr(ingestion, "_RETRY_BASE_DELAY_S", 0.001)
+
+
+@pytest.mark.unit
+class TestIngestionPipeline:
+    """Test durability of accepted memories."""
+
+    async def test_accepted_memories_are_replayed_after_a_crash(self, tmp_path):
+        """Test memories accepted but never written are stored by the next process."""
+        pipeline = make_pipeline(FakeMemoryService(tmp_path, hang=True), tmp_path / "wal")
+        await pipeline.start()
+        for text in ("alpha", "beta"):
+            await pipeline.enqueue(AddMemoryRequest(text=text, user_id="u1"))
+        await asyncio.sleep(0.05)
+        for worker in pipeline._workers:
+            worker.cancel()
+        pipeline.wal.close()
+
+        service = FakeMemoryService(tmp_path)
+        restarted = make_pipeline(service, tmp_path / "wal")
+        await restarted.start()
+        await wait_until(lambda: len(service.stored) == 2)
+        await restarted.stop()
+
+        assert sorted(service.stored.values()) == ["alpha", "beta"]
+        assert restarted.wal.replay() == []
+
+    async def test_store_outage_is_retried_without_checkpointing(self, tmp_path, monkeypatch):
+        """Test a batch failing every attempt stays logged and pending until the store recovers."""
+        # Leave time to observe the batch while its retry is scheduled
+        monkeypatch.setattr(ingestion, "_RETRY_BASE_DELAY_S", 0.1)
+        service = FakeMemoryService(tmp_path, failures=ingestion._MAX_APPLY_ATTEMPTS + 1)
+        pipeline = make_pipeline(service, tmp_path / "wal")
+        await pipeline.start()
+        entry, _ = await pipeline.enqueue(AddMemoryRequest(text="alpha", user_id="u1"))
+
+        await wait_until(lambda: pipeline.get_stats()["retried"] == 1)
+        assert [record["id"] for record in pipeline.wal.replay()] == [entry.id]
+        assert service.pending_overlay.get(entry.id) is not None
+
+        await wait_until(lambda: entry.id in service.stored)
+        await wait_until(lambda: pipeline.wal.replay() == [])
+        await pipeline.stop()
+        assert pipeline.get_stats()["failed"] == 0
+        assert service.pending_overlay.get(entry.id) is None
+
+    async def test_memories_failing_every_round_are_dead_lettered(self, tmp_path, monkeypatch):
+        """Test memories the store never accepts are set aside durably before the checkpoint passes them."""
+        monkeypatch.setattr(ingestion, "_MAX_APPLY_ROUNDS", 2)
+        service = FakeMemoryService(tmp_path, failures=10 ** 6)
+        pipeline = make_pipeline(service, tmp_path / "wal")
+        await pipeline.start()
+        entry, _ = await pipeline.enqueue(AddMemoryRequest(text="alpha", user_id="u1"))
+
+        await wait_until(lambda: pipeline.get_stats()["failed"] == 1)
+        await pipeline.stop()
+
+        assert [record["id"] for record in pipeline.wal.read_dead_letters()] == [entry.id]
+        assert pipeline.wal.replay() == []
+        assert service.pending_overlay.get(entry.id) is None
+        assert service.invalidated == {"u1"}
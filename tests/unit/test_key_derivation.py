@@ -0,0 +1,52 @@
+"""
+Unit tests for the derived-key cache.
+Tests that PBKDF2 runs once per key and that services share derived keys.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.utils.encryption import DerivedKeyCache, EncryptionService, get_derived_key_cache
+
+
+@pytest.mark.unit
+class TestDerivedKeyCache:
+    """Test caching of PBKDF2-derived keys."""
+
+    def test_derives_each_key_once(self):
+        """Test repeated lookups reuse the first derivation."""
+        cache = DerivedKeyCache()
+
+        first = cache.get("secret")
+        second = cache.get(b"secret")
+        other = cache.get("other secret")
+
+        assert first == second == EncryptionService._derive_key("secret")
+        assert other != first
+        stats = cache.get_stats()
+        assert stats["derivations"] == 2
+        assert stats["hits"] == 1
+        assert stats["keys"] == 2
+        assert stats["last_derivation_ms"] is not None
+
+    def test_prederive_moves_cost_off_first_use(self):
+        """Test a pre-derived key needs no derivation when services are built."""
+        cache = DerivedKeyCache()
+        cache.prederive("secret")
+
+        with patch.object(EncryptionService, "_derive_key") as derive:
+            cache.get("secret")
+
+        derive.assert_not_called()
+
+    def test_services_share_the_process_cache(self):
+        """Test services built with the same key interoperate without re-deriving."""
+        get_derived_key_cache().prederive("shared key")
+
+        with patch.object(EncryptionService, "_derive_key") as derive:
+            writer = EncryptionService("shared key")
+            reader = EncryptionService("shared key")
+
+        derive.assert_not_called()
+        assert reader.decrypt(writer.encrypt("hello")) == "hello"
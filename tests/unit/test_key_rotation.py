@@ -0,0 +1,145 @@
+"""
+Unit tests for key-versioned ciphertexts and background key rotation.
+Tests the keyring, checkpointed resumption and the re-encryption worker.
+"""
+
+import json
+
+import pytest
+
+from app.services.content_index import ContentHashIndex
+from app.services.key_rotation import KeyRotationWorker
+from app.services.lexical_index import LexicalIndex
+from app.utils.encryption import EncryptionService
+
+
+@pytest.mark.unit
+class TestKeyring:
+    """Test decrypting across key versions."""
+
+    def test_previous_keys_still_decrypt(self):
+        """Test values under a retired key decrypt once it is listed as previous."""
+        old = EncryptionService("old key")
+        new = EncryptionService("new key", previous_keys=["old key"])
+        encrypted = old.encrypt("secret", "m1")
+
+        assert new.decrypt(encrypted, "m1") == "secret"
+        assert not new.is_current(encrypted)
+        assert new.is_current(new.encrypt("secret", "m1"))
+        assert EncryptionService._parse(new.encrypt("secret", "m1"))[0] == new.key_id != old.key_id
+
+    def test_unlisted_key_is_rejected(self):
+        """Test a value naming an unknown key fails with the key id."""
+        encrypted = EncryptionService("old key").encrypt("secret", "m1")
+
+        with pytest.raises(ValueError, match="Unknown key version"):
+            EncryptionService("new key").decrypt(encrypted, "m1")
+
+    def test_values_without_key_ids_try_every_key(self):
+        """Test compact values written before key ids existed decrypt under a previous key."""
+        unkeyed = EncryptionService.to_compact(EncryptionService("old key").encrypt("legacy"))
+        format_byte, payload = EncryptionService._unpack(unkeyed)
+        unkeyed = EncryptionService._pack(payload[4], payload[5:])
+
+        assert EncryptionService("new key", previous_keys=["old key"]).decrypt(unkeyed) == "legacy"
+
+    def test_index_subkeys_survive_rotation_with_an_index_key(self):
+        """Test blinding subkeys come from the index key, so rotating keeps indexes valid."""
+        before = EncryptionService("old key", index_key="index key")
+        after = EncryptionService("new key", previous_keys=["old key"], index_key="index key")
+
+        assert after.derive_subkey("lexical-index") == before.derive_subkey("lexical-index")
+        assert after.index_key_id == before.index_key_id
+
+    def test_index_subkeys_follow_the_current_key_without_an_index_key(self):
+        """Test rotating without an index key changes the index fingerprint, forcing a rebuild."""
+        before = EncryptionService("old key")
+        after = EncryptionService("new key", previous_keys=["old key"])
+
+        assert after.derive_subkey("lexical-index") != before.derive_subkey("lexical-index")
+        assert after.index_key_id != before.index_key_id
+
+
+@pytest.mark.unit
+class TestKeyRotationWorker:
+    """Test the background re-encryption worker."""
+
+    @pytest.fixture
+    def services(self):
+        """Create the old-key and rotated services."""
+        return EncryptionService("old key"), EncryptionService("new key", previous_keys=["old key"])
+
+    async def test_rewrites_rows_under_previous_keys(self, services, tmp_path, vector_store_factory):
+        """Test old rows are re-encrypted, current and broken rows left alone."""
+        old, new = services
+        store = vector_store_factory({
+            "a": old.encrypt("alpha", "a"),
+            "b": new.encrypt("beta", "b"),
+            "c": old.encrypt("gamma", "c"),
+            "d": old.encrypt("delta", "wrong id")
+        })
+        worker = KeyRotationWorker(batch_size=2, rows_per_second=0, checkpoint_path=str(tmp_path / "rotation.json"))
+
+        assert await worker.run(store, new, workers=2) == 2
+        assert [new.decrypt(store.documents[i], i) for i in "abc"] == ["alpha", "beta", "gamma"]
+        assert all(new.is_current(store.documents[i]) for i in "abc")
+        assert await worker.run(store, new) == 0
+
+        stats = worker.get_stats()
+        assert stats["completed"] is True
+        assert stats["failed"] == 1
+        assert json.loads((tmp_path / "rotation.json").read_text())["key_id"] == new.key_id.hex()
+
+    async def test_resumes_from_checkpoint(self, services, tmp_path, vector_store_factory):
+        """Test a restarted worker continues at the last checkpointed batch."""
+        old, new = services
+        documents = {f"m{i}": old.encrypt(f"memory {i}", f"m{i}") for i in range(6)}
+        checkpoint_path = str(tmp_path / "rotation.json")
+        store = vector_store_factory(documents, fail_after=1)
+
+        with pytest.raises(ValueError, match="disk full"):
+            await KeyRotationWorker(2, 0, checkpoint_path).run(store, new)
+        store.fail_after = None
+
+        worker = KeyRotationWorker(2, 0, checkpoint_path)
+        assert worker.get_stats()["position"] == 2
+        assert await worker.run(store, new) == 4
+        assert store.offsets == [0, 2, 0]
+        assert all(new.is_current(document) for document in store.documents.values())
+
+
+def make_indexed_service(memory_service_factory, tmp_path, encryption_service, store):
+    """Build a memory service whose derived indexes persist under ``tmp_path``."""
+    service = memory_service_factory(store, encryption_service, dedup_policy="return_existing")
+    service.content_index = ContentHashIndex(str(tmp_path / "content_hashes.sqlite3"))
+    service.lexical_index = LexicalIndex(
+        str(tmp_path / "lexical.sqlite3"), encryption_service.derive_subkey("lexical-index")
+    )
+    return service
+
+
+@pytest.mark.unit
+class TestIndexRebuild:
+    """Test derived indexes follow the index key."""
+
+    async def test_indexes_are_rebuilt_when_the_index_key_changes(
+        self, tmp_path, vector_store_factory, memory_service_factory
+    ):
+        """Test dedup and lexical search keep matching after rotating without an index key."""
+        old = EncryptionService("old key")
+        store = vector_store_factory({"m1": old.encrypt("alpha pipeline", "m1")}, {"m1": {"user_id": "u1"}})
+        before = make_indexed_service(memory_service_factory, tmp_path, old, store)
+        await before.ensure_content_hash_index()
+        await before.ensure_lexical_index()
+
+        after = make_indexed_service(
+            memory_service_factory, tmp_path, EncryptionService("new key", previous_keys=["old key"]), store
+        )
+        assert after.content_index.get_key_fingerprint() != after.encryption_service.index_key_id
+        await after.ensure_content_hash_index()
+        await after.ensure_lexical_index()
+
+        assert after.content_index.claim("u1", after.content_hash("u1", "alpha pipeline"), "m2") == "m1"
+        assert [list(updates) for updates in store.metadata_writes] == [["m1"], ["m1"]]
+        assert [memory_id for memory_id, _ in after.lexical_index.search("u1", "pipeline")] == ["m1"]
+        assert after.lexical_index.get_key_fingerprint() == after.encryption_service.index_key_id
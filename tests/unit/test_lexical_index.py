@@ -0,0 +1,120 @@
+"""
+Unit tests for the blinded BM25 lexical index.
+Tests exact-term recall, user isolation, that no plaintext reaches disk,
+and how hybrid search filters lexical-only hits.
+"""
+
+import os
+import tempfile
+import pytest
+
+from app.models.memory_models import SearchMemoryRequest
+from app.services.lexical_index import LexicalIndex, tokenize, reciprocal_rank_fusion
+
+
+@pytest.mark.unit
+class TestTokenizer:
+    """Test tokenization of prose and code symbols."""
+
+    def test_symbols_are_kept_whole_and_split(self):
+        """Test dotted identifiers yield the symbol and its parts."""
+        terms = tokenize("Call VectorStore.add_memory now")
+
+        assert "vectorstore.add_memory" in terms
+        assert "vectorstore" in terms
+        assert "add_memory" in terms
+        assert "call" in terms
+
+
+@pytest.mark.unit
+class TestLexicalIndex:
+    """Test indexing and BM25 search behaviour."""
+
+    @pytest.fixture
+    def index(self):
+        """Create an index in a temporary directory."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield LexicalIndex(os.path.join(temp_dir, "lexical.sqlite3"), b"k" * 32)
+
+    def test_exact_identifier_is_ranked_first(self, index):
+        """Test an exact error code outranks unrelated memories."""
+        index.add_document("m1", "u1", "parser failed with ERR_4711 again")
+        index.add_document("m2", "u1", "notes about the parser design")
+        index.add_document("m3", "u1", "gardening checklist")
+
+        results = index.search("u1", "ERR_4711")
+
+        assert [memory_id for memory_id, _ in results] == ["m1"]
+
+    def test_search_is_scoped_to_user(self, index):
+        """Test one user's memories never match another user's query."""
+        index.add_document("m1", "u1", "secret project falcon")
+        index.add_document("m2", "u2", "project falcon kickoff")
+
+        assert [memory_id for memory_id, _ in index.search("u2", "falcon")] == ["m2"]
+
+    def test_removed_documents_stop_matching(self, index):
+        """Test deletion removes postings and statistics."""
+        index.add_document("m1", "u1", "quarterly report")
+        index.remove_document("m1")
+
+        assert index.search("u1", "quarterly") == []
+        assert index.get_stats() == {"indexed_memories": 0, "postings": 0}
+
+    def test_reindexing_replaces_previous_entry(self, index):
+        """Test indexing the same id twice does not duplicate it."""
+        index.add_document("m1", "u1", "old text")
+        index.add_document("m1", "u1", "new text")
+
+        assert index.search("u1", "old") == []
+        assert index.document_count() == 1
+
+    def test_no_plaintext_terms_on_disk(self, index):
+        """Test the database file contains only blinded terms."""
+        index.add_document("m1", "u1", "supercalifragilistic")
+        index._conn.execute("PRAGMA wal_checkpoint(FULL)")
+
+        with open(index.path, "rb") as handle:
+            assert b"supercalifragilistic" not in handle.read()
+
+    def test_blinding_depends_on_key(self, index):
+        """Test different keys produce different blinded terms."""
+        other = LexicalIndex(":memory:", b"x" * 32)
+
+        assert index.blind("falcon") != other.blind("falcon")
+
+
+@pytest.mark.unit
+class TestReciprocalRankFusion:
+    """Test rank fusion of semantic and lexical result lists."""
+
+    def test_items_in_both_lists_rank_highest(self):
+        """Test agreement between rankers beats a single first place."""
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+
+        assert fused[0][0] == "b"
+        assert {memory_id for memory_id, _ in fused} == {"a", "b", "c", "d"}
+
+
+@pytest.mark.unit
+class TestHybridSearch:
+    """Test fusing lexical hits into semantic search."""
+
+    async def test_lexical_hits_skip_the_similarity_floor_but_not_filters(
+        self, memory_service_factory, vector_store_factory
+    ):
+        """Test an exact term match far from the query is kept unless another filter excludes it."""
+        store = vector_store_factory(
+            {"m1": "cipher m1", "m2": "cipher m2"},
+            {"m1": {"user_id": "u1", "tags": ["work"]}, "m2": {"user_id": "u1", "tags": ["home"]}},
+            {"m1": [0.0, 1.0], "m2": [0.0, 1.0]}
+        )
+        service = memory_service_factory(store)
+        service.lexical_index = LexicalIndex(":memory:", b"k" * 32)
+        service.lexical_index.add_document("m1", "u1", "deploy failed with ERR_4711")
+        service.lexical_index.add_document("m2", "u1", "ERR_4711 again at home")
+        request = SearchMemoryRequest(query="ERR_4711", user_id="u1", tags=["work"], hybrid=True, min_similarity=0.3)
+
+        results = await service._hybrid_search(request, [1.0, 0.0], service._search_filters(request), limit=10)
+
+        assert [result[0] for result in results] == ["m1"]
@@ -0,0 +1,100 @@
+"""
+Unit tests for memory export and import archives.
+Tests chunked round trips and manifest validation.
+"""
+
+import io
+import json
+import tarfile
+
+import numpy as np
+import pytest
+
+from app.config import get_settings
+from app.services.memory_archive import MemoryArchive, MANIFEST_FILE
+
+
+class FakeVectorStore:
+    """Vector store double paging through fixed memories."""
+
+    def __init__(self, count):
+        """Create ``count`` memories with distinct embeddings."""
+        dimension = get_settings().embedding_dimension
+        self.ids = [f"m{i}" for i in range(count)]
+        self.texts = [f"cipher {i}" for i in range(count)]
+        self.metadatas = [{"user_id": "u1", "tags": ["t"], "n": i} for i in range(count)]
+        self.embeddings = np.arange(count * dimension, dtype=np.float32).reshape(count, dimension)
+
+    async def iter_memories(self, batch_size, **filters):
+        """Yield pages of at most ``batch_size`` memories."""
+        for start in range(0, len(self.ids), batch_size):
+            end = start + batch_size
+            yield self.ids[start:end], self.texts[start:end], self.metadatas[start:end], self.embeddings[start:end]
+
+
+class FakeMemoryService:
+    """Memory service double recording imported chunks."""
+
+    def __init__(self, count=0):
+        """Create the service around a fake store."""
+        self.vector_store = FakeVectorStore(count)
+        self.imported = []
+
+    async def import_memories(self, memory_ids, encrypted_texts, metadatas, embeddings):
+        """Record an imported chunk."""
+        self.imported.append((memory_ids, encrypted_texts, metadatas, embeddings))
+        return len(memory_ids)
+
+
+async def export_bytes(service, chunk_size):
+    """Collect a whole export."""
+    return b"".join([data async for data in MemoryArchive(service, chunk_size).export()])
+
+
+@pytest.mark.unit
+class TestMemoryArchive:
+    """Test the chunked archive format."""
+
+    async def test_round_trip(self):
+        """Test that an export imports back chunk by chunk without loss."""
+        source = FakeMemoryService(count=5)
+        archive = await export_bytes(source, chunk_size=2)
+
+        names = tarfile.open(fileobj=io.BytesIO(archive)).getnames()
+        assert names[0] == MANIFEST_FILE
+        assert len(names) == 1 + 2 * 3
+
+        target = FakeMemoryService()
+        stats = await MemoryArchive(target).import_archive(io.BytesIO(archive))
+
+        assert stats["imported"] == 5
+        assert stats["chunks"] == 3
+        assert [memory_id for chunk in target.imported for memory_id in chunk[0]] == source.vector_store.ids
+        assert target.imported[1][2] == source.vector_store.metadatas[2:4]
+        assert np.array_equal(
+            np.array([row for chunk in target.imported for row in chunk[3]], dtype=np.float32),
+            source.vector_store.embeddings
+        )
+
+    async def test_rejects_other_embedding_model(self):
+        """Test that archives from a different embedding model are refused."""
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            manifest = json.dumps({
+                "format": "memorylink-archive",
+                "version": 1,
+                "embedding_model": "other-model",
+                "embedding_dimension": 768
+            }).encode("utf-8")
+            info = tarfile.TarInfo(MANIFEST_FILE)
+            info.size = len(manifest)
+            tar.addfile(info, io.BytesIO(manifest))
+        buffer.seek(0)
+
+        with pytest.raises(ValueError, match="other-model"):
+            await MemoryArchive(FakeMemoryService()).import_archive(buffer)
+
+    async def test_rejects_unreadable_archive(self):
+        """Test that non-archive uploads raise a validation error."""
+        with pytest.raises(ValueError, match="unreadable archive"):
+            await MemoryArchive(FakeMemoryService()).import_archive(io.BytesIO(b"not a tar file"))
@@ -0,0 +1,71 @@
+"""
+Unit tests for decrypting search results on the decryption pool.
+Tests that large batches are split across threads without changing results.
+"""
+
+import threading
+
+import pytest
+
+from app.utils.encryption import EncryptionService
+
+
+class RecordingEncryptionService(EncryptionService):
+    """Encryption service that records the threads and batch sizes it decrypts with."""
+
+    def __init__(self, key):
+        """Initialize the service and its call log."""
+        super().__init__(key)
+        self.calls = []
+
+    def decrypt_many(self, encrypted_values, associated_data=None):
+        """Record the call and decrypt."""
+        self.calls.append((threading.current_thread().name, len(encrypted_values)))
+        return super().decrypt_many(encrypted_values, associated_data)
+
+
+def make_service(memory_service_factory, threshold, workers=4):
+    """Build a memory service decrypting through a recording encryption service."""
+    return memory_service_factory(
+        encryption_service=RecordingEncryptionService("parallel decrypt key"),
+        decrypt_parallel_threshold=threshold,
+        decrypt_workers=workers
+    )
+
+
+def make_hits(service, count):
+    """Build search hits whose texts are encrypted under their ids."""
+    ids = [f"m{i}" for i in range(count)]
+    texts = service.encryption_service.encrypt_many([f"memory {i}" for i in range(count)], ids)
+    return [(memory_id, 0.5, text, {}) for memory_id, text in zip(ids, texts)]
+
+
+@pytest.mark.unit
+class TestParallelDecryption:
+    """Test batch decryption of search hits."""
+
+    async def test_small_batches_decrypt_inline(self, memory_service_factory):
+        """Test batches under the threshold stay on the calling thread."""
+        service = make_service(memory_service_factory, threshold=10)
+        plaintexts = {}
+
+        await service._decrypt_hits(make_hits(service, 5), plaintexts)
+
+        assert service.encryption_service.calls == [(threading.current_thread().name, 5)]
+        assert plaintexts["m4"] == "memory 4"
+
+    async def test_large_batches_are_split_across_the_pool(self, memory_service_factory):
+        """Test large batches are chunked onto the pool and keep their order."""
+        service = make_service(memory_service_factory, threshold=10, workers=4)
+        hits = make_hits(service, 50)
+        hits[7] = ("m7", 0.5, hits[8][2], {})
+        plaintexts = {"m0": "already decrypted"}
+
+        await service._decrypt_hits(hits, plaintexts)
+
+        calls = service.encryption_service.calls
+        assert sorted(size for _, size in calls) == [10, 13, 13, 13]
+        assert all(name.startswith("decrypt") for name, _ in calls)
+        assert plaintexts["m0"] == "already decrypted"
+        assert plaintexts["m7"] is None
+        assert [plaintexts[f"m{i}"] for i in (1, 25, 49)] == ["memory 1", "memory 25", "memory 49"]
@@ -0,0 +1,126 @@
+"""
+Unit tests for the pending memory overlay.
+Tests brute-force search, filtering and acknowledgement.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.services.metadata_filters import evaluate_filters
+from app.services.pending_overlay import PendingMemory, PendingOverlay
+
+
+def make_memory(memory_id, user_id="u1", tags=None, metadata=None, timestamp=None):
+    """Build a pending memory."""
+    return PendingMemory(
+        memory_id=memory_id,
+        user_id=user_id,
+        text=f"text {memory_id}",
+        encrypted_text=f"encrypted {memory_id}",
+        tags=tags or [],
+        metadata=metadata or {},
+        timestamp=timestamp or datetime(2024, 1, 1),
+        content_hash=f"hash-{memory_id}"
+    )
+
+
+@pytest.mark.unit
+class TestPendingOverlay:
+    """Test visibility of memories that are not yet indexed."""
+
+    @pytest.fixture
+    def overlay(self):
+        """Create an overlay with two embedded memories for u1 and one for u2."""
+        overlay = PendingOverlay()
+        memories = [
+            make_memory("a", tags=["fruit"], metadata={"priority": 2}),
+            make_memory("b", metadata={"priority": "high"}, timestamp=datetime(2024, 6, 1)),
+            make_memory("c", user_id="u2")
+        ]
+        for memory in memories:
+            overlay.register(memory)
+        overlay.attach_embeddings(memories, [[1.0, 0.0], [0.0, 1.0], [1.0, 0.0]])
+        return overlay
+
+    def test_search_ranks_by_similarity(self, overlay):
+        """Test that hits are ordered by the vector store's similarity mapping."""
+        hits = overlay.search("u1", [[0.9, 0.1]], limit=10, min_similarity=0.0)[0]
+
+        assert [memory.memory_id for memory, _ in hits] == ["a", "b"]
+        assert hits[0][1] == pytest.approx(0.98)
+        assert hits[1][1] == 0.0
+
+    def test_search_is_scoped_to_user(self, overlay):
+        """Test that other users' pending memories are never returned."""
+        hits = overlay.search("u2", [[1.0, 0.0]], limit=10, min_similarity=0.0)[0]
+
+        assert [memory.memory_id for memory, _ in hits] == ["c"]
+        assert overlay.search("u3", [[1.0, 0.0]], limit=10) == [[]]
+
+    def test_search_applies_filters(self, overlay):
+        """Test tag, time and metadata filters."""
+        query = [[1.0, 1.0]]
+
+        by_tag = overlay.search("u1", query, 10, 0.0, tag_filter=["fruit"])[0]
+        since = datetime(2024, 3, 1).timestamp()
+        by_time = overlay.search("u1", query, 10, 0.0, since=since)[0]
+        by_metadata = overlay.search("u1", query, 10, 0.0, metadata_filters={"priority": {"$gte": 1}})[0]
+
+        assert [memory.memory_id for memory, _ in by_tag] == ["a"]
+        assert [memory.memory_id for memory, _ in by_time] == ["b"]
+        assert [memory.memory_id for memory, _ in by_metadata] == ["a"]
+
+    def test_unembedded_memories_are_not_searchable(self):
+        """Test that registered memories only become searchable with an embedding."""
+        overlay = PendingOverlay()
+        overlay.register(make_memory("a"))
+
+        assert overlay.get("a") is not None
+        assert not overlay.has_pending("u1")
+        assert overlay.search("u1", [[1.0, 0.0]], limit=10, min_similarity=0.0) == [[]]
+
+    def test_acknowledge_removes_memories(self, overlay):
+        """Test that acknowledged memories leave the overlay."""
+        overlay.acknowledge(["a", "b"])
+
+        assert overlay.get("a") is None
+        assert not overlay.has_pending("u1")
+        assert overlay.has_pending("u2")
+        assert overlay.get_stats() == {"pending": 1, "searchable": 1, "users": 1}
+
+    def test_get_embeddings(self, overlay):
+        """Test embedding lookup for diversification."""
+        assert overlay.get_embeddings(["a", "missing"]) == {"a": [1.0, 0.0]}
+
+
+@pytest.mark.unit
+class TestEvaluateFilters:
+    """Test in-memory evaluation of metadata filters."""
+
+    def test_operators(self):
+        """Test comparison and membership operators."""
+        metadata = {"priority": 3, "source": "chat", "draft": False}
+
+        assert evaluate_filters({"source": "chat"}, metadata)
+        assert evaluate_filters({"priority": {"$gt": 2}}, metadata)
+        assert not evaluate_filters({"priority": {"$lt": 2}}, metadata)
+        assert evaluate_filters({"source": {"$in": ["chat", "email"]}}, metadata)
+        assert evaluate_filters({"source": {"$nin": ["email"]}}, metadata)
+        assert evaluate_filters({"draft": {"$ne": True}}, metadata)
+
+    def test_logical_operators(self):
+        """Test $and and $or."""
+        metadata = {"priority": 3, "source": "chat"}
+
+        assert evaluate_filters({"$and": [{"priority": 3}, {"source": "chat"}]}, metadata)
+        assert evaluate_filters({"$or": [{"priority": 1}, {"source": "chat"}]}, metadata)
+        assert not evaluate_filters({"$or": [{"priority": 1}, {"source": "email"}]}, metadata)
+
+    def test_missing_keys_and_mismatched_types(self):
+        """Test that missing keys and other value types never match."""
+        metadata = {"priority": "3"}
+
+        assert not evaluate_filters({"owner": "x"}, metadata)
+        assert not evaluate_filters({"priority": 3}, metadata)
+        assert not evaluate_filters({"priority": {"$gt": 1}}, metadata)
@@ -0,0 +1,86 @@
+"""
+Unit tests for the cache of decrypted memory texts.
+Tests ciphertext versioning, expiry and skipping decryption on hits.
+"""
+
+import time
+
+import pytest
+
+from app.services.plaintext_cache import PlaintextCache
+from app.utils.encryption import EncryptionService
+
+
+class CountingEncryptionService(EncryptionService):
+    """Encryption service that counts the values it decrypts."""
+
+    def __init__(self, key):
+        """Initialize the service and its counter."""
+        super().__init__(key)
+        self.decrypted = 0
+
+    def decrypt(self, encrypted_data, associated_data=None):
+        """Count and decrypt one value."""
+        self.decrypted += 1
+        return super().decrypt(encrypted_data, associated_data)
+
+    def decrypt_many(self, encrypted_values, associated_data=None):
+        """Count and decrypt a batch."""
+        self.decrypted += len(encrypted_values)
+        return super().decrypt_many(encrypted_values, associated_data)
+
+
+@pytest.mark.unit
+class TestPlaintextCache:
+    """Test caching of decrypted texts."""
+
+    @pytest.fixture
+    def cache(self):
+        """Create an empty cache."""
+        return PlaintextCache(max_entries=10, max_bytes=1024 * 1024, ttl_s=60)
+
+    def test_rewritten_values_miss(self, cache):
+        """Test re-encrypting a memory makes its cached text stale."""
+        service = EncryptionService("plaintext cache key")
+        encrypted = service.encrypt("secret", "m1")
+        cache.set("m1", encrypted, "secret")
+
+        assert cache.get("m1", encrypted) == "secret"
+        assert cache.get("m1", service.encrypt("secret", "m1")) is None
+        assert cache.get("m1", encrypted) is None
+        assert cache.get_stats()["stale"] == 1
+
+    def test_entries_expire(self, cache, monkeypatch):
+        """Test entries older than the TTL are discarded."""
+        cache.set("m1", "value", "secret")
+        clock = time.monotonic() + 61
+        monkeypatch.setattr("app.services.plaintext_cache.time.monotonic", lambda: clock)
+
+        assert cache.get("m1", "value") is None
+        assert cache.get_stats()["expired"] == 1
+
+    def test_cache_is_bounded_by_bytes(self):
+        """Test large texts evict older entries to stay under the byte limit."""
+        cache = PlaintextCache(max_entries=10, max_bytes=4096, ttl_s=60)
+        cache.set("m1", "v1", "a" * 3000)
+        cache.set("m2", "v2", "b" * 3000)
+
+        assert cache.get("m1", "v1") is None
+        assert cache.get("m2", "v2") == "b" * 3000
+
+    async def test_hot_memories_skip_decryption(self, cache, memory_service_factory):
+        """Test repeated reads of the same hits decrypt each memory once."""
+        service = memory_service_factory(encryption_service=CountingEncryptionService("plaintext cache key"))
+        service.plaintext_cache = cache
+        ids = ["m1", "m2"]
+        encrypted = service.encryption_service.encrypt_many(["one", "two"], ids)
+        hits = [(memory_id, 0.5, text, {}) for memory_id, text in zip(ids, encrypted)]
+
+        for _ in range(3):
+            plaintexts = {}
+            await service._decrypt_hits(hits, plaintexts)
+            assert plaintexts == {"m1": "one", "m2": "two"}
+        assert service._decrypt_text(encrypted[0], "m1") == "one"
+
+        assert service.encryption_service.decrypted == 2
+        assert cache.get_stats()["hits"] == 5
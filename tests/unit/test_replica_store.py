@@ -0,0 +1,164 @@
+"""
+Unit tests for memory-mapped replica snapshots.
+Tests publishing, exact search with filters, id lookup and snapshot swaps.
+"""
+
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.config import get_settings
+from app.services.replica_store import (
+    CURRENT_FILE,
+    ReadOnlyReplicaError,
+    ReplicaVectorStore,
+    publish_snapshot
+)
+from app.services.vector_store import TIMESTAMP_EPOCH_KEY
+
+
+class FakeVectorStore:
+    """Primary store double with memories of two users on different days."""
+
+    def __init__(self, count):
+        """Create ``count`` memories alternating between u1 and u2."""
+        dimension = get_settings().embedding_dimension
+        rng = np.random.default_rng(7)
+        self.embeddings = rng.normal(size=(count, dimension)).astype(np.float32)
+        # Short vectors keep every squared distance below 1, so no similarity is clamped
+        self.embeddings *= 0.3 / np.linalg.norm(self.embeddings, axis=1, keepdims=True)
+        self.ids = [f"m{i:03d}" for i in range(count)]
+        self.metadatas = [
+            {
+                "user_id": "u1" if i % 2 else "u2",
+                "tags": ["even"] if i % 4 == 0 else ["odd"],
+                "timestamp": datetime(2024, 1, 1 + i % 28).isoformat(),
+                TIMESTAMP_EPOCH_KEY: datetime(2024, 1, 1 + i % 28).timestamp(),
+                "n": i
+            }
+            for i in range(count)
+        ]
+
+    async def iter_memories(self, batch_size, **filters):
+        """Yield pages of memories in store order."""
+        for start in range(0, len(self.ids), batch_size):
+            end = start + batch_size
+            yield (
+                self.ids[start:end],
+                [f"cipher {memory_id}" for memory_id in self.ids[start:end]],
+                self.metadatas[start:end],
+                self.embeddings[start:end]
+            )
+
+    def get_type_manifest(self):
+        """Get the metadata types of the fake memories."""
+        return {"n": ["int"]}
+
+
+@pytest.mark.unit
+class TestReplicaVectorStore:
+    """Test serving searches from published snapshots."""
+
+    @pytest.fixture
+    def primary(self):
+        """Create a primary store double."""
+        return FakeVectorStore(count=40)
+
+    @pytest.fixture
+    async def replica(self, primary, tmp_path):
+        """Publish a snapshot and open it as a replica."""
+        await publish_snapshot(primary, str(tmp_path))
+        store = ReplicaVectorStore(str(tmp_path))
+        await store.initialize()
+        return store
+
+    async def test_search_matches_exact_ranking(self, primary, replica):
+        """Test that a user's results are the exact nearest neighbours."""
+        query = primary.embeddings[3]
+        results = await replica.search_memories(query.tolist(), limit=5, min_similarity=-1.0, user_filter="u1")
+
+        rows = [i for i, metadata in enumerate(primary.metadatas) if metadata["user_id"] == "u1"]
+        distances = np.sum((primary.embeddings[rows] - query) ** 2, axis=1)
+        expected = [primary.ids[rows[i]] for i in np.argsort(distances)[:5]]
+
+        assert [result[0] for result in results] == expected
+        assert results[0][1] == pytest.approx(1.0)
+        assert results[0][2] == "cipher m003"
+
+    async def test_search_filters(self, primary, replica):
+        """Test time range, tag and metadata filters."""
+        since = datetime(2024, 1, 10).timestamp()
+        until = datetime(2024, 1, 20).timestamp()
+        results = await replica.search_memories(
+            primary.embeddings[0].tolist(),
+            limit=50,
+            min_similarity=-1.0,
+            user_filter="u2",
+            tag_filter=["even"],
+            since=since,
+            until=until,
+            metadata_filters={"n": {"$gte": 12}}
+        )
+
+        expected = {
+            primary.ids[i] for i, metadata in enumerate(primary.metadatas)
+            if metadata["user_id"] == "u2" and "even" in metadata["tags"]
+            and since <= metadata[TIMESTAMP_EPOCH_KEY] <= until and metadata["n"] >= 12
+        }
+        assert expected
+        assert {result[0] for result in results} == expected
+
+    async def test_rejects_invalid_filters(self, replica):
+        """Test that filters are validated like on the primary."""
+        with pytest.raises(ValueError, match="Unsupported filter operator"):
+            await replica.search_memories(
+                [0.0] * get_settings().embedding_dimension,
+                user_filter="u1",
+                metadata_filters={"n": {"$bad": 1}}
+            )
+
+    async def test_lookup_by_id(self, primary, replica):
+        """Test reading single memories and embeddings by id."""
+        text, metadata = await replica.get_memory("m007")
+        embeddings = await replica.get_embeddings(["m007", "missing"])
+
+        assert text == "cipher m007"
+        assert metadata["n"] == 7
+        assert await replica.get_memory("missing") is None
+        assert np.allclose(embeddings["m007"], primary.embeddings[7])
+        assert list(embeddings) == ["m007"]
+
+    async def test_lists_newest_first(self, primary, replica):
+        """Test listing pages through a user's memories by descending time."""
+        first = await replica.list_memories("u1", limit=3)
+        second = await replica.list_memories("u1", limit=3, offset=3, include_documents=False)
+
+        epochs = [metadata[TIMESTAMP_EPOCH_KEY] for _, _, metadata in first + second]
+        assert epochs == sorted(epochs, reverse=True)
+        assert all(metadata["user_id"] == "u1" for _, _, metadata in first + second)
+        assert first[0][1].startswith("cipher ")
+        assert second[0][1] is None
+        assert await replica.list_memories("u1", limit=5, offset=100) == []
+
+    async def test_writes_are_rejected(self, replica):
+        """Test that the replica store refuses writes."""
+        with pytest.raises(ReadOnlyReplicaError):
+            await replica.add_memories(["m1"], [[0.0]], ["text"], [{}])
+        with pytest.raises(ReadOnlyReplicaError):
+            await replica.delete_memory("m001")
+
+    async def test_swaps_to_newly_published_snapshot(self, primary, replica, tmp_path):
+        """Test that refresh picks up a new snapshot and old ones are pruned."""
+        first = replica.snapshot.name
+        for _ in range(3):
+            await publish_snapshot(FakeVectorStore(count=10), str(tmp_path))
+
+        assert await replica.refresh()
+        assert replica.snapshot.name != first
+        assert replica.snapshot.count == 10
+        assert not await replica.refresh()
+
+        snapshots = [entry for entry in os.listdir(tmp_path) if entry != CURRENT_FILE]
+        assert len(snapshots) == get_settings().snapshot_retention
@@ -0,0 +1,114 @@
+"""
+Unit tests for search re-ranking stages.
+Tests diversification of near-duplicate candidates and cross-encoder scoring.
+"""
+
+import pytest
+
+from app.services.reranking import maximal_marginal_relevance, CrossEncoderReranker
+
+
+@pytest.mark.unit
+class TestMaximalMarginalRelevance:
+    """Test MMR selection over candidate embeddings."""
+
+    @pytest.fixture
+    def near_duplicates(self):
+        """Three near-identical candidates and one distinct one."""
+        embeddings = [
+            [1.0, 0.0, 0.0],
+            [0.99, 0.01, 0.0],
+            [0.98, 0.02, 0.0],
+            [0.0, 1.0, 0.0],
+        ]
+        relevance = [0.95, 0.94, 0.93, 0.70]
+        return embeddings, relevance
+
+    def test_zero_diversity_keeps_relevance_order(self, near_duplicates):
+        """Test diversity 0 degenerates to plain top-k by relevance."""
+        embeddings, relevance = near_duplicates
+
+        assert maximal_marginal_relevance(embeddings, relevance, k=3, diversity=0.0) == [0, 1, 2]
+
+    def test_diversity_promotes_distinct_candidate(self, near_duplicates):
+        """Test a distinct memory displaces near-duplicates."""
+        embeddings, relevance = near_duplicates
+
+        selected = maximal_marginal_relevance(embeddings, relevance, k=2, diversity=0.5)
+
+        assert selected == [0, 3]
+
+    def test_selection_never_repeats_and_respects_k(self, near_duplicates):
+        """Test each candidate is chosen at most once."""
+        embeddings, relevance = near_duplicates
+
+        selected = maximal_marginal_relevance(embeddings, relevance, k=10, diversity=0.7)
+
+        assert sorted(selected) == [0, 1, 2, 3]
+
+    def test_empty_candidates(self):
+        """Test an empty candidate set selects nothing."""
+        assert maximal_marginal_relevance([], [], k=5, diversity=0.5) == []
+
+
+class FakeCrossEncoder:
+    """Cross-encoder stand-in that scores by shared words."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, pairs, batch_size=None):
+        self.calls += 1
+        return [len(set(query.split()) & set(text.split())) for query, text in pairs]
+
+
+@pytest.mark.unit
+class TestCrossEncoderReranker:
+    """Test cross-encoder scoring, caching and latency budgets."""
+
+    @pytest.fixture
+    def reranker(self):
+        """Create a reranker with a preloaded fake model."""
+        reranker = CrossEncoderReranker("fake-model", batch_size=8, cache_size=100)
+        reranker._model = FakeCrossEncoder()
+        return reranker
+
+    async def test_scores_are_cached_per_query_and_memory(self, reranker):
+        """Test a repeated query is served from the score cache."""
+        candidates = [("m1", "red apple pie"), ("m2", "banana bread")]
+
+        first = await reranker.score("apple pie", candidates)
+        second = await reranker.score("apple pie", candidates)
+
+        assert first == second == [2.0, 0.0]
+        assert reranker._model.calls == 1
+
+    async def test_invalidate_forces_rescoring(self, reranker):
+        """Test invalidating a memory drops its cached scores."""
+        await reranker.score("apple", [("m1", "apple")])
+        reranker.invalidate("m1")
+
+        await reranker.score("apple", [("m1", "apple")])
+
+        assert reranker._model.calls == 2
+
+    async def test_stage_is_skipped_when_budget_would_be_exceeded(self, reranker):
+        """Test the latency estimate gates inference."""
+        reranker._per_pair_ms = 10.0
+
+        scores = await reranker.score("apple", [("m1", "a"), ("m2", "b")], budget_ms=5.0)
+
+        assert scores is None
+        assert reranker._model.calls == 0
+        assert reranker.get_stats()["skipped"] == 1
+
+    async def test_unloaded_model_is_skipped_under_budget(self):
+        """Test a budgeted request does not wait for the model to load."""
+        reranker = CrossEncoderReranker("fake-model", batch_size=8, cache_size=100)
+
+        async def never_loads():
+            return None
+
+        reranker._load_model = never_loads
+
+        assert await reranker.score("apple", [("m1", "apple")], budget_ms=50.0) is None
@@ -0,0 +1,86 @@
+"""
+Unit tests for the search result cache.
+Tests key normalization, write-generation invalidation and expiry.
+"""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from app.models.memory_models import SearchMemoryRequest, MemorySearchResult
+from app.services.search_cache import SearchResultCache
+
+
+def make_request(**overrides):
+    """Build a search request with test defaults."""
+    fields = {"query": "apple pie", "user_id": "u1", "min_similarity": 0.0}
+    fields.update(overrides)
+    return SearchMemoryRequest(**fields)
+
+
+def make_result(memory_id="m1"):
+    """Build a search result."""
+    return MemorySearchResult(
+        id=memory_id,
+        text="red apple pie",
+        tags=[],
+        timestamp=datetime(2024, 1, 1),
+        similarity_score=0.9
+    )
+
+
+@pytest.mark.unit
+class TestSearchResultCache:
+    """Test caching and invalidation of search results."""
+
+    @pytest.fixture
+    def cache(self):
+        """Create an empty cache."""
+        return SearchResultCache(max_entries=10, max_bytes=1024 * 1024)
+
+    def test_equivalent_requests_share_an_entry(self, cache):
+        """Test whitespace and tag order do not split the cache."""
+        cache.set(make_request(query="apple   pie", tags=["b", "a"]), 0, [make_result()])
+
+        cached = cache.get(make_request(tags=["a", "b"]), 0)
+
+        assert [result.id for result in cached] == ["m1"]
+
+    def test_different_options_miss(self, cache):
+        """Test any result-affecting option is part of the key."""
+        cache.set(make_request(), 0, [make_result()])
+
+        assert cache.get(make_request(limit=5), 0) is None
+        assert cache.get(make_request(hybrid=True), 0) is None
+        assert cache.get(make_request(user_id="u2"), 0) is None
+
+    def test_write_generation_makes_entries_stale(self, cache):
+        """Test a user's write invalidates their cached searches."""
+        request = make_request()
+        cache.set(request, cache.generation("u1"), [make_result()])
+
+        cache.bump("u1")
+
+        assert cache.get(request, cache.generation("u1")) is None
+        assert cache.get_stats()["stale"] == 1
+
+    def test_results_computed_before_a_write_are_not_stored(self, cache):
+        """Test a search racing a write does not cache outdated results."""
+        request = make_request()
+        generation = cache.generation("u1")
+        cache.bump("u1")
+
+        cache.set(request, generation, [make_result()])
+
+        assert cache.get_stats()["entries"] == 0
+
+    def test_entries_expire(self, cache, monkeypatch):
+        """Test entries older than the TTL are discarded."""
+        request = make_request()
+        cache.set(request, 0, [make_result()])
+        clock = time.monotonic() + cache.ttl_s + 1
+        monkeypatch.setattr("app.services.search_cache.time.monotonic", lambda: clock)
+
+        assert cache.get(request, 0) is None
+        assert cache.get_stats()["expired"] == 1
@@ -0,0 +1,173 @@
+"""
+Unit tests for the search endpoints.
+Tests batch searches against individual searches, filters and request
+limits, and the NDJSON records of streamed searches.
+"""
+
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.memory_routes import get_memory_service, router
+from app.models.memory_models import BatchSearchMemoryRequest, SearchMemoryRequest
+from app.utils.encryption import EncryptionService
+
+VOCABULARY = ["apple", "pie", "meeting", "notes", "python", "deploy", "garden", "roadmap"]
+
+MEMORIES = [
+    ("m1", "u1", "apple pie", ["food"]),
+    ("m2", "u1", "apple meeting notes", ["work"]),
+    ("m3", "u1", "python deploy roadmap", ["work"]),
+    ("m4", "u1", "garden apple", ["home"]),
+    ("m5", "u2", "apple pie", ["food"]),
+]
+
+
+def embed(text):
+    """Embed a text as its normalized bag of vocabulary words."""
+    vector = np.array([float(word in text.split()) for word in VOCABULARY])
+    return (vector / (np.linalg.norm(vector) or 1.0)).tolist()
+
+
+class FakeEmbeddingService:
+    """Embedding service double with deterministic vectors."""
+
+    async def encode_text(self, text):
+        """Embed one text."""
+        return embed(text)
+
+    async def encode_texts(self, texts):
+        """Embed several texts."""
+        return [embed(text) for text in texts]
+
+
+def read_ndjson(response):
+    """Parse every line of an NDJSON response."""
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.fixture
+def service(memory_service_factory, vector_store_factory):
+    """Create a memory service over the test memories."""
+    encryption_service = EncryptionService("search routes key")
+    store = vector_store_factory(
+        {memory_id: encryption_service.encrypt(text, memory_id) for memory_id, _, text, _ in MEMORIES},
+        {
+            memory_id: {"user_id": user_id, "tags": tags, "timestamp": datetime(2024, 1, 1).isoformat()}
+            for memory_id, user_id, _, tags in MEMORIES
+        },
+        {memory_id: embed(text) for memory_id, _, text, _ in MEMORIES}
+    )
+    return memory_service_factory(store, encryption_service, FakeEmbeddingService())
+
+
+@pytest.fixture
+def client(service):
+    """Create a client for the memory routes backed by ``service``."""
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_memory_service] = lambda: service
+    return TestClient(app)
+
+
+@pytest.mark.unit
+class TestBatchSearch:
+    """Test running several searches in one request."""
+
+    async def test_batch_matches_individual_searches(self, service):
+        """Test each query of a batch returns what searching it alone returns."""
+        queries = ["apple pie", "meeting notes", "python deploy"]
+        batch = await service.search_memories_batch(
+            BatchSearchMemoryRequest(queries=queries, user_id="u1", min_similarity=0.1)
+        )
+
+        assert [query for query, _ in batch] == queries
+        for query, results in batch:
+            single = await service.search_memories(
+                SearchMemoryRequest(query=query, user_id="u1", min_similarity=0.1)
+            )
+            assert [(r.id, r.text, r.similarity_score) for r in results] == \
+                [(r.id, r.text, r.similarity_score) for r in single]
+
+    async def test_filters_apply_to_every_query(self, service):
+        """Test the user and tag filters narrow the results of each query."""
+        batch = await service.search_memories_batch(
+            BatchSearchMemoryRequest(queries=["apple", "notes"], user_id="u1", tags=["work"], min_similarity=0.1)
+        )
+
+        assert [[result.id for result in results] for _, results in batch] == [["m2"], ["m2"]]
+        assert all(result.id != "m5" for _, results in batch for result in results)
+
+    def test_endpoint_groups_results_per_query(self, client):
+        """Test the endpoint returns one group per query in request order."""
+        response = client.post("/memory/search/batch", json={
+            "queries": ["garden", "apple pie"],
+            "user_id": "u1",
+            "limit": 1,
+            "min_similarity": 0.1
+        })
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["total_queries"] == 2
+        assert [group["query"] for group in body["results"]] == ["garden", "apple pie"]
+        assert [[result["id"] for result in group["results"]] for group in body["results"]] == [["m4"], ["m1"]]
+        assert [group["total_found"] for group in body["results"]] == [1, 1]
+
+    @pytest.mark.parametrize("queries", [[], ["q"] * 51])
+    def test_endpoint_enforces_the_batch_size_limit(self, client, queries):
+        """Test empty batches and batches over 50 queries are rejected."""
+        response = client.post("/memory/search/batch", json={"queries": queries, "user_id": "u1"})
+
+        assert response.status_code == 422
+
+
+@pytest.mark.unit
+class TestStreamingSearch:
+    """Test streaming search results as NDJSON."""
+
+    def test_results_are_followed_by_a_summary(self, client):
+        """Test each hit is one result line and the last line summarizes the search."""
+        response = client.post("/memory/search/stream", json={
+            "query": "apple pie",
+            "user_id": "u1",
+            "min_similarity": 0.1
+        })
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        records = read_ndjson(response)
+        results, summary = records[:-1], records[-1]
+        assert [record["type"] for record in results] == ["result"] * 3
+        assert [record["id"] for record in results] == ["m1", "m4", "m2"]
+        assert results[0]["text"] == "apple pie"
+        assert summary["type"] == "summary"
+        assert summary["query"] == "apple pie"
+        assert summary["total_found"] == 3
+        assert summary["execution_time_ms"] >= 0
+        assert {"embedding_ms", "retrieval_ms", "decrypt_ms", "total_ms"} <= set(summary["timings"])
+
+    def test_failures_mid_stream_end_with_an_error_record(self, client, service, monkeypatch):
+        """Test a failure after the first result is reported as an error line, not a truncated stream."""
+        decrypt_result = service._decrypt_result
+
+        def fail_after_first(memory_id, encrypted_text, plaintexts):
+            if memory_id != "m1":
+                raise RuntimeError("decryption executor died")
+            return decrypt_result(memory_id, encrypted_text, plaintexts)
+
+        monkeypatch.setattr(service, "_decrypt_result", fail_after_first)
+        response = client.post("/memory/search/stream", json={
+            "query": "apple pie",
+            "user_id": "u1",
+            "min_similarity": 0.1
+        })
+
+        assert response.status_code == 200
+        records = read_ndjson(response)
+        assert [record["type"] for record in records] == ["result", "error"]
+        assert records[-1]["detail"] == "Internal server error occurred during search"
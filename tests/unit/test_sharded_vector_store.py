@@ -0,0 +1,53 @@
+"""
+Unit tests for the sharded vector store.
+Tests id routing and the merge of per-shard results.
+"""
+
+import pytest
+
+from app.services.sharded_vector_store import ShardedVectorStore, merge_top_k
+
+
+def hit(memory_id, similarity):
+    """Build a search hit tuple."""
+    return (memory_id, similarity, "encrypted", {})
+
+
+@pytest.mark.unit
+class TestMergeTopK:
+    """Test merging per-shard top-k lists."""
+
+    def test_global_top_k_across_shards(self):
+        """Test the best hits are kept regardless of shard."""
+        merged = merge_top_k(
+            [[hit("a", 0.9), hit("b", 0.4)], [hit("c", 0.95), hit("d", 0.5)], []],
+            limit=3
+        )
+
+        assert [memory_id for memory_id, *_ in merged] == ["c", "a", "d"]
+
+    def test_fewer_hits_than_limit(self):
+        """Test all hits are returned in order when under the limit."""
+        merged = merge_top_k([[hit("a", 0.2)], [hit("b", 0.7)]], limit=10)
+
+        assert [memory_id for memory_id, *_ in merged] == ["b", "a"]
+
+    def test_no_hits(self):
+        """Test empty shards merge to nothing."""
+        assert merge_top_k([[], []], limit=5) == []
+
+
+@pytest.mark.unit
+class TestShardRouting:
+    """Test memory ids map to shards deterministically."""
+
+    def test_routing_is_stable_and_in_range(self):
+        """Test the same id always lands on the same shard."""
+        store = ShardedVectorStore(shard_count=4)
+        ids = [f"memory-{index}" for index in range(200)]
+
+        first = [store.shard_index(memory_id) for memory_id in ids]
+        second = [ShardedVectorStore(shard_count=4).shard_index(memory_id) for memory_id in ids]
+
+        assert first == second
+        assert set(first) == {0, 1, 2, 3}
@@ -0,0 +1,162 @@
+"""
+Unit tests for the hot/cold tiered vector store.
+Tests hot tier windowing and eviction, and routing searches between tiers.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from app.services.tiered_vector_store import HotTier, TieredVectorStore
+from app.services.vector_store import TIMESTAMP_EPOCH_KEY
+
+DAY = 86400
+
+
+def make_metadata(age_days, user_id="u1", **extra):
+    """Build stored metadata for a memory ``age_days`` old."""
+    return {"user_id": user_id, "tags": ["t"], TIMESTAMP_EPOCH_KEY: time.time() - age_days * DAY, **extra}
+
+
+class FakeColdStore:
+    """Cold store double that records the searches it receives."""
+
+    def __init__(self, results=None):
+        """Create the store with canned search results."""
+        self.results = results or []
+        self.searches = []
+        self.written = []
+
+    async def initialize(self):
+        """Nothing to initialize."""
+
+    async def iter_memories(self, batch_size=1000, **filters):
+        """Hold no memories to promote."""
+        for page in ():
+            yield page
+
+    async def add_memories(self, memory_ids, embeddings, texts, metadatas):
+        """Record written memories."""
+        self.written.extend(memory_ids)
+        return len(memory_ids)
+
+    async def search_memories_batch(self, query_embeddings, limit=10, **filters):
+        """Record the search and return the canned results."""
+        self.searches.append(filters)
+        return [list(self.results) for _ in query_embeddings]
+
+    def get_type_manifest(self):
+        """Get an empty type manifest."""
+        return {}
+
+
+@pytest.mark.unit
+class TestHotTier:
+    """Test the RAM-resident tier."""
+
+    @pytest.fixture
+    def tier(self):
+        """Create a loaded tier with a 10 day window."""
+        tier = HotTier(dimension=2, window_seconds=10 * DAY, max_memories=100)
+        tier.loaded = True
+        return tier
+
+    def test_only_recent_memories_are_kept(self, tier):
+        """Test that memories older than the window are not added."""
+        added = tier.add(
+            ["new", "old"],
+            [[1.0, 0.0], [0.0, 1.0]],
+            ["cipher new", "cipher old"],
+            [make_metadata(1), make_metadata(20)]
+        )
+
+        assert added == 1
+        assert tier.get("new")[0] == "cipher new"
+        assert tier.get("old") is None
+
+    def test_search_ranks_and_filters(self, tier):
+        """Test exact ranking, user scoping and metadata filters."""
+        tier.add(
+            ["a", "b", "c"],
+            [[0.1, 0.0], [0.0, 0.1], [0.1, 0.0]],
+            ["ca", "cb", "cc"],
+            [make_metadata(1, n=1), make_metadata(2, n=2), make_metadata(1, user_id="u2")]
+        )
+
+        hits = tier.search([[0.1, 0.0]], 10, 0.0, "u1", None, None, None, None)[0]
+        filtered = tier.search([[0.1, 0.0]], 10, 0.0, "u1", None, None, None, {"n": 2})[0]
+
+        assert [hit[0] for hit in hits] == ["a", "b"]
+        assert hits[0][1] == pytest.approx(1.0)
+        assert [hit[0] for hit in filtered] == ["b"]
+
+    def test_eviction_moves_boundary(self):
+        """Test that exceeding capacity evicts the oldest memories and raises the boundary."""
+        tier = HotTier(dimension=2, window_seconds=30 * DAY, max_memories=10)
+        ids = [f"m{i}" for i in range(11)]
+        tier.add(ids, np.zeros((11, 2)), ids, [make_metadata(11 - i) for i in range(11)])
+
+        stats = tier.get_stats()
+        assert stats["memories"] == 9
+        assert tier.get("m0") is None and tier.get("m1") is None
+        assert tier.boundary > time.time() - 10 * DAY
+
+    def test_demote_and_remove(self, tier):
+        """Test that aged-out and deleted memories leave the tier."""
+        tier.add(
+            ["a", "b", "c"],
+            np.zeros((3, 2)),
+            ["ca", "cb", "cc"],
+            [make_metadata(1), make_metadata(8), make_metadata(2)]
+        )
+
+        assert tier.demote(now=time.time() + 5 * DAY) == 1
+        tier.remove("a")
+        tier.update_metadata("c", {"tags": ["x"], "stale": None})
+
+        assert tier.get("a") is None and tier.get("b") is None
+        assert tier.get("c")[1]["tags"] == ["x"]
+        assert tier.get_embeddings(["a", "c"]) == {"c": [0.0, 0.0]}
+
+
+@pytest.mark.unit
+class TestTieredVectorStore:
+    """Test routing between the tiers."""
+
+    async def test_recent_search_skips_cold_store(self):
+        """Test that a time range inside the window is answered from RAM."""
+        cold = FakeColdStore()
+        store = TieredVectorStore(cold, HotTier(2, 10 * DAY, 100))
+        await store.add_memories(["a"], [[0.1, 0.0]], ["ca"], [make_metadata(1)])
+
+        results = await store.search_memories(
+            [0.1, 0.0], limit=5, min_similarity=0.0, user_filter="u1", since=time.time() - 5 * DAY
+        )
+
+        assert cold.written == ["a"]
+        assert [hit[0] for hit in results] == ["a"]
+        assert cold.searches == []
+
+    async def test_older_range_is_split_and_merged(self):
+        """Test that the cold store only covers the range before the boundary."""
+        tier = HotTier(2, 10 * DAY, 100)
+        cold = FakeColdStore(results=[("old", 0.9, "c-old", make_metadata(30)), ("a", 0.5, "ca", make_metadata(1))])
+        store = TieredVectorStore(cold, tier)
+        await store.add_memories(["a"], [[0.1, 0.0]], ["ca"], [make_metadata(1)])
+
+        results = await store.search_memories([0.1, 0.0], limit=5, min_similarity=0.0, user_filter="u1")
+
+        assert cold.searches[0]["until"] == tier.boundary
+        assert [(hit[0], round(hit[1], 4)) for hit in results] == [("a", 1.0), ("old", 0.9)]
+
+    async def test_hot_reads_honor_include_document(self):
+        """Test a hot memory read without its document leaves the text out, like the cold store."""
+        store = TieredVectorStore(FakeColdStore(), HotTier(2, 10 * DAY, 100))
+        await store.add_memories(["a"], [[0.1, 0.0]], ["ca"], [make_metadata(1)])
+
+        text, metadata = await store.get_memory("a", include_document=False)
+
+        assert text is None
+        assert metadata["user_id"] == "u1"
+        assert (await store.get_memory("a"))[0] == "ca"
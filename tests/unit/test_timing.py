@@ -0,0 +1,31 @@
+"""
+Unit tests for per-request stage timing.
+"""
+
+import pytest
+
+from app.utils.timing import StageTimer
+
+
+@pytest.mark.unit
+class TestStageTimer:
+    """Test accumulation and reporting of stage timings."""
+
+    def test_repeated_stages_accumulate(self):
+        """Test time recorded for the same stage is summed."""
+        timer = StageTimer()
+        timer.add("decrypt", 1.5)
+        timer.add("decrypt", 2.0)
+
+        assert timer.as_dict()["decrypt_ms"] == 3.5
+
+    def test_stage_context_records_time(self):
+        """Test a timed block is reported alongside the total."""
+        timer = StageTimer()
+        with timer.stage("embedding"):
+            pass
+
+        timings = timer.as_dict()
+
+        assert timings["embedding_ms"] >= 0
+        assert timings["total_ms"] >= timings["embedding_ms"]
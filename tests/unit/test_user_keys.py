@@ -0,0 +1,171 @@
+"""
+Unit tests for per-user data-encryption keys.
+Tests key creation and caching, crypto-shredding across processes, master
+key rotation, shipping the key table with replica snapshots, and deleting
+a user's memories.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.memory_routes import get_memory_service, router
+from app.services.replica_store import (
+    ReadOnlyReplicaError,
+    ReplicaVectorStore,
+    SnapshotUserKeys,
+    publish_snapshot
+)
+from app.services.user_keys import UserKeyStore
+from app.utils.encryption import FORMAT_USER_KEY, EncryptionService
+
+
+def open_store(tmp_path, key="master key", previous_keys=None, recheck_s=5.0):
+    """Open the key table under a master keyring."""
+    keyring = EncryptionService(key, previous_keys=previous_keys)
+    return UserKeyStore(str(tmp_path / "user_keys.sqlite3"), keyring, cache_entries=10, recheck_s=recheck_s)
+
+
+def make_service(store, key="master key", previous_keys=None):
+    """Create a service sealing user values under their data keys."""
+    return EncryptionService(key, previous_keys=previous_keys, data_keys=store)
+
+
+def make_owned_store(vector_store_factory, owners):
+    """Create a store double holding one memory per id, owned by the mapped user."""
+    return vector_store_factory(
+        {memory_id: f"cipher {memory_id}" for memory_id in owners},
+        {memory_id: {"user_id": user_id} for memory_id, user_id in owners.items()}
+    )
+
+
+def delete_user(service, user_id):
+    """Call the user deletion endpoint against ``service``."""
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_memory_service] = lambda: service
+    return TestClient(app).delete(f"/memory/user/{user_id}").json()
+
+
+@pytest.mark.unit
+class TestUserKeys:
+    """Test per-user keys and the key table."""
+
+    def test_values_are_sealed_under_the_users_key(self, tmp_path):
+        """Test user values name a data key, and users get distinct keys."""
+        store = open_store(tmp_path)
+        service = make_service(store)
+        encrypted = service.encrypt("secret", "m1", "alice")
+
+        assert EncryptionService._unpack(encrypted)[0] == FORMAT_USER_KEY
+        assert service.decrypt(encrypted, "m1") == "secret"
+        assert store.for_user("alice")[0] != store.for_user("bob")[0]
+        assert service.is_current(encrypted, "alice")
+        assert not service.is_current(service.encrypt("secret", "m1"), "alice")
+
+    def test_unwrapped_keys_are_cached(self, tmp_path):
+        """Test a reopened table unwraps each key once, then serves it from the LRU."""
+        encrypted = make_service(open_store(tmp_path)).encrypt("secret", "m1", "alice")
+        store = open_store(tmp_path)
+        service = make_service(store)
+
+        for _ in range(3):
+            assert service.decrypt(encrypted, "m1") == "secret"
+        service.encrypt("more", "m2", "alice")
+
+        stats = store.get_stats()
+        assert stats["unwraps"] == 1
+        assert stats["cache"]["hits"] >= 2
+
+    def test_destroying_a_key_shreds_the_users_values(self, tmp_path):
+        """Test values become unreadable and later writes get a fresh key."""
+        store = open_store(tmp_path)
+        service = make_service(store)
+        encrypted = service.encrypt("secret", "m1", "alice")
+        other = service.encrypt("kept", "m2", "bob")
+
+        assert store.destroy("alice") is True
+        assert store.destroy("alice") is False
+
+        with pytest.raises(ValueError, match="destroyed"):
+            service.decrypt(encrypted, "m1")
+        with pytest.raises(ValueError, match="destroyed"):
+            make_service(open_store(tmp_path)).decrypt(encrypted, "m1")
+        assert service.decrypt(other, "m2") == "kept"
+        assert service.decrypt(service.encrypt("new", "m3", "alice"), "m3") == "new"
+
+    def test_master_rotation_rewraps_keys_not_values(self, tmp_path):
+        """Test rewrapping the table keeps values readable once the old master key is gone."""
+        encrypted = make_service(open_store(tmp_path, "old master")).encrypt("secret", "m1", "alice")
+        rotating = open_store(tmp_path, "new master", previous_keys=["old master"])
+
+        assert rotating.rewrap() == 1
+        assert rotating.rewrap() == 0
+        assert make_service(open_store(tmp_path, "new master"), "new master").decrypt(encrypted, "m1") == "secret"
+
+    def test_destroy_reaches_other_processes_after_the_recheck(self, tmp_path):
+        """Test a worker holding a cached key stops decrypting once another destroys it."""
+        writer = open_store(tmp_path)
+        encrypted = make_service(writer).encrypt("secret", "m1", "alice")
+        worker = open_store(tmp_path, recheck_s=0)
+        service = make_service(worker)
+        assert service.decrypt(encrypted, "m1") == "secret"
+
+        assert writer.destroy("alice") is True
+
+        with pytest.raises(ValueError, match="destroyed"):
+            service.decrypt(encrypted, "m1")
+        assert worker.get_stats()["rechecks"] == 1
+
+    async def test_snapshots_carry_the_key_table(self, tmp_path, vector_store_factory):
+        """Test a replica decrypts user-key values from the table published with its snapshot."""
+        store = open_store(tmp_path)
+        encrypted = make_service(store).encrypt("secret", "m1", "alice")
+        await publish_snapshot(vector_store_factory(), str(tmp_path / "snapshots"), user_keys=store)
+        store.destroy("alice")
+
+        replica = ReplicaVectorStore(str(tmp_path / "snapshots"))
+        await replica.initialize()
+        keys = SnapshotUserKeys(replica, EncryptionService("master key"))
+
+        assert make_service(keys).decrypt(encrypted, "m1") == "secret"
+        assert keys.count() == 1
+        with pytest.raises(ReadOnlyReplicaError):
+            keys.for_user("bob")
+
+
+@pytest.mark.unit
+class TestUserDeletion:
+    """Test deleting every memory of a user."""
+
+    async def test_purge_deletes_in_batches(self, memory_service_factory, vector_store_factory):
+        """Test rows are deleted with one write per batch and other users keep theirs."""
+        store = make_owned_store(vector_store_factory, {"m1": "u1", "m2": "u1", "m3": "u1", "m4": "u2", "m5": "u1"})
+        service = memory_service_factory(store)
+
+        assert await service.purge_user_memories("u1", batch_size=2) == 4
+        assert store.deletes == [["m1", "m2"], ["m3", "m5"]]
+        assert list(store.documents) == ["m4"]
+
+    def test_rows_are_purged_before_responding_without_a_key(self, memory_service_factory, vector_store_factory):
+        """Test a user without a data key is only reported deleted once the rows are gone."""
+        store = make_owned_store(vector_store_factory, {"m1": "u1", "m2": "u1", "m3": "u2"})
+
+        body = delete_user(memory_service_factory(store), "u1")
+
+        assert body["key_destroyed"] is False
+        assert body["memories_deleted"] == 2
+        assert list(store.documents) == ["m3"]
+
+    def test_shredded_users_are_purged_in_the_background(self, tmp_path, memory_service_factory, vector_store_factory):
+        """Test destroying a user's key answers before the purge, which then runs as a task."""
+        keys = open_store(tmp_path)
+        keys.for_user("u1")
+        service = memory_service_factory(make_owned_store(vector_store_factory, {"m1": "u1", "m2": "u2"}))
+        service.user_keys = keys
+
+        body = delete_user(service, "u1")
+
+        assert body["key_destroyed"] is True
+        assert body["memories_deleted"] is None
+        assert list(service.vector_store.documents) == ["m2"]
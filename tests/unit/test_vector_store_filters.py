@@ -0,0 +1,169 @@
+"""
+Unit tests for vector store where-clause construction.
+Tests that request filters are pushed down into Chroma where clauses.
+"""
+
+import pytest
+from datetime import datetime, timezone, timedelta
+
+from app.models.memory_models import SearchMemoryRequest
+from app.services.metadata_filters import compile_filters, MetadataFilterError
+from app.services.vector_store import (
+    VectorStore,
+    METADATA_TYPES_KEY,
+    RESERVED_METADATA_KEYS,
+    TIMESTAMP_EPOCH_KEY,
+    parse_legacy_scalar,
+    to_epoch_seconds
+)
+
+
+@pytest.mark.unit
+class TestTimestampRangeFilters:
+    """Test numeric timestamp handling for time-bounded searches."""
+
+    def test_naive_datetimes_are_treated_as_utc(self):
+        """Test naive and UTC-aware datetimes map to the same epoch."""
+        naive = datetime(2024, 1, 1, 12, 0, 0)
+        aware = naive.replace(tzinfo=timezone.utc)
+
+        assert to_epoch_seconds(naive) == to_epoch_seconds(aware) == 1704110400.0
+
+    def test_offset_datetimes_are_normalized(self):
+        """Test timezone offsets are honoured when converting to epoch."""
+        plus_two = datetime(2024, 1, 1, 14, 0, 0, tzinfo=timezone(timedelta(hours=2)))
+
+        assert to_epoch_seconds(plus_two) == 1704110400.0
+
+    def test_single_condition_is_not_wrapped(self):
+        """Test a single condition is passed through unchanged."""
+        assert VectorStore._build_where([{"user_id": "u1"}]) == {"user_id": "u1"}
+        assert VectorStore._build_where([]) is None
+
+    def test_range_conditions_are_combined_with_and(self):
+        """Test user and time conditions combine into one $and clause."""
+        where = VectorStore._build_where([
+            {"user_id": "u1"},
+            {TIMESTAMP_EPOCH_KEY: {"$gte": 1.0}},
+            {TIMESTAMP_EPOCH_KEY: {"$lte": 2.0}},
+        ])
+
+        assert where == {"$and": [
+            {"user_id": "u1"},
+            {TIMESTAMP_EPOCH_KEY: {"$gte": 1.0}},
+            {TIMESTAMP_EPOCH_KEY: {"$lte": 2.0}},
+        ]}
+
+    def test_inverted_time_range_is_rejected(self):
+        """Test requests with until before since fail validation."""
+        with pytest.raises(ValueError):
+            SearchMemoryRequest(
+                query="meeting notes",
+                user_id="u1",
+                since=datetime(2024, 2, 1),
+                until=datetime(2024, 1, 1, tzinfo=timezone.utc)
+            )
+
+
+@pytest.mark.unit
+class TestTypedMetadata:
+    """Test metadata keeps its native types through storage."""
+
+    def test_scalars_keep_native_types(self):
+        """Test ints, floats and bools are not stringified."""
+        stored, types = VectorStore._encode_metadata({
+            "user_id": "u1",
+            "tags": ["a", "b"],
+            "priority": 3,
+            "score": 0.5,
+            "done": True,
+        })
+
+        assert stored["priority"] == 3 and stored["score"] == 0.5 and stored["done"] is True
+        assert stored["tags"] == "a,b"
+        assert types == {"priority": "int", "score": "float", "done": "bool"}
+
+    def test_lists_and_objects_roundtrip(self):
+        """Test structured values decode back to their original shape."""
+        metadata = {"links": ["a,b", "c"], "extra": {"nested": [1, 2]}}
+        stored, types = VectorStore._encode_metadata(metadata)
+
+        processed = VectorStore()._process_metadata(stored)
+
+        assert processed == metadata
+        assert types == {"links": "list", "extra": "json"}
+
+    def test_updates_without_structured_values_omit_the_type_map(self):
+        """Test an update never writes a None type map, which Chroma rejects."""
+        stored, _ = VectorStore()._merge_metadata({"user_id": "u1"}, {"priority": 2})
+
+        assert METADATA_TYPES_KEY not in stored
+
+    def test_updates_clear_flags_of_replaced_values(self):
+        """Test replacing a list with a scalar empties the row's existing type map."""
+        existing, _ = VectorStore._encode_metadata({"links": ["a"]})
+
+        stored, _ = VectorStore()._merge_metadata(existing, {"links": "plain"})
+
+        assert stored[METADATA_TYPES_KEY] == "{}"
+
+    @pytest.mark.parametrize("value, expected", [
+        ("3", 3),
+        ("-0.25", -0.25),
+        ("1e-05", 1e-05),
+        ("True", True),
+        ("007", "007"),
+        ("1.2.3", "1.2.3"),
+        ("bob", "bob"),
+    ])
+    def test_legacy_stringified_values_are_restored(self, value, expected):
+        """Test only strings str() could have produced from a number or bool are converted."""
+        assert parse_legacy_scalar(value) == expected
+        assert type(parse_legacy_scalar(value)) is type(expected)
+
+
+@pytest.mark.unit
+class TestMetadataFilterCompilation:
+    """Test filter expressions compile into Chroma where conditions."""
+
+    def test_operator_dict_with_several_operators_splits(self):
+        """Test multiple operators on one key become separate conditions."""
+        conditions = compile_filters({"priority": {"$gte": 3, "$lt": 5}}, {"priority": ["int"]})
+
+        assert conditions == [{"priority": {"$gte": 3}}, {"priority": {"$lt": 5}}]
+
+    def test_literal_is_equality(self):
+        """Test a bare value compiles to $eq."""
+        assert compile_filters({"lang": "py"}, {}) == [{"lang": {"$eq": "py"}}]
+
+    def test_equality_on_mixed_numeric_key_matches_both_types(self):
+        """Test integral equality matches ints and floats stored under one key."""
+        conditions = compile_filters({"priority": 5}, {"priority": ["float", "int"]})
+
+        assert conditions == [{"$or": [{"priority": {"$eq": 5}}, {"priority": {"$eq": 5.0}}]}]
+
+    def test_logical_operators_nest(self):
+        """Test $or lists compile each branch."""
+        conditions = compile_filters(
+            {"$or": [{"lang": "py"}, {"priority": {"$lt": 2}, "done": False}]},
+            {}
+        )
+
+        assert conditions == [{"$or": [
+            {"lang": {"$eq": "py"}},
+            {"$and": [{"priority": {"$lt": 2}}, {"done": {"$eq": False}}]},
+        ]}]
+
+    @pytest.mark.parametrize("filters", [
+        {"user_id": "someone-else"},
+        {"_ml_types": "x"},
+        {"lang": {"$regex": "p.*"}},
+        {"priority": {"$gte": "3"}},
+        {"priority": {"$in": []}},
+        {"priority": {"$in": [1, "1"]}},
+        {"lang": {"$gte": 1}},
+    ])
+    def test_invalid_filters_are_rejected(self, filters):
+        """Test reserved keys, unknown operators and type mismatches fail."""
+        with pytest.raises(MetadataFilterError):
+            compile_filters(filters, {"lang": ["str"]}, reserved_keys=RESERVED_METADATA_KEYS)